@@ -0,0 +1,652 @@
+"""Micro-benchmarks for performance work. Run from backend/app, e.g.:
+
+    python benchmarks.py db            # engine profiles: readers vs. a busy writer
+    python benchmarks.py async         # threadpool + sync session vs. async session
+    python benchmarks.py cards         # GET /properties: full rows vs. view=card
+    python benchmarks.py outbox        # email: connection per message vs. outbox sender
+    python benchmarks.py fanout        # price-alert fan-out: ORM loop vs. INSERT ... SELECT
+    python benchmarks.py notifsync     # notification poll: full list vs. unread counter / since delta
+    python benchmarks.py conversations # chat inbox: every message in Python vs. summary table
+    python benchmarks.py visits        # admin visit list: per-row lookups vs. joined projection + cursor
+    python benchmarks.py availability  # visit calendar: per-day scans vs. ranged slot counters
+    python benchmarks.py ratelimit     # rate limiter: timestamp lists vs. GCRA (memory / database)
+
+Benchmarks use a scratch database in a temporary directory, never the real one.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from anyio import to_thread
+from sqlalchemy import func
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import build_async_engine, build_engine
+from migrations import migrate
+from models import (
+    ChatConversation, ChatMessage, Favorite, Notification, NotificationCounter, Property, User, VisitRequest,
+)
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _report(name, latencies, elapsed, extra=""):
+    ms = [x * 1000 for x in latencies]
+    print(
+        f"{name:28} {len(ms) / elapsed:8.0f} req/s   p50 {statistics.median(ms) if ms else 0:7.2f} ms"
+        f"   p99 {_percentile(ms, 99):7.2f} ms{extra}"
+    )
+
+
+def seed_properties(engine, count):
+    now = datetime.now(timezone.utc).date().isoformat()
+    with Session(engine) as session:
+        for i in range(count):
+            session.add(Property(
+                id=uuid4().hex, titulo=f"Imóvel {i}", descricao="Casa de teste " * 20,
+                tipo="venda" if i % 2 else "arrendamento", preco=50_000 + i * 1000,
+                localizacao="Polana", cidade=["Maputo", "Matola", "Beira"][i % 3],
+                tipologia=f"T{i % 5}", area=80 + i % 200, imagem="", galeria=[],
+                vendedorId="2", vendedorNome="Bench", createdAt=now, quartos=i % 4,
+                casasBanho=1, anoConstructao=2020, certificadoEnergetico="B", caracteristicas=[],
+            ))
+        session.commit()
+
+
+def bench_db(args):
+    """Listing reads from N threads while one thread commits notifications."""
+    for profile in ("legacy", "production"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile)
+            migrate(engine)
+            seed_properties(engine, args.rows)
+            stop = threading.Event()
+            read_lat, write_lat = [], []
+
+            def reader():
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    with Session(engine) as session:
+                        session.exec(
+                            select(Property).where(Property.deleted == False, Property.tipo == "venda")
+                            .order_by(Property.preco).limit(20)
+                        ).all()
+                    read_lat.append(time.perf_counter() - t0)
+
+            def writer():
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    with Session(engine) as session:
+                        session.add(Notification(
+                            id=uuid4().hex, user_id="1", title="bench", message="x",
+                            created_at=datetime.now(timezone.utc).isoformat(),
+                        ))
+                        session.commit()
+                    write_lat.append(time.perf_counter() - t0)
+
+            threads = [threading.Thread(target=reader) for _ in range(args.threads)]
+            threads.append(threading.Thread(target=writer))
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            time.sleep(args.seconds)
+            stop.set()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            _report(f"{profile} reads", read_lat, elapsed)
+            _report(f"{profile} writes", write_lat, elapsed)
+            engine.dispose()
+
+
+def bench_async(args):
+    """Concurrent listing reads: sync route model (threadpool) vs. async session."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine, async_engine = build_engine(url), build_async_engine(url)
+        migrate(engine)
+        seed_properties(engine, args.rows)
+        stmt = (
+            select(Property).where(Property.deleted == False, Property.tipo == "venda")
+            .order_by(Property.createdAt.desc(), Property.id.desc()).limit(20)
+        )
+
+        def sync_query():
+            with Session(engine) as session:
+                return session.exec(stmt).all()
+
+        async def via_threadpool():
+            return await to_thread.run_sync(sync_query)
+
+        async def via_async_session():
+            async with AsyncSession(async_engine) as session:
+                return (await session.exec(stmt)).all()
+
+        async def run(name, call):
+            to_thread.current_default_thread_limiter().total_tokens = args.threads
+            latencies = []
+
+            async def client():
+                for _ in range(args.requests // args.concurrency):
+                    t0 = time.perf_counter()
+                    await call()
+                    latencies.append(time.perf_counter() - t0)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(args.concurrency)))
+            _report(name, latencies, time.perf_counter() - start)
+
+        async def both():
+            await run(f"sync ({args.threads} threads)", via_threadpool)
+            await run("async session", via_async_session)
+            await async_engine.dispose()
+
+        asyncio.run(both())
+        engine.dispose()
+
+
+async def _asgi_get(app, path, query=""):
+    """Minimal in-process GET through the full ASGI stack. Returns the body."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    body = bytearray()
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()  # middleware listens for a disconnect while streaming
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    return bytes(body)
+
+
+def bench_cards(args):
+    """GET /properties page: full Property rows + response_model vs. view=card + orjson."""
+    import cache
+    import database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = build_engine(url)
+        migrate(engine)
+        seed_properties(engine, args.rows)
+        # the app reads database.async_engine on every request; point it at the scratch DB
+        database.async_engine = build_async_engine(url)
+        cache.listing_cache.maxsize = 0  # measure query + serialization, not cache hits
+        from main import app
+
+        async def run(name, query):
+            latencies, size = [], 0
+            for _ in range(args.warmup):
+                await _asgi_get(app, "/properties", query)
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                t0 = time.perf_counter()
+                size = len(await _asgi_get(app, "/properties", query))
+                latencies.append(time.perf_counter() - t0)
+            _report(name, latencies, time.perf_counter() - start, f"   {size / 1024:7.1f} KiB/page")
+
+        async def both():
+            base = f"limit={args.limit}"
+            await run("full rows (response_model)", base)
+            await run("view=card (orjson)", base + "&view=card")
+            await database.async_engine.dispose()
+
+        asyncio.run(both())
+        engine.dispose()
+
+
+class SMTPStandIn:
+    """Local SMTP stand-in that accepts everything, with a remote relay's latencies.
+
+    ``connect_delay`` is paid once per connection (TCP + STARTTLS + AUTH round
+    trips to a real relay), ``message_delay`` once per message.
+    """
+
+    def __init__(self, connect_delay: float, message_delay: float):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.connections = self.messages = 0
+        self.port = None
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        writer.write(b"220 stand-in ESMTP\r\n")
+        while line := await reader.readline():
+            command = line[:4].upper()
+            if command == b"EHLO":
+                writer.write(b"250-stand-in\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif command == b"AUTH":
+                writer.write(b"235 2.7.0 Authentication successful\r\n")
+            elif command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                while (await reader.readline()) not in (b".\r\n", b""):
+                    pass
+                await asyncio.sleep(self.message_delay)
+                self.messages += 1
+                writer.write(b"250 2.0.0 Ok: queued\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 2.0.0 Bye\r\n")
+                break
+            else:
+                writer.write(b"250 2.0.0 Ok\r\n")
+            await writer.drain()
+        writer.close()
+
+    def start(self) -> "SMTPStandIn":
+        async def serve():
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await server.serve_forever()
+
+        threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+        self._ready.wait()
+        return self
+
+
+def bench_outbox(args):
+    """Email delivery: a new SMTP connection per message (the old inline send) vs. the outbox sender."""
+    import smtplib
+
+    import mailer
+
+    relay = SMTPStandIn(args.connect_ms / 1000, args.message_ms / 1000).start()
+    mailer.SMTP_HOST, mailer.SMTP_PORT, mailer.SMTP_STARTTLS, mailer.SMTP_PASS = "127.0.0.1", relay.port, False, "x"
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.messages):
+        t0 = time.perf_counter()
+        with smtplib.SMTP(mailer.SMTP_HOST, mailer.SMTP_PORT) as server:
+            server.login(mailer.SMTP_USER, mailer.SMTP_PASS)
+            server.sendmail(mailer.MAILTRAP_SENDER_EMAIL, f"user{i}@example.com", "Subject: x\r\n\r\nbody")
+        latencies.append(time.perf_counter() - t0)
+    _report("connection per message", latencies, time.perf_counter() - start,
+            f"   {relay.connections} connection(s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        mailer.engine = engine
+        relay.connections = 0
+        latencies = []
+        for i in range(args.messages):
+            # what a request handler now pays: an outbox row in its own transaction
+            t0 = time.perf_counter()
+            with Session(engine) as session:
+                mailer.queue_email(session, "bench", f"user{i}@example.com", "x", "body")
+                session.commit()
+            latencies.append(time.perf_counter() - t0)
+        _report("queue in request (outbox)", latencies, sum(latencies))
+
+        connection = mailer.SMTPConnection()
+        start = time.perf_counter()
+        while mailer.drain_once(connection):
+            pass
+        elapsed = time.perf_counter() - start
+        connection.close()
+        print(f"{'outbox sender drain':28} {args.messages / elapsed:8.0f} msg/s   "
+              f"{relay.connections} connection(s)   {elapsed:.2f} s total")
+        engine.dispose()
+
+
+def bench_fanout(args):
+    """Notify N favoriters of a listing: one ORM object per user vs. notifications.fan_out."""
+    from sqlalchemy import delete, insert
+
+    from notifications import fan_out, favoriters
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        now = datetime.now(timezone.utc).isoformat()
+        with Session(engine) as session:
+            session.execute(insert(Favorite), [
+                {"id": uuid4().hex, "user_id": f"user-{i}", "property_id": "hot", "created_at": now}
+                for i in range(args.audience)
+            ])
+            session.commit()
+
+        def orm_loop(session):
+            for fav in session.exec(select(Favorite).where(Favorite.property_id == "hot")).all():
+                session.add(Notification(
+                    id=uuid4().hex, user_id=fav.user_id, title="Preço baixou!", message="m",
+                    type="price_alert", created_at=datetime.now(timezone.utc).isoformat(),
+                ))
+
+        def set_based(session):
+            fan_out(session, favoriters("hot"), title="Preço baixou!", message="m", type="price_alert")
+
+        for name, fn in (("ORM object per favoriter", orm_loop), ("INSERT ... SELECT", set_based)):
+            latencies = []
+            for _ in range(args.repeat):
+                with Session(engine) as session:
+                    session.execute(delete(Notification))
+                    session.commit()
+                    t0 = time.perf_counter()
+                    fn(session)
+                    session.commit()
+                    latencies.append(time.perf_counter() - t0)
+            with Session(engine) as session:
+                written = session.exec(select(func.count()).select_from(Notification)).one()
+            _report(name, latencies, sum(latencies), f"   {written} notifications")
+        engine.dispose()
+
+
+def bench_notifsync(args):
+    """One notification poll per history size: full list vs. unread counter vs. ``since`` delta."""
+    from sqlalchemy import insert
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        polls = {
+            "full list": lambda session, user, cursor: session.exec(
+                select(Notification).where(Notification.user_id == user).order_by(Notification.created_at.desc())
+            ).all(),
+            "unread counter": lambda session, user, cursor: session.get(NotificationCounter, user),
+            "since delta (nothing new)": lambda session, user, cursor: (
+                session.get(NotificationCounter, user),
+                session.exec(
+                    select(Notification).where(Notification.user_id == user, Notification.seq > cursor)
+                    .order_by(Notification.seq).limit(200)
+                ).all(),
+            ),
+        }
+        for size in args.history:
+            user = f"user-{size}"
+            with Session(engine) as session:
+                session.execute(insert(Notification), [
+                    {"id": uuid4().hex, "user_id": user, "title": "t", "message": "m" * 80, "type": "info",
+                     "read": i % 3 == 0, "created_at": datetime.now(timezone.utc).isoformat()}
+                    for i in range(size)
+                ])
+                session.commit()
+                cursor = session.get(NotificationCounter, user).seq
+            print(f"-- {size} notifications")
+            for name, poll in polls.items():
+                latencies = []
+                for _ in range(args.requests):
+                    with Session(engine) as session:
+                        t0 = time.perf_counter()
+                        poll(session, user, cursor)
+                        latencies.append(time.perf_counter() - t0)
+                _report(name, latencies, sum(latencies))
+        engine.dispose()
+
+
+def bench_conversations(args):
+    """An admin's conversation list: all messages grouped in Python vs. the chatconversation summary."""
+    from sqlalchemy import insert
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        with Session(engine) as session:
+            session.execute(insert(User), [
+                {"id": f"user-{i}", "nome": f"Cliente {i}", "role": "cliente"} for i in range(args.partners)
+            ] + [{"id": "admin", "nome": "Admin", "role": "admin"}])
+            session.execute(insert(ChatMessage), [
+                {"id": uuid4().hex, "sender_id": f"user-{i}", "receiver_id": "admin", "message": "Olá" * 20,
+                 "created_at": datetime.now(timezone.utc).isoformat(), "read": m % 2 == 0}
+                for i in range(args.partners) for m in range(args.messages)
+            ])
+            session.commit()
+
+        def in_python(session):
+            sent = session.exec(select(ChatMessage).where(ChatMessage.sender_id == "admin")).all()
+            received = session.exec(select(ChatMessage).where(ChatMessage.receiver_id == "admin")).all()
+            result = []
+            for pid in {m.receiver_id for m in sent} | {m.sender_id for m in received}:
+                partner = session.get(User, pid)
+                msgs = sorted((m for m in sent + received if pid in (m.sender_id, m.receiver_id)),
+                              key=lambda m: m.created_at, reverse=True)
+                unread = len([m for m in received if m.sender_id == pid and not m.read])
+                result.append((partner.nome, msgs[0].message, msgs[0].created_at, unread))
+            return result
+
+        def summary(session):
+            return session.exec(
+                select(ChatConversation, User.nome, User.role)
+                .join(User, User.id == ChatConversation.partner_id)
+                .where(ChatConversation.user_id == "admin")
+                .order_by(ChatConversation.last_message_at.desc())
+            ).all()
+
+        for name, fn in (("all messages in Python", in_python), ("summary table", summary)):
+            latencies = []
+            for _ in range(args.requests):
+                with Session(engine) as session:
+                    t0 = time.perf_counter()
+                    rows = fn(session)
+                    latencies.append(time.perf_counter() - t0)
+            _report(name, latencies, sum(latencies), f"   {len(rows)} conversations")
+        engine.dispose()
+
+
+def bench_visits(args):
+    """GET /visit-requests over a large history: session.get per row vs. one joined projection."""
+    from sqlalchemy import insert
+
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        seed_properties(engine, 500)
+        with Session(engine) as session:
+            prop_ids = session.exec(select(Property.id)).all()
+            session.execute(insert(User), [{"id": f"user-{i}", "nome": f"Cliente {i}", "role": "cliente"} for i in range(1000)])
+            session.execute(insert(VisitRequest), [
+                {"id": uuid4().hex, "property_id": prop_ids[i % len(prop_ids)], "user_id": f"user-{i % 1000}",
+                 "requested_at": f"20{20 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                 "preferred_date": f"20{20 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}", "preferred_time": "10:00",
+                 "status": ("pending", "approved", "rejected", "concluded")[i % 4]}
+                for i in range(args.visits)
+            ])
+            session.commit()
+
+        def per_row(session):
+            out = []
+            for req in session.exec(select(VisitRequest)).all():
+                out.append(main.build_visit_request_read(
+                    req, session.get(Property, req.property_id), session.get(User, req.user_id)))
+            return out
+
+        filters = main.VisitRequestFilters
+        cases = [
+            ("session.get per row (all)", per_row),
+            ("joined projection (all)", lambda session: main.query_visit_requests(session, filters())[0]),
+            ("joined, first page of 50", lambda session: main.query_visit_requests(session, filters(), limit=50)[0]),
+            ("joined, status=pending page", lambda session: main.query_visit_requests(
+                session, filters(status="pending"), limit=50)[0]),
+        ]
+        for name, fn in cases:
+            latencies = []
+            for _ in range(args.requests):
+                with Session(engine) as session:
+                    t0 = time.perf_counter()
+                    rows = fn(session)
+                    latencies.append(time.perf_counter() - t0)
+            _report(name, latencies, sum(latencies), f"   {len(rows)} rows")
+        engine.dispose()
+
+
+def bench_availability(args):
+    """Visit calendar for 30 days: the old per-day scans vs. one ranged read of the slot counters."""
+    from datetime import date, timedelta
+
+    from sqlalchemy import insert
+
+    import visit_rules
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        seed_properties(engine, 500)
+        with Session(engine) as session:
+            prop_ids = session.exec(select(Property.id)).all()
+            session.execute(insert(VisitRequest), [
+                {"id": uuid4().hex, "property_id": prop_ids[i % len(prop_ids)], "user_id": f"user-{i % 1000}",
+                 "requested_at": today.isoformat(),
+                 "preferred_date": (today + timedelta(days=i % args.days)).isoformat(),
+                 "preferred_time": visit_rules.VISIT_TIME_SLOTS[i % len(visit_rules.VISIT_TIME_SLOTS)],
+                 "status": ("pending", "approved", "rejected", "concluded")[i % 4]}
+                for i in range(args.visits)
+            ])
+            session.commit()
+            prop = session.get(Property, prop_ids[0])
+
+        def per_day(session):
+            # what the calendar cost before: GET /visit-availability once per day
+            for offset in range(30):
+                day = (today + timedelta(days=offset)).isoformat()
+                visits = session.exec(select(VisitRequest).where(
+                    VisitRequest.preferred_date == day, VisitRequest.status.in_(visit_rules.ACTIVE_STATUSES),
+                )).all()
+                vendor_props = {p.id for p in session.exec(
+                    select(Property).where(Property.vendedorId == prop.vendedorId)).all()}
+                sum(1 for v in visits if v.property_id in vendor_props)
+            return 30
+
+        def ranged(session):
+            return len(visit_rules.load_days(session, prop, "user-1", today, today + timedelta(days=29)))
+
+        for name, fn in (("30 x per-day scan", per_day), ("one ranged counter read", ranged)):
+            latencies = []
+            for _ in range(args.requests):
+                with Session(engine) as session:
+                    t0 = time.perf_counter()
+                    days = fn(session)
+                    latencies.append(time.perf_counter() - t0)
+            _report(name, latencies, sum(latencies), f"   {days} days")
+        engine.dispose()
+
+
+def bench_ratelimit(args):
+    """Rate-limit checks over many keys: the old timestamp lists vs. GCRA in memory and in the database."""
+    from collections import defaultdict
+
+    import ratelimit
+
+    store = defaultdict(list)
+
+    def timestamp_lists(key, now):
+        # the previous limiter: rebuild the key's list; scan every key once past 10k
+        store[key] = [t for t in store[key] if now - t < 60]
+        if len(store[key]) >= 10:
+            return
+        store[key].append(now)
+        if len(store) > 10_000:
+            for k in [k for k, v in store.items() if not v or now - v[-1] > 60]:
+                del store[k]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        migrate(engine)
+        memory, database = ratelimit.MemoryBackend(), ratelimit.DatabaseBackend(engine)
+        cases = [
+            ("timestamp lists", timestamp_lists),
+            ("GCRA memory", lambda key, now: memory.take(key, now, 6.0, 60.0)),
+            ("GCRA database", lambda key, now: database.take(key, now, 6.0, 60.0)),
+        ]
+        for name, check in cases:
+            checks = args.checks if name != "GCRA database" else args.checks // 10
+            latencies = []
+            started = time.perf_counter()
+            for i in range(checks):
+                t0 = time.perf_counter()
+                check(f"login:ip:10.0.{i % args.keys // 256}.{i % 256}", time.time())
+                latencies.append(time.perf_counter() - t0)
+            _report(name, latencies, time.perf_counter() - started, f"   {checks} checks over {args.keys} keys")
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    db = sub.add_parser("db", help=bench_db.__doc__)
+    db.add_argument("--rows", type=int, default=5000)
+    db.add_argument("--threads", type=int, default=8)
+    db.add_argument("--seconds", type=float, default=5.0)
+    db.set_defaults(func=bench_db)
+    conc = sub.add_parser("async", help=bench_async.__doc__)
+    conc.add_argument("--rows", type=int, default=5000)
+    conc.add_argument("--concurrency", type=int, default=200)
+    conc.add_argument("--requests", type=int, default=4000)
+    conc.add_argument("--threads", type=int, default=40)
+    conc.set_defaults(func=bench_async)
+    cards = sub.add_parser("cards", help=bench_cards.__doc__)
+    cards.add_argument("--rows", type=int, default=5000)
+    cards.add_argument("--limit", type=int, default=50)
+    cards.add_argument("--requests", type=int, default=500)
+    cards.add_argument("--warmup", type=int, default=20)
+    cards.set_defaults(func=bench_cards)
+    outbox = sub.add_parser("outbox", help=bench_outbox.__doc__)
+    outbox.add_argument("--messages", type=int, default=200)
+    outbox.add_argument("--connect-ms", type=float, default=150.0)
+    outbox.add_argument("--message-ms", type=float, default=5.0)
+    outbox.set_defaults(func=bench_outbox)
+    fanout = sub.add_parser("fanout", help=bench_fanout.__doc__)
+    fanout.add_argument("--audience", type=int, default=10000)
+    fanout.add_argument("--repeat", type=int, default=5)
+    fanout.set_defaults(func=bench_fanout)
+    notifsync = sub.add_parser("notifsync", help=bench_notifsync.__doc__)
+    notifsync.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000])
+    notifsync.add_argument("--requests", type=int, default=200)
+    notifsync.set_defaults(func=bench_notifsync)
+    conversations = sub.add_parser("conversations", help=bench_conversations.__doc__)
+    conversations.add_argument("--partners", type=int, default=200)
+    conversations.add_argument("--messages", type=int, default=20)
+    conversations.add_argument("--requests", type=int, default=5)
+    conversations.set_defaults(func=bench_conversations)
+    visits = sub.add_parser("visits", help=bench_visits.__doc__)
+    visits.add_argument("--visits", type=int, default=100_000)
+    visits.add_argument("--requests", type=int, default=3)
+    visits.set_defaults(func=bench_visits)
+    availability = sub.add_parser("availability", help=bench_availability.__doc__)
+    availability.add_argument("--visits", type=int, default=50_000)
+    availability.add_argument("--days", type=int, default=60, help="spread the active visits over this many days")
+    availability.add_argument("--requests", type=int, default=10)
+    availability.set_defaults(func=bench_availability)
+    ratelimit = sub.add_parser("ratelimit", help=bench_ratelimit.__doc__)
+    ratelimit.add_argument("--keys", type=int, default=12_000, help="distinct clients (the old store scanned past 10k)")
+    ratelimit.add_argument("--checks", type=int, default=30_000)
+    ratelimit.set_defaults(func=bench_ratelimit)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""In-process LRU + TTL caches for property reads.
+
+Each worker process has its own caches. Writes made through this process
+invalidate them immediately; writes made by other workers become visible
+once the TTL expires.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``generation`` is bumped by every invalidation. Readers capture it before
+    querying the database and pass it to ``set``, so a result computed before
+    a concurrent write is never stored after that write invalidated the cache.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # invalidated while the value was being computed
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "60"))
+
+# GET /properties pages, keyed on the normalized filter set
+listing_cache = TTLCache("listings", int(os.getenv("LISTING_CACHE_SIZE", "512")), CACHE_TTL)
+# GET /properties/{id}, keyed on the property id
+property_cache = TTLCache("properties", int(os.getenv("PROPERTY_CACHE_SIZE", "2048")), CACHE_TTL)
+
+
+def invalidate_property(property_id: Optional[str] = None) -> None:
+    """Call after any write to a Property. Any listing may include it, so all pages go."""
+    if property_id is not None:
+        property_cache.invalidate(property_id)
+    listing_cache.clear()
+
+
+def invalidate_all_properties() -> None:
+    """For writes that touch many properties at once."""
+    property_cache.clear()
+    listing_cache.clear()
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {c.name: c.stats() for c in (listing_cache, property_cache)}
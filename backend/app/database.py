@@ -1,11 +1,98 @@
-from sqlmodel import create_engine, SQLModel, Session
+import os
+import logging
 
-DATABASE_URL = "sqlite:///./imobiliaria.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# load environment variables from backend/.env (if present)
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+logger = logging.getLogger('imobiliaria')
+
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./imobiliaria.db')
+
+# Engine profile. "production" (default) applies the pragmas below on every
+# connection; "legacy" keeps SQLite defaults (rollback journal,
+# synchronous=FULL) for benchmarking against the tuned profile.
+DB_PROFILE = os.getenv('DB_PROFILE', 'production')
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),  # readers no longer block on writers
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # durable in WAL; fsync only at checkpoints
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-64000')),  # negative = KiB, i.e. 64 MB
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith('sqlite') and ':memory:' not in url and url.rstrip('/') not in ('sqlite:', 'sqlite+pysqlite:')
+
+
+def _install_pragmas(sync_engine, url: str, profile: str) -> None:
+    if not url.startswith('sqlite') or profile != 'production':
+        return
+    pragmas = dict(SQLITE_PRAGMAS)
+    if not _is_file_sqlite(url):
+        pragmas.pop('journal_mode')  # in-memory databases cannot use WAL
+
+    @event.listens_for(sync_engine, 'connect')
+    def _apply_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs = {}
+    if url.startswith('sqlite'):
+        kwargs['connect_args'] = {'check_same_thread': False}
+    if not url.startswith('sqlite') or _is_file_sqlite(url):
+        kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                      pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=not url.startswith('sqlite'))
+    return kwargs
+
+
+def build_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Create the engine for ``url`` with the given tuning profile."""
+    new_engine = create_engine(url, **_engine_kwargs(url))
+    _install_pragmas(new_engine, url, profile)
+    logger.info(f'Database engine: {url} (profile={profile}, pool_size={DB_POOL_SIZE}, max_overflow={DB_MAX_OVERFLOW})')
+    return new_engine
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync SQLAlchemy URL to its async driver (sqlite -> aiosqlite)."""
+    if url.startswith('sqlite:'):
+        return 'sqlite+aiosqlite:' + url[len('sqlite:'):]
+    return url
+
+
+def build_async_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Async engine over the same database and profile, for the async routes."""
+    new_engine = create_async_engine(async_database_url(url), **_engine_kwargs(url))
+    _install_pragmas(new_engine.sync_engine, url, profile)
+    return new_engine
+
+
+engine = build_engine()
+async_engine = build_async_engine()
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+def async_session() -> AsyncSession:
+    # expire_on_commit=False: expired attributes cannot lazy-load under asyncio
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+async def get_async_session():
+    async with async_session() as session:
+        yield session
@@ -0,0 +1,224 @@
+"""Responsive variants for uploaded property images.
+
+Each local upload gets fixed-width WebP copies (IMAGE_VARIANT_WIDTHS) under
+uploads/variants/, recorded on the property as ``variantes``:
+``{original_url: {"<width>": variant_url}}``. Widths are real pixel widths, so
+the frontend can emit them directly as an ``srcset``.
+
+Pillow work is CPU-bound and runs in a process pool (IMAGE_WORKERS), never on
+the event loop. Pillow is in requirements.txt; if it is missing anyway,
+uploads are kept as they are, no variants are recorded, and the API logs a
+warning at startup.
+
+Watermarking (``watermark_image``) runs in the same pool. It always renders
+from the untouched original kept in originals/ (outside the public uploads
+mount), so applying it twice never double-watermarks.
+
+Backfill variants for images already in uploads/, from backend/app:
+
+    python images.py backfill
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+except ImportError:  # see watermarking_available / the startup warning
+    Image = ImageDraw = ImageFont = ImageOps = None
+
+logger = logging.getLogger("imobiliaria")
+
+UPLOADS_DIR = os.path.join(os.path.dirname(__file__), "uploads")
+VARIANTS_DIR = os.path.join(UPLOADS_DIR, "variants")
+VARIANT_WIDTHS = sorted({int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(",")}, reverse=True)
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+ORIGINALS_DIR = os.path.join(os.path.dirname(__file__), "originals")
+WATERMARK_TEXT = os.getenv("WATERMARK_TEXT", "ImovelTop")
+WATERMARK_FONT = os.getenv("WATERMARK_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared image worker pool, started on first use.
+
+    Workers are spawned rather than forked: the API process holds database
+    connections and threads that a forked child must not inherit.
+    """
+    global _pool
+    with _pool_lock:  # the API loop and job worker threads share it
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def upload_path(url: Optional[str]) -> Optional[str]:
+    """Filesystem path of a local ``/uploads/`` image, or None (remote, variant or missing)."""
+    if not url or not url.startswith("/uploads/") or url.startswith("/uploads/variants/"):
+        return None
+    path = os.path.join(UPLOADS_DIR, os.path.basename(url))
+    return path if os.path.isfile(path) else None
+
+
+def render_variants(path: str) -> Dict[str, str]:
+    """Write the WebP variants of one image. Runs in a pool worker.
+
+    Never upscales: an image narrower than a configured width gets a single
+    variant at its own width in place of the larger ones. Each size is resized
+    from the previous (larger) one, which is much cheaper than from the original.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+    variants: Dict[str, str] = {}
+    with Image.open(path) as original:
+        # JPEG: let the decoder downscale by 1/2..1/8 when the original is far larger
+        original.draft("RGB", (VARIANT_WIDTHS[0], VARIANT_WIDTHS[0]))
+        source = ImageOps.exif_transpose(original)
+        source = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+        for width in VARIANT_WIDTHS:
+            target = min(width, source.width)
+            if str(target) in variants:
+                continue
+            if target < source.width:
+                source = source.resize((target, max(1, round(source.height * target / source.width))), Image.LANCZOS)
+            name = f"{stem}-{target}.webp"
+            source.save(os.path.join(VARIANTS_DIR, name), "WEBP", quality=WEBP_QUALITY, method=4)
+            variants[str(target)] = f"/uploads/variants/{name}"
+    return variants
+
+
+def _render_or_none(path: str) -> Optional[Dict[str, str]]:
+    try:
+        return render_variants(path)
+    except Exception as e:  # a corrupt upload must not fail the whole listing
+        logger.warning(f"Image variants failed for {path}: {e}")
+        return None
+
+
+def watermarking_available() -> bool:
+    return Image is not None
+
+
+@lru_cache(maxsize=32)
+def _watermark_font(size: int):
+    """Loaded once per size per worker process, not once per image."""
+    try:
+        return ImageFont.truetype(WATERMARK_FONT, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def watermark_image(path: str) -> Dict[str, str]:
+    """Watermark one upload in place and re-render its variants. Runs in a pool worker.
+
+    The first call keeps a copy of the upload in ORIGINALS_DIR; every call
+    renders from that copy, so the result is the same however often it runs.
+    """
+    original = os.path.join(ORIGINALS_DIR, os.path.basename(path))
+    if not os.path.exists(original):
+        os.makedirs(ORIGINALS_DIR, exist_ok=True)
+        shutil.copy2(path, original)
+    with Image.open(original) as src:
+        img = ImageOps.exif_transpose(src).convert("RGBA")
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    font = _watermark_font(max(24, img.size[0] // 20 // 8 * 8))  # sizes quantized so the cache stays small
+    bbox = draw.textbbox((0, 0), WATERMARK_TEXT, font=font)
+    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    draw.text((img.size[0] - tw - 20, img.size[1] - th - 20), WATERMARK_TEXT, fill=(255, 255, 255, 100), font=font)
+    result = Image.alpha_composite(img, overlay).convert("RGB")
+
+    ext = os.path.splitext(path)[1].lower()
+    tmp = f"{path}.tmp"
+    result.save(tmp, Image.registered_extensions().get(ext, "JPEG"))
+    os.replace(tmp, path)  # readers never see a half-written file
+    return render_variants(path)
+
+
+def _watermark_or_error(path: str) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    try:
+        return watermark_image(path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def watermark_many(paths: Dict[str, str], on_result) -> None:
+    """Watermark ``{url: path}`` in the process pool, all images in parallel.
+
+    Blocks until every image is done; ``on_result(url, variants, error)`` is
+    called (in the calling thread) as each one finishes.
+    """
+    futures = {get_pool().submit(_watermark_or_error, path): url for url, path in paths.items()}
+    for future in as_completed(futures):
+        variants, error = future.result()
+        on_result(futures[future], variants, error)
+
+
+async def generate_variants(urls: Iterable[Optional[str]]) -> Dict[str, Dict[str, str]]:
+    """Render variants for the local uploads among ``urls`` in the process pool."""
+    if Image is None:
+        return {}
+    jobs = {url: path for url in dict.fromkeys(urls) if (path := upload_path(url))}
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(get_pool(), _render_or_none, p) for p in jobs.values()))
+    return {url: result for url, result in zip(jobs, results) if result}
+
+
+def backfill(engine) -> int:
+    """Render and record variants for every property image that has none yet."""
+    from sqlmodel import Session, select
+    from models import Property
+
+    with Session(engine) as session:
+        props = session.exec(select(Property)).all()
+        todo: Dict[str, str] = {}
+        for prop in props:
+            recorded = prop.variantes or {}
+            for url in [prop.imagem, *(prop.galeria or [])]:
+                path = upload_path(url)
+                if path and url not in recorded:
+                    todo[url] = path
+        if not todo:
+            return 0
+        try:
+            rendered = {url: r for url, r in zip(todo, get_pool().map(_render_or_none, todo.values())) if r}
+        finally:
+            shutdown_pool()
+        for prop in props:
+            found = {url: rendered[url] for url in [prop.imagem, *(prop.galeria or [])] if url in rendered}
+            if found:
+                prop.variantes = {**(prop.variantes or {}), **found}
+                session.add(prop)
+        session.commit()
+        return len(rendered)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        sys.exit(__doc__)
+    if Image is None:
+        sys.exit("Pillow is not installed (pip install Pillow)")
+    from database import engine
+    from migrations import migrate
+
+    migrate(engine)
+    print(f"Rendered variants for {backfill(engine)} image(s).")
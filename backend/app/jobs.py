@@ -0,0 +1,332 @@
+"""Durable background job queue on the application database.
+
+Slow or failure-prone side effects (watermarking, notification fan-out,
+periodic cleanup) are rows in the ``job`` table. They are enqueued in the
+same transaction as the change that causes them, so a job exists exactly when
+that change committed, and survives restarts until a worker runs it.
+
+Workers claim the next due job (lowest ``priority``, then oldest ``run_at``)
+with one atomic ``UPDATE ... RETURNING``, so concurrent workers never run the
+same job. A claimed job holds a lease (JOB_LEASE_SECONDS, extended by
+``set_progress``); if its worker dies the job is re-queued when the lease
+expires. A failing job is retried with exponential backoff and jitter until
+``max_attempts``, then marked ``failed`` with its last error.
+
+Handlers are registered per kind with ``@job_handler`` (see tasks.py).
+
+Run dedicated workers from backend/app:
+
+    python jobs.py work --processes 4
+    python jobs.py stats
+
+The API also runs one worker thread per process (JOB_EMBEDDED_WORKER=1, the
+default); set it to 0 when dedicated workers are deployed.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func, text, update
+from sqlmodel import Session, select
+
+from database import engine
+from models import Job
+
+logger = logging.getLogger("imobiliaria")
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))  # seconds between polls when idle
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "5"))  # first retry delay, doubled per attempt
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "3600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))  # finished jobs kept for inspection
+JOB_CLEANUP_INTERVAL = int(os.getenv("JOB_CLEANUP_INTERVAL", "600"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # default for `python jobs.py work`
+
+PRIORITY_HIGH = 0  # a user is waiting on it
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9  # housekeeping
+
+HANDLERS: Dict[str, Callable[[Job], None]] = {}
+
+# Job timestamps share one fixed-width ISO format (see _iso), so the queries
+# compare them as plain strings.
+_CLAIM = text("""
+    UPDATE job
+    SET status = 'running', attempts = attempts + 1, started_at = :now,
+        locked_until = :lease, worker = :worker
+    WHERE id = (
+        SELECT id FROM job
+        WHERE status = 'queued' AND run_at <= :now
+        ORDER BY priority, run_at
+        LIMIT 1
+    )
+    RETURNING id
+""")
+
+_RELEASE_EXPIRED = text("""
+    UPDATE job
+    SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        finished_at = CASE WHEN attempts >= max_attempts THEN :now END,
+        run_at = :now, locked_until = NULL, worker = NULL,
+        last_error = 'lease expired (worker lost)'
+    WHERE status = 'running' AND locked_until < :now
+""")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+def job_handler(kind: str):
+    """Register the decorated function as the handler for ``kind`` jobs."""
+    def register(fn: Callable[[Job], None]):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(
+    session: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_NORMAL,
+    delay: float = 0,
+    max_attempts: int = 5,
+) -> Job:
+    """Add a job to ``session``; it is queued when the caller commits."""
+    now = _now()
+    job = Job(
+        id=uuid4().hex,
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=_iso(now + timedelta(seconds=delay)),
+        created_at=_iso(now),
+    )
+    session.add(job)
+    return job
+
+
+def enqueue_once(session: Session, kind: str, payload: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Job]:
+    """Like ``enqueue``, unless a ``kind`` job is already queued or running."""
+    pending = session.exec(
+        select(Job.id).where(Job.kind == kind, Job.status.in_(("queued", "running"))).limit(1)
+    ).first()
+    if pending:
+        return None
+    return enqueue(session, kind, payload, **kwargs)
+
+
+def backoff(attempts: int) -> float:
+    """Delay before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)  # spread retries of jobs that failed together
+
+
+def claim(worker: str) -> Optional[Job]:
+    """Atomically take the next due job, or None when nothing is due."""
+    now = _now()
+    with Session(engine) as session:
+        job_id = session.execute(
+            _CLAIM,
+            {"now": _iso(now), "lease": _iso(now + timedelta(seconds=JOB_LEASE_SECONDS)), "worker": worker},
+        ).scalar()
+        session.commit()
+        return session.get(Job, job_id) if job_id else None
+
+
+def release_expired() -> int:
+    """Re-queue (or fail, when out of attempts) running jobs whose lease expired."""
+    with Session(engine) as session:
+        released = session.execute(_RELEASE_EXPIRED, {"now": _iso(_now())}).rowcount
+        session.commit()
+    if released:
+        logger.warning(f"Re-queued {released} job(s) with an expired lease")
+    return released
+
+
+def set_progress(job_id: str, progress: Dict[str, Any]) -> None:
+    """Record progress for pollers; also extends the job's lease."""
+    now = _now()
+    with Session(engine) as session:
+        session.execute(
+            update(Job).where(Job.id == job_id).values(
+                progress=progress, locked_until=_iso(now + timedelta(seconds=JOB_LEASE_SECONDS)),
+            )
+        )
+        session.commit()
+
+
+def _finish(job: Job, error: Optional[str]) -> None:
+    now = _now()
+    if error is None:
+        values = {"status": "done", "finished_at": _iso(now), "last_error": None}
+    elif job.attempts >= job.max_attempts:
+        values = {"status": "failed", "finished_at": _iso(now), "last_error": error}
+    else:
+        values = {"status": "queued", "run_at": _iso(now + timedelta(seconds=backoff(job.attempts))), "last_error": error}
+    with Session(engine) as session:
+        session.execute(update(Job).where(Job.id == job.id).values(locked_until=None, **values))
+        session.commit()
+
+
+def run_one(worker: str) -> bool:
+    """Claim and run one job. Returns False when the queue had nothing due."""
+    job = claim(worker)
+    if job is None:
+        return False
+    started = time.perf_counter()
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise LookupError(f"no handler registered for {job.kind!r}")
+        handler(job)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts} failed: {error}")
+        _finish(job, error)
+    else:
+        _finish(job, None)
+        logger.info(f"Job {job.id} ({job.kind}) done in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+def work(worker: str, stop: threading.Event) -> None:
+    """Run jobs until ``stop`` is set; between jobs, poll every JOB_POLL_INTERVAL."""
+    logger.info(f"Job worker {worker} started")
+    while not stop.is_set():
+        try:
+            if run_one(worker):
+                continue
+            release_expired()
+        except Exception as e:  # e.g. the database is locked; keep the worker alive
+            logger.error(f"Job worker {worker}: {e}")
+        stop.wait(JOB_POLL_INTERVAL)
+    logger.info(f"Job worker {worker} stopped")
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def start_worker_thread() -> Tuple[threading.Thread, threading.Event]:
+    """Run a worker in a daemon thread of this process (the API's embedded worker)."""
+    stop = threading.Event()
+    thread = threading.Thread(target=lambda: work(worker_name(), stop), name="job-worker", daemon=True)
+    thread.start()
+    return thread, stop
+
+
+def queue_stats(session: Session) -> Dict[str, Any]:
+    """Queue depth by status and kind, and latency of jobs finished in the last hour."""
+    now = _iso(_now())
+    by_status = {status: 0 for status in ("queued", "running", "done", "failed")}
+    by_kind: Dict[str, Dict[str, int]] = {}
+    for kind, status, count in session.exec(
+        select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status)
+    ).all():
+        by_status[status] = by_status.get(status, 0) + count
+        by_kind.setdefault(kind, {})[status] = count
+
+    ready, oldest = session.exec(
+        select(func.count(), func.min(Job.run_at)).where(Job.status == "queued", Job.run_at <= now)
+    ).one()
+
+    def seconds(later, earlier):
+        return (func.julianday(later) - func.julianday(earlier)) * 86400
+
+    since = _iso(_now() - timedelta(hours=1))
+    done, failed, avg_wait, max_wait, avg_run = session.exec(
+        select(
+            func.count().filter(Job.status == "done"),
+            func.count().filter(Job.status == "failed"),
+            func.avg(seconds(Job.started_at, Job.run_at)),
+            func.max(seconds(Job.started_at, Job.run_at)),
+            func.avg(seconds(Job.finished_at, Job.started_at)),
+        ).where(Job.finished_at >= since)
+    ).one()
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        "ready": ready,
+        "scheduled": by_status["queued"] - ready,  # waiting for a retry or a delay
+        "oldest_ready_age_s": rounded(
+            session.exec(select(seconds(now, oldest))).one() if oldest else None
+        ),
+        "by_status": by_status,
+        "by_kind": by_kind,
+        "last_hour": {
+            "done": done,
+            "failed": failed,
+            "avg_wait_s": rounded(avg_wait),
+            "max_wait_s": rounded(max_wait),
+            "avg_run_s": rounded(avg_run),
+        },
+    }
+
+
+def _worker_process(index: int) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    import tasks  # noqa: F401 — registers the job handlers
+    # This file runs as __mp_main__ here; the handlers live on the imported ``jobs`` module
+    import jobs
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())  # finish the current job, then exit
+    threading.current_thread().name = f"worker-{index}"
+    jobs.work(jobs.worker_name(), stop)
+
+
+def run_workers(processes: int) -> None:
+    """Run ``processes`` worker processes until SIGTERM/SIGINT."""
+    ctx = multiprocessing.get_context("spawn")  # no inherited connections or threads
+    children = [ctx.Process(target=_worker_process, args=(i,), name=f"job-worker-{i}") for i in range(processes)]
+    for child in children:
+        child.start()
+
+    def forward(signum, _frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Background job workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    work_cmd = sub.add_parser("work", help="run worker processes")
+    work_cmd.add_argument("--processes", type=int, default=JOB_WORKERS)
+    sub.add_parser("stats", help="print queue depth and latency")
+    args = parser.parse_args()
+
+    from migrations import migrate
+
+    migrate(engine)
+    if args.command == "stats":
+        with Session(engine) as session:
+            print(json.dumps(queue_stats(session), indent=2))
+    else:
+        run_workers(args.processes)
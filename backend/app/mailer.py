@@ -0,0 +1,348 @@
+"""Outgoing email through a transactional outbox (Mailtrap SMTP sandbox by default).
+
+Request handlers never talk to the relay. ``queue_*_email`` adds a row to the
+``emailoutbox`` table in the caller's transaction, and the outbox sender
+delivers it in the background:
+
+- it claims pending messages in batches with one atomic ``UPDATE ... RETURNING``,
+  so several senders (one per API process) never send the same message;
+- it sends them over one persistent, authenticated SMTP connection, reopened
+  only when the relay drops it, after SMTP_IDLE_SECONDS without traffic or
+  after SMTP_MAX_MESSAGES_PER_CONNECTION messages;
+- it records each message as ``sent``, retries transient failures with
+  exponential backoff, and marks it ``failed`` when the relay rejects it
+  permanently or OUTBOX_MAX_ATTEMPTS is reached.
+
+Each API process runs a sender thread unless OUTBOX_EMBEDDED_SENDER=0. To run
+a standalone sender from backend/app instead:
+
+    python mailer.py send
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func, text, update
+from sqlmodel import Session, select
+
+from database import engine
+from jobs import backoff
+from models import EmailOutbox
+
+logger = logging.getLogger("imobiliaria")
+
+SMTP_HOST = os.getenv("SMTP_HOST", "sandbox.smtp.mailtrap.io")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "2525"))
+SMTP_USER = os.getenv("SMTP_USER", "0188c1a5fe0b2d")
+SMTP_PASS = os.getenv("SMTP_PASS", "4012e4cd689d55")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))  # close before the relay times us out
+SMTP_MAX_MESSAGES = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+MAILTRAP_SENDER_EMAIL = os.getenv("MAILTRAP_SENDER_EMAIL", "noreply@imoveltop.co.mz")
+MAILTRAP_SENDER_NAME = os.getenv("MAILTRAP_SENDER_NAME", "ImovelTop")
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+# Frontend URL for email links (password reset, etc.)
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+
+_CLAIM = text("""
+    UPDATE emailoutbox
+    SET status = 'sending', attempts = attempts + 1, locked_until = :lease
+    WHERE id IN (
+        SELECT id FROM emailoutbox
+        WHERE status = 'pending' AND next_attempt_at <= :now
+        ORDER BY next_attempt_at
+        LIMIT :limit
+    )
+    RETURNING id, to_email, subject, body, attempts, max_attempts, created_at
+""")
+
+_RELEASE_EXPIRED = text("""
+    UPDATE emailoutbox
+    SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+        next_attempt_at = :now, locked_until = NULL,
+        last_error = 'lease expired (sender lost)'
+    WHERE status = 'sending' AND locked_until < :now
+""")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+# ---------------------------------------------------------------------------
+# Queueing (called from request handlers)
+# ---------------------------------------------------------------------------
+
+def queue_email(session: Session, kind: str, to_email: str, subject: str, body: str) -> EmailOutbox:
+    """Add an email to ``session``; the sender picks it up once the caller commits."""
+    now = _iso(_now())
+    message = EmailOutbox(
+        id=uuid4().hex, kind=kind, to_email=to_email, subject=subject, body=body,
+        max_attempts=OUTBOX_MAX_ATTEMPTS, next_attempt_at=now, created_at=now,
+    )
+    session.add(message)
+    return message
+
+
+def queue_verification_email(session: Session, to_email: str, code: str, user_name: str) -> EmailOutbox:
+    """Queue a 6-digit verification code."""
+    # Always print the code to the console for easy local development
+    logger.info(f"===== VERIFICATION CODE for {to_email}: {code} =====")
+    print(f"\n{'='*60}")
+    print(f"  VERIFICATION CODE for {to_email}: {code}")
+    print(f"{'='*60}\n")
+
+    subject = "ImovelTop — Código de Verificação"
+    body = (
+        f"Olá {user_name},\n\n"
+        f"O seu código de verificação é: {code}\n\n"
+        f"Este código expira em 15 minutos.\n\n"
+        f"Se não solicitou esta conta, ignore este email.\n\n"
+        f"— Equipa ImovelTop"
+    )
+    return queue_email(session, "verification", to_email, subject, body)
+
+
+def queue_password_reset_email(session: Session, to_email: str, token: str, user_name: str) -> EmailOutbox:
+    """Queue a password-reset link."""
+    reset_link = f"{FRONTEND_URL}/reset-password?token={token}"
+    # Always print the token to the console for development
+    logger.info(f"===== PASSWORD RESET TOKEN for {to_email}: {token} =====")
+    print(f"\n{'='*60}")
+    print(f"  PASSWORD RESET TOKEN for {to_email}: {token}")
+    print(f"  Reset link: {reset_link}")
+    print(f"{'='*60}\n")
+
+    subject = "ImovelTop — Redefinir Senha"
+    body = (
+        f"Olá {user_name},\n\n"
+        f"Recebemos um pedido para redefinir a sua senha.\n\n"
+        f"O seu token de redefinição é: {token}\n\n"
+        f"Ou clique no link: {reset_link}\n\n"
+        f"Este token expira em 1 hora.\n\n"
+        f"Se não solicitou esta alteração, ignore este email.\n\n"
+        f"— Equipa ImovelTop"
+    )
+    return queue_email(session, "password_reset", to_email, subject, body)
+
+
+# ---------------------------------------------------------------------------
+# Sending
+# ---------------------------------------------------------------------------
+
+class SMTPConnection:
+    """One authenticated SMTP session, reused across messages and batches."""
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent = 0
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _open(self) -> None:
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            smtp.login(SMTP_USER, SMTP_PASS)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp, self._sent = smtp, 0
+        self.connects += 1
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def close_if_idle(self) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+
+    def send(self, to_email: str, message: str) -> None:
+        if self._sent >= SMTP_MAX_MESSAGES:
+            self.close()
+        self.close_if_idle()
+        for retry in (False, True):
+            if self._smtp is None:
+                self._open()
+            try:
+                self._smtp.sendmail(MAILTRAP_SENDER_EMAIL, [to_email], message)
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # the relay dropped a reused connection: reconnect once
+                self._smtp = None
+                if retry:
+                    raise
+        self._sent += 1
+        self._last_used = time.monotonic()
+
+
+def render_message(row) -> str:
+    msg = MIMEMultipart()
+    msg["From"] = f"{MAILTRAP_SENDER_NAME} <{MAILTRAP_SENDER_EMAIL}>"
+    msg["To"] = row.to_email
+    msg["Subject"] = row.subject
+    msg["Date"] = formatdate(localtime=False)
+    # stable across retries, so a relay that did accept a "failed" attempt can de-duplicate
+    msg["Message-ID"] = f"<{row.id}@{MAILTRAP_SENDER_EMAIL.split('@')[-1]}>"
+    msg.attach(MIMEText(row.body, "plain", "utf-8"))
+    return msg.as_string()
+
+
+def _permanent(e: Exception) -> bool:
+    """The relay rejected this message (5xx), so retrying it cannot help."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return True
+    return (
+        isinstance(e, smtplib.SMTPResponseException)
+        and not isinstance(e, smtplib.SMTPAuthenticationError)
+        and 500 <= e.smtp_code < 600
+    )
+
+
+def claim_batch(limit: int = OUTBOX_BATCH_SIZE) -> List[Any]:
+    now = _now()
+    with Session(engine) as session:
+        rows = session.execute(_CLAIM, {
+            "now": _iso(now), "lease": _iso(now + timedelta(seconds=OUTBOX_LEASE_SECONDS)), "limit": limit,
+        }).all()
+        session.commit()
+    return sorted(rows, key=lambda r: r.created_at)
+
+
+def _record(results: List[Dict[str, Any]]) -> None:
+    with Session(engine) as session:
+        session.execute(update(EmailOutbox), results)  # bulk UPDATE by primary key
+        session.commit()
+
+
+def drain_once(connection: SMTPConnection) -> int:
+    """Claim one batch and send it. Returns the number of messages claimed."""
+    rows = claim_batch()
+    if not rows:
+        return 0
+    if not SMTP_PASS:
+        logger.warning(f"SMTP_PASS not set — skipping {len(rows)} email(s)")
+        _record([{"id": r.id, "status": "skipped", "locked_until": None} for r in rows])
+        return len(rows)
+
+    results: List[Dict[str, Any]] = []
+    for i, row in enumerate(rows):
+        try:
+            connection.send(row.to_email, render_message(row))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if _permanent(e):
+                logger.error(f"Email {row.id} to {row.to_email} rejected: {error}")
+                results.append({"id": row.id, "status": "failed", "locked_until": None, "last_error": error})
+                continue
+            # relay unreachable, auth failure, repeated disconnect: retry this and the rest later
+            logger.warning(f"Email sending interrupted, {len(rows) - i} message(s) will be retried: {error}")
+            connection.close()
+            for r in rows[i:]:
+                if r.attempts >= r.max_attempts:
+                    results.append({"id": r.id, "status": "failed", "locked_until": None, "last_error": error})
+                else:
+                    results.append({
+                        "id": r.id, "status": "pending", "locked_until": None, "last_error": error,
+                        "next_attempt_at": _iso(_now() + timedelta(seconds=backoff(r.attempts))),
+                    })
+            break
+        results.append({"id": row.id, "status": "sent", "locked_until": None, "sent_at": _iso(_now()), "last_error": None})
+    _record(results)
+    sent = sum(r["status"] == "sent" for r in results)
+    logger.info(f"Outbox: sent {sent}/{len(rows)} email(s) ({connection.connects} SMTP connection(s) opened so far)")
+    return len(rows)
+
+
+def release_expired() -> int:
+    """Return messages claimed by a sender that died back to pending (or fail them, when out of attempts)."""
+    with Session(engine) as session:
+        released = session.execute(_RELEASE_EXPIRED, {"now": _iso(_now())}).rowcount
+        session.commit()
+    if released:
+        logger.warning(f"Released {released} email(s) with an expired lease")
+    return released
+
+
+def run_sender(stop: threading.Event) -> None:
+    """Deliver the outbox until ``stop`` is set, polling every OUTBOX_POLL_INTERVAL when empty."""
+    connection = SMTPConnection()
+    logger.info("Email outbox sender started")
+    try:
+        while not stop.is_set():
+            try:
+                if drain_once(connection):
+                    continue
+                release_expired()
+                connection.close_if_idle()
+            except Exception as e:  # e.g. the database is locked; keep the sender alive
+                logger.error(f"Email outbox sender: {e}")
+            stop.wait(OUTBOX_POLL_INTERVAL)
+    finally:
+        connection.close()
+        logger.info("Email outbox sender stopped")
+
+
+def start_sender_thread() -> Tuple[threading.Thread, threading.Event]:
+    stop = threading.Event()
+    thread = threading.Thread(target=run_sender, args=(stop,), name="email-outbox", daemon=True)
+    thread.start()
+    return thread, stop
+
+
+def outbox_stats(session: Session) -> Dict[str, Any]:
+    """Outbox depth by status and delivery latency (queued → sent) over the last hour."""
+    by_status = {status: 0 for status in ("pending", "sending", "sent", "failed", "skipped")}
+    for status, count in session.exec(select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)).all():
+        by_status[status] = count
+    latency = (func.julianday(EmailOutbox.sent_at) - func.julianday(EmailOutbox.created_at)) * 86400
+    avg_latency, max_latency = session.exec(
+        select(func.avg(latency), func.max(latency)).where(
+            EmailOutbox.status == "sent", EmailOutbox.sent_at >= _iso(_now() - timedelta(hours=1)),
+        )
+    ).one()
+    return {
+        "by_status": by_status,
+        "last_hour_avg_delivery_s": round(avg_latency, 3) if avg_latency is not None else None,
+        "last_hour_max_delivery_s": round(max_latency, 3) if max_latency is not None else None,
+    }
+
+
+if __name__ == "__main__":
+    import signal
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if len(sys.argv) < 2 or sys.argv[1] != "send":
+        sys.exit(__doc__)
+    from migrations import migrate
+
+    migrate(engine)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    run_sender(stop)
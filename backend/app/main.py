@@ -1,37 +1,60 @@
 import os
 import re
+import io
+import csv
 import json
+import base64
+import hashlib
 import shutil
 import random
 import logging
-import time
-from collections import defaultdict
 from datetime import date, datetime, timedelta, timezone
-from typing import Optional, List, Dict, Any
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import uuid4
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Form, Request, Query
+import orjson
+from anyio import to_thread
+
+from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Form, Header, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ValidationError, field_validator
 from sqlmodel import Session, select
-from sqlalchemy import func, text
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import JSON, case, delete, func, literal, tuple_, type_coerce, union_all, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import aliased
 
-from database import create_db_and_tables, engine, get_session
+from cache import (
+    cache_stats, invalidate_all_properties, invalidate_property, listing_cache, property_cache,
+)
+from database import async_engine, async_session, engine, get_async_session, get_session
 from models import (
-    Property, User, VisitRequest, Favorite, Notification,
-    ChatMessage, Review, PasswordResetToken, EmailVerification,
-    Cliente, Vendedor, PriceHistory,
+    Property, User, VisitRequest, Favorite, Notification, NotificationCounter,
+    ChatMessage, ChatConversation, Review, PasswordResetToken, EmailVerification,
+    Cliente, Vendedor, PriceHistory, Job,
 )
+from images import generate_variants, shutdown_pool, watermarking_available
 from initial_data import seed
+from jobs import PRIORITY_LOW, enqueue, enqueue_once, queue_stats, start_worker_thread
+from mailer import outbox_stats, queue_password_reset_email, queue_verification_email, start_sender_thread
+from migrations import migrate
+from ratelimit import rate_limit
+from notifications import admins, fan_out, notify
+from realtime import hub, publish
+from search import apply_search_filter, apply_search_ranking, init_search
 from security import (
-    create_access_token, get_current_user, require_roles,
-    verify_password, get_password_hash,
+    STREAM_SCOPE, STREAM_TICKET_SECONDS, create_access_token, create_stream_ticket, get_current_user,
+    get_current_user_async, oauth2_scheme, require_roles, verify_password, get_password_hash, token_expiry,
+    user_from_token,
+)
+from tasks import watermark_progress  # importing tasks registers the job handlers
+from visit_rules import (
+    PLATFORM_DAY_LIMIT, VENDOR_DAY_LIMIT, VISIT_TIME_SLOTS, blocked_slots, booking_conflict, booking_error, load_days,
+    over_capacity,
 )
 
 # ---------------------------------------------------------------------------
@@ -40,50 +63,24 @@ from security import (
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("imobiliaria")
 
-# ---------------------------------------------------------------------------
-# Mailtrap SMTP Sandbox config
-# ---------------------------------------------------------------------------
-SMTP_HOST = os.getenv("SMTP_HOST", "sandbox.smtp.mailtrap.io")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "2525"))
-SMTP_USER = os.getenv("SMTP_USER", "0188c1a5fe0b2d")
-SMTP_PASS = os.getenv("SMTP_PASS", "4012e4cd689d55")
-MAILTRAP_SENDER_EMAIL = os.getenv("MAILTRAP_SENDER_EMAIL", "noreply@imoveltop.co.mz")
-MAILTRAP_SENDER_NAME = os.getenv("MAILTRAP_SENDER_NAME", "ImovelTop")
-
 # Upload constraints
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
 MAX_UPLOAD_SIZE_MB = 10
 MAX_UPLOAD_SIZE_BYTES = MAX_UPLOAD_SIZE_MB * 1024 * 1024
 MAX_REQUEST_BODY_MB = 50  # total multipart body limit (multiple images)
 MAX_REQUEST_BODY_BYTES = MAX_REQUEST_BODY_MB * 1024 * 1024
+IMPORT_MAX_BODY_MB = int(os.getenv("IMPORT_MAX_BODY_MB", "500"))  # POST /properties/import
 
 # Password policy
 MIN_PASSWORD_LENGTH = 5
 
-# ---------------------------------------------------------------------------
-# Rate limiting (in-memory, bounded)
-# ---------------------------------------------------------------------------
-_rate_limit_store: Dict[str, List[float]] = defaultdict(list)
-_RATE_LIMIT_MAX_KEYS = 10_000  # prevent unbounded growth
-RATE_LIMIT_WINDOW = 60  # seconds
-RATE_LIMIT_MAX = 10  # max requests per window
-
-
-def check_rate_limit(key: str, max_requests: int = RATE_LIMIT_MAX, window: int = RATE_LIMIT_WINDOW) -> None:
-    """Raise 429 if the key has exceeded max_requests in the last `window` seconds."""
-    now = time.time()
-    timestamps = _rate_limit_store[key]
-    # prune old entries
-    _rate_limit_store[key] = [t for t in timestamps if now - t < window]
-    if len(_rate_limit_store[key]) >= max_requests:
-        raise HTTPException(status_code=429, detail="Demasiadas tentativas. Tente novamente mais tarde.")
-    _rate_limit_store[key].append(now)
-    # Periodic cleanup: remove stale keys when store grows too large
-    if len(_rate_limit_store) > _RATE_LIMIT_MAX_KEYS:
-        stale_keys = [k for k, v in _rate_limit_store.items() if not v or now - v[-1] > window]
-        for k in stale_keys:
-            del _rate_limit_store[k]
+# Worker threads for the remaining sync (def) routes; async routes do not use them
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
+# Run a background job worker thread in each API process (see jobs.py)
+JOB_EMBEDDED_WORKER = os.getenv("JOB_EMBEDDED_WORKER", "1") == "1"
+# Deliver the email outbox from each API process (see mailer.py)
+OUTBOX_EMBEDDED_SENDER = os.getenv("OUTBOX_EMBEDDED_SENDER", "1") == "1"
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -100,6 +97,71 @@ def user_to_dict(user: User) -> Dict[str, Any]:
     }
 
 
+def encode_cursor(values: List[Any]) -> str:
+    """Encode keyset pagination values as an opaque, URL-safe cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor. Raises 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the JSON encoding of ``parts`` (row ids, versions, ...)."""
+    raw = json.dumps(parts, separators=(",", ":"), default=str).encode()
+    return f'"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def http_date(value: Optional[str]) -> Optional[str]:
+    """Format a stored ISO timestamp (or date) as an HTTP date; None if unparseable."""
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(request: Request, response: Response, etag: str, last_modified: Optional[str] = None) -> Optional[Response]:
+    """Set the validators on ``response``; return a 304 if the client's copy is current.
+
+    If-None-Match wins over If-Modified-Since, as in RFC 9110. ``Cache-Control:
+    no-cache`` lets browsers keep the body but revalidate it on every use.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    response.headers.update(headers)
+
+    fresh = False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        fresh = "*" in tags or etag in tags
+    elif last_modified and request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            fresh = parsedate_to_datetime(last_modified) <= since
+        except (TypeError, ValueError):
+            fresh = False
+    return Response(status_code=304, headers=headers) if fresh else None
+
+
+def property_validators(prop_id: str, version: int, updated_at: Optional[str], created_at: str):
+    """(ETag, Last-Modified) for a single property row."""
+    return make_etag(prop_id, version), http_date(updated_at or created_at)
+
+
 def validate_date_string(value: str) -> str:
     """Validate ISO date (YYYY-MM-DD). Raises ValueError on bad format or past dates."""
     try:
@@ -166,9 +228,6 @@ def build_visit_request_read(req: VisitRequest, prop: Optional[Property], user:
 # App & middleware
 # ---------------------------------------------------------------------------
 
-# Frontend URL for email links (password reset, etc.)
-FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
-
 uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
 if not os.path.exists(uploads_dir):
     os.makedirs(uploads_dir, exist_ok=True)
@@ -177,104 +236,37 @@ if not os.path.exists(uploads_dir):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup / shutdown logic."""
-    logger.info("Starting up \u2014 creating tables and seeding data\u2026")
-    create_db_and_tables()
-
-    # Schema migrations (sqlite ALTER TABLE for columns added after initial release)
-    try:
-        with engine.connect() as conn:
-            cols = [c[1] for c in conn.execute(text("PRAGMA table_info('user')")).fetchall()]
-            if "hashed_password" not in cols:
-                conn.execute(text("ALTER TABLE user ADD COLUMN hashed_password TEXT"))
-            if "phone" not in cols:
-                conn.execute(text("ALTER TABLE user ADD COLUMN phone TEXT"))
-            if "email_verified" not in cols:
-                conn.execute(text("ALTER TABLE user ADD COLUMN email_verified INTEGER DEFAULT 1"))
-            if "is_active" not in cols:
-                conn.execute(text("ALTER TABLE user ADD COLUMN is_active INTEGER DEFAULT 1"))
-
-            vr_cols = [c[1] for c in conn.execute(text("PRAGMA table_info('visitrequest')")).fetchall()]
-            for col, coltype in [
-                ("preferred_date", "TEXT"),
-                ("preferred_time", "TEXT"),
-                ("phone", "TEXT"),
-                ("admin_id", "TEXT"),
-                ("admin_note", "TEXT"),
-                ("decided_at", "TEXT"),
-            ]:
-                if col not in vr_cols:
-                    conn.execute(text(f"ALTER TABLE visitrequest ADD COLUMN {col} {coltype}"))
-            if "status" not in vr_cols:
-                conn.execute(text("ALTER TABLE visitrequest ADD COLUMN status TEXT DEFAULT 'pending'"))
-
-            prop_cols = [c[1] for c in conn.execute(text("PRAGMA table_info('property')")).fetchall()]
-            if "deleted" not in prop_cols:
-                conn.execute(text("ALTER TABLE property ADD COLUMN deleted INTEGER DEFAULT 0"))
-            if "deleted_at" not in prop_cols:
-                conn.execute(text("ALTER TABLE property ADD COLUMN deleted_at TEXT"))
-            if "tipoImovel" not in prop_cols:
-                conn.execute(text("ALTER TABLE property ADD COLUMN tipoImovel TEXT"))
-            for feat_col in [
-                "garagemNumCarros", "garagemFechada", "arCondicionado", "ginasio",
-                "escritorio", "salaJogos", "salaTV", "areaLazer", "mobilada",
-                "sistemaSeguranca", "elevador",
-            ]:
-                if feat_col not in prop_cols:
-                    default = "0" if feat_col == "garagemNumCarros" else "0"
-                    col_type = "INTEGER" if feat_col == "garagemNumCarros" else "INTEGER"
-                    conn.execute(text(f"ALTER TABLE property ADD COLUMN {feat_col} {col_type} DEFAULT {default}"))
-
-            # --- admin verification columns ---
-            if "verificadoAdmin" not in prop_cols:
-                conn.execute(text("ALTER TABLE property ADD COLUMN verificadoAdmin INTEGER DEFAULT 0"))
-            if "verificadoNota" not in prop_cols:
-                conn.execute(text("ALTER TABLE property ADD COLUMN verificadoNota TEXT"))
-
-            # --- price history table ---
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS pricehistory (
-                    id TEXT PRIMARY KEY,
-                    property_id TEXT NOT NULL,
-                    old_price REAL NOT NULL,
-                    new_price REAL NOT NULL,
-                    changed_at TEXT NOT NULL
-                )
-            """))
-
-            # --- cliente KYC columns ---
-            cli_cols = [c[1] for c in conn.execute(text("PRAGMA table_info('cliente')")).fetchall()]
-            for kyc_col in ["documento_id", "nuit", "comprovativo_residencia", "capacidade_financeira", "tipo_interesse"]:
-                if kyc_col not in cli_cols:
-                    conn.execute(text(f"ALTER TABLE cliente ADD COLUMN {kyc_col} TEXT"))
-
-            conn.commit()
-    except Exception as e:
-        logger.warning(f"Schema migration warning: {e}")
+    logger.info("Starting up \u2014 migrating schema and seeding data\u2026")
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Versioned migrations: a single version check when the DB is already at head
+    migrate(engine)
+    init_search(engine)
+    if not watermarking_available():
+        logger.warning("Pillow is not installed: uploads get no image variants and watermark jobs fail. "
+                       "Install backend/requirements.txt.")
 
     with Session(engine) as session:
         seed(session)
 
-    # Cleanup expired unverified EmailVerification records (>15 min old)
-    try:
-        with Session(engine) as session:
-            cutoff = (datetime.now(timezone.utc) - timedelta(minutes=15)).isoformat()
-            expired = session.exec(
-                select(EmailVerification).where(
-                    EmailVerification.verified == False,
-                    EmailVerification.created_at < cutoff,
-                )
-            ).all()
-            for ev in expired:
-                session.delete(ev)
-            if expired:
-                session.commit()
-                logger.info(f"Cleaned up {len(expired)} expired verification records")
-    except Exception as e:
-        logger.warning(f"Verification cleanup warning: {e}")
+    # Expired verification codes and old jobs are purged by a recurring job
+    with Session(engine) as session:
+        enqueue_once(session, "cleanup.expired", priority=PRIORITY_LOW)
+        session.commit()
+    worker = start_worker_thread() if JOB_EMBEDDED_WORKER else None
+    sender = start_sender_thread() if OUTBOX_EMBEDDED_SENDER else None
+    await hub.start()
 
     logger.info("Startup complete.")
     yield  # app runs here
     logger.info("Shutting down.")
+    await hub.stop()
+    for background in (worker, sender):
+        if background:
+            thread, stop = background
+            stop.set()
+            await to_thread.run_sync(thread.join, 30)  # let a running job / batch finish
+    shutdown_pool()
+    await async_engine.dispose()
 
 
 app = FastAPI(title="Imobiliaria API", lifespan=lifespan)
@@ -291,6 +283,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 
@@ -298,10 +291,11 @@ app.add_middleware(
 @app.middleware("http")
 async def limit_request_body(request: Request, call_next):
     content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > MAX_REQUEST_BODY_BYTES:
+    limit_mb = IMPORT_MAX_BODY_MB if request.url.path == "/properties/import" else MAX_REQUEST_BODY_MB
+    if content_length and int(content_length) > limit_mb * 1024 * 1024:
         return JSONResponse(
             status_code=413,
-            content={"detail": f"Request body too large. Maximum {MAX_REQUEST_BODY_MB}MB allowed."},
+            content={"detail": f"Request body too large. Maximum {limit_mb}MB allowed."},
         )
     return await call_next(request)
 
@@ -428,6 +422,23 @@ class PropertyUpdate(BaseModel):
     dadosEspecificos: Optional[str] = None
 
 
+class PropertyFilters(BaseModel):
+    """Listing filters shared by /properties, /properties/count and /properties/search."""
+    tipo: Optional[str] = None
+    cidade: Optional[str] = None
+    preco_max: Optional[float] = None
+    preco_min: Optional[float] = None
+    tipologia: Optional[str] = None
+    quartos_min: Optional[int] = None
+    quartos_max: Optional[int] = None
+    area_min: Optional[float] = None
+    area_max: Optional[float] = None
+    search: Optional[str] = None
+    garagem: Optional[bool] = None
+    piscina: Optional[bool] = None
+    jardim: Optional[bool] = None
+
+
 class VisitRequestCreate(BaseModel):
     preferred_date: Optional[str] = None
     preferred_time: Optional[str] = None
@@ -466,6 +477,14 @@ class VisitRequestRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class VisitRequestFilters(BaseModel):
+    """Filters shared by the admin, client and vendor visit-request listings."""
+    status: Optional[str] = None  # one status, or several comma-separated
+    property_id: Optional[str] = None
+    date_from: Optional[date] = None  # on preferred_date, inclusive
+    date_to: Optional[date] = None
+
+
 class VisitRequestAction(BaseModel):
     status: str
     admin_note: Optional[str] = None
@@ -524,6 +543,17 @@ class ChatMessageRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+def chat_message_read(msg: ChatMessage, sender_name: str, receiver_name: str) -> ChatMessageRead:
+    return ChatMessageRead(
+        id=msg.id, sender_id=msg.sender_id,
+        sender_name=sender_name,
+        receiver_id=msg.receiver_id,
+        receiver_name=receiver_name,
+        property_id=msg.property_id,
+        message=msg.message, created_at=msg.created_at, read=msg.read,
+    )
+
+
 class ReviewCreate(BaseModel):
     rating: int
     comment: Optional[str] = None
@@ -587,79 +617,16 @@ class NotificationRead(BaseModel):
     read: bool
     created_at: str
     link: Optional[str] = None
+    seq: Optional[int] = None
 
     model_config = {"from_attributes": True}
 
 
-# ---------------------------------------------------------------------------
-# Mailtrap helpers
-# ---------------------------------------------------------------------------
-
-def _send_email(to_email: str, subject: str, body: str) -> bool:
-    """Send an email via Mailtrap SMTP sandbox."""
-    if not SMTP_PASS:
-        logger.warning(f"SMTP_PASS not set — skipping email send for {to_email}")
-        return True
-
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = f"{MAILTRAP_SENDER_NAME} <{MAILTRAP_SENDER_EMAIL}>"
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain", "utf-8"))
-
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(MAILTRAP_SENDER_EMAIL, to_email, msg.as_string())
-
-        logger.info(f"Email sent to {to_email}: {subject}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}")
-        return True  # Still return True since the code is printed to console
-
-
-def send_verification_email(to_email: str, code: str, user_name: str) -> bool:
-    """Send a 6-digit verification code via Mailtrap SMTP sandbox."""
-    # Always print the code to the console for easy local development
-    logger.info(f"===== VERIFICATION CODE for {to_email}: {code} =====")
-    print(f"\n{'='*60}")
-    print(f"  VERIFICATION CODE for {to_email}: {code}")
-    print(f"{'='*60}\n")
-
-    subject = "ImovelTop — Código de Verificação"
-    body = (
-        f"Olá {user_name},\n\n"
-        f"O seu código de verificação é: {code}\n\n"
-        f"Este código expira em 15 minutos.\n\n"
-        f"Se não solicitou esta conta, ignore este email.\n\n"
-        f"— Equipa ImovelTop"
-    )
-    return _send_email(to_email, subject, body)
-
-
-def send_password_reset_email(to_email: str, token: str, user_name: str) -> bool:
-    """Send a password-reset link via Mailtrap SMTP sandbox."""
-    reset_link = f"{FRONTEND_URL}/reset-password?token={token}"
-    # Always print the token to the console for development
-    logger.info(f"===== PASSWORD RESET TOKEN for {to_email}: {token} =====")
-    print(f"\n{'='*60}")
-    print(f"  PASSWORD RESET TOKEN for {to_email}: {token}")
-    print(f"  Reset link: {reset_link}")
-    print(f"{'='*60}\n")
-
-    subject = "ImovelTop — Redefinir Senha"
-    body = (
-        f"Olá {user_name},\n\n"
-        f"Recebemos um pedido para redefinir a sua senha.\n\n"
-        f"O seu token de redefinição é: {token}\n\n"
-        f"Ou clique no link: {reset_link}\n\n"
-        f"Este token expira em 1 hora.\n\n"
-        f"Se não solicitou esta alteração, ignore este email.\n\n"
-        f"— Equipa ImovelTop"
-    )
-    return _send_email(to_email, subject, body)
+class NotificationDelta(BaseModel):
+    notifications: List[NotificationRead]  # new or read-state changed, oldest change first
+    cursor: int  # pass as ``since`` on the next call
+    unread: int
+    has_more: bool
 
 
 # ---------------------------------------------------------------------------
@@ -696,10 +663,9 @@ def health_check():
 # AUTH ENDPOINTS
 # =====================================================================
 
-@app.post("/auth/token")
-def token_login(payload: TokenLoginRequest, request: Request):
+@app.post("/auth/token", dependencies=[Depends(rate_limit("login", 10, 60))])
+def token_login(payload: TokenLoginRequest):
     """Login using email or phone + password (returns JWT). Rate limited."""
-    check_rate_limit(f"login:{request.client.host}", max_requests=10, window=60)
     identifier = payload.identifier.strip().lower()
     with Session(engine) as session:
         # Try finding user by email first, then by phone, then by nome
@@ -725,10 +691,9 @@ def token_login(payload: TokenLoginRequest, request: Request):
         return {"access_token": token, "token_type": "bearer", "user": user_to_dict(user)}
 
 
-@app.post("/auth/register")
-def register(req: RegisterRequest, request: Request):
+@app.post("/auth/register", dependencies=[Depends(rate_limit("register", 5, 300))])
+def register(req: RegisterRequest):
     """Create a new user. Sends verification email if email provided. Rate limited."""
-    check_rate_limit(f"register:{request.client.host}", max_requests=5, window=300)
     if req.role not in ("vendedor", "cliente"):
         raise HTTPException(status_code=400, detail="Invalid role")
     with Session(engine) as session:
@@ -753,9 +718,8 @@ def register(req: RegisterRequest, request: Request):
                         created_at=datetime.now(timezone.utc).isoformat(),
                     )
                     session.add(verification)
+                    queue_verification_email(session, exists.email, code, exists.nome)
                     session.commit()
-                    if not send_verification_email(exists.email, code, exists.nome):
-                        logger.warning(f"Failed to send verification email to {exists.email}")
                     logger.info(f"Re-sent verification to unverified user: {exists.email}")
                     return {"message": "verification_required", "email": exists.email}
                 raise HTTPException(status_code=400, detail="Email already registered")
@@ -804,9 +768,8 @@ def register(req: RegisterRequest, request: Request):
                 created_at=datetime.now(timezone.utc).isoformat(),
             )
             session.add(verification)
+            queue_verification_email(session, new_user.email, code, new_user.nome)
             session.commit()
-            if not send_verification_email(new_user.email, code, new_user.nome):
-                logger.warning(f"Failed to send verification email to {new_user.email}")
             logger.info(f"New registration (pending verification): {new_user.email} as {new_user.role}")
             return {"message": "verification_required", "email": new_user.email}
         else:
@@ -817,10 +780,9 @@ def register(req: RegisterRequest, request: Request):
             return {"access_token": token, "token_type": "bearer", "user": user_to_dict(new_user)}
 
 
-@app.post("/auth/verify-email")
-def verify_email(payload: EmailVerifyRequest, request: Request):
+@app.post("/auth/verify-email", dependencies=[Depends(rate_limit("verify", 10, 60))])
+def verify_email(payload: EmailVerifyRequest):
     """Verify the 6-digit code. Rate limited."""
-    check_rate_limit(f"verify:{request.client.host}", max_requests=10, window=60)
     with Session(engine) as session:
         user = session.exec(select(User).where(User.email == payload.email.strip().lower())).first()
         if not user:
@@ -862,10 +824,9 @@ def verify_email(payload: EmailVerifyRequest, request: Request):
         return {"access_token": token, "token_type": "bearer", "user": user_to_dict(user)}
 
 
-@app.post("/auth/resend-code")
-def resend_verification_code(payload: PasswordResetRequest, request: Request):
+@app.post("/auth/resend-code", dependencies=[Depends(rate_limit("resend", 3, 120))])
+def resend_verification_code(payload: PasswordResetRequest):
     """Resend verification code. Rate limited."""
-    check_rate_limit(f"resend:{request.client.host}", max_requests=3, window=120)
     with Session(engine) as session:
         user = session.exec(select(User).where(User.email == payload.email.strip().lower())).first()
         if not user or user.email_verified:
@@ -880,8 +841,8 @@ def resend_verification_code(payload: PasswordResetRequest, request: Request):
             created_at=datetime.now(timezone.utc).isoformat(),
         )
         session.add(verification)
+        queue_verification_email(session, user.email, code, user.nome)
         session.commit()
-        send_verification_email(user.email, code, user.nome)
         logger.info(f"Resent verification code to: {user.email}")
         return {"message": "Novo código enviado."}
 
@@ -1035,6 +996,9 @@ def delete_account(current_user: User = Depends(get_current_user)):
             (ChatMessage.sender_id == user.id) | (ChatMessage.receiver_id == user.id)
         )).all():
             session.delete(msg)
+        session.exec(delete(ChatConversation).where(
+            (ChatConversation.user_id == user.id) | (ChatConversation.partner_id == user.id)
+        ))
 
         # Delete verification / reset tokens
         for v in session.exec(select(EmailVerification).where(EmailVerification.user_id == user.id)).all():
@@ -1051,6 +1015,8 @@ def delete_account(current_user: User = Depends(get_current_user)):
         # Delete the user
         session.delete(user)
         session.commit()
+        if my_props:
+            invalidate_all_properties()
         logger.info(f"Account deleted (RGPD): {user.email}")
         return {"message": "Conta eliminada com sucesso. Os seus dados foram removidos."}
 
@@ -1059,10 +1025,9 @@ def delete_account(current_user: User = Depends(get_current_user)):
 # PASSWORD RESET
 # =====================================================================
 
-@app.post("/auth/forgot-password")
-def forgot_password(payload: PasswordResetRequest, request: Request):
+@app.post("/auth/forgot-password", dependencies=[Depends(rate_limit("forgot", 3, 300))])
+def forgot_password(payload: PasswordResetRequest):
     """Generate a reset token and send it via Mailtrap."""
-    check_rate_limit(f"forgot:{request.client.host}", max_requests=3, window=300)
     with Session(engine) as session:
         user = session.exec(select(User).where(User.email == payload.email.strip().lower())).first()
         if not user:
@@ -1075,9 +1040,9 @@ def forgot_password(payload: PasswordResetRequest, request: Request):
             created_at=datetime.now(timezone.utc).isoformat(),
         )
         session.add(reset)
+        # Sent via Mailtrap (or printed to the console) by the outbox sender
+        queue_password_reset_email(session, user.email, token_str, user.nome)
         session.commit()
-        # Send via Mailtrap (or print to console)
-        send_password_reset_email(user.email, token_str, user.nome)
         # Return the token so the frontend can auto-fill it (dev-friendly)
         return {"message": "Se o email existir, receberá instruções para redefinir a senha.", "token": token_str}
 
@@ -1112,172 +1077,387 @@ def reset_password(payload: PasswordResetConfirm):
 # PROPERTIES
 # =====================================================================
 
+# Listing sort keys: name -> (column, descending). "relevance" (bm25) is only
+# available with a search term. Ties are always broken by id so that the
+# order is total and keyset cursors are stable.
+PROPERTY_SORTS = {
+    "recent": (Property.createdAt, True),
+    "preco_asc": (Property.preco, False),
+    "preco_desc": (Property.preco, True),
+    "area_desc": (Property.area, True),
+}
+MAX_PAGE_SIZE = 100
+
+# Columns a listing card renders (src/app/components/PropertyCard.tsx); the
+# description is cut in SQL to what its two clamped lines can show.
+CARD_DESCRIPTION_CHARS = 200
+PROPERTY_CARD_COLUMNS = {
+    "id": Property.id,
+    "titulo": Property.titulo,
+    "descricao": func.substr(Property.descricao, 1, CARD_DESCRIPTION_CHARS),
+    "tipo": Property.tipo,
+    "tipoImovel": Property.tipoImovel,
+    "tipologia": Property.tipologia,
+    "preco": Property.preco,
+    "localizacao": Property.localizacao,
+    "cidade": Property.cidade,
+    "area": Property.area,
+    "imagem": Property.imagem,
+    # only the cover image's variants, not the whole gallery's
+    "imagemVariantes": type_coerce(
+        func.json_extract(Property.variantes, literal('$."') + Property.imagem + literal('"')), JSON
+    ),
+    "quartos": Property.quartos,
+    "casasBanho": Property.casasBanho,
+    "garagem": Property.garagem,
+    "anoConstructao": Property.anoConstructao,
+    "verificadoAdmin": Property.verificadoAdmin,
+    "createdAt": Property.createdAt,
+    "version": Property.version,
+}
+
+# Upper bounds (MT) of the price facet buckets; the last bucket is open-ended.
+PRICE_BUCKET_EDGES = [50_000, 250_000, 1_000_000, 5_000_000, 10_000_000]
+
+
+def apply_property_filters(q, filters: PropertyFilters, sorted_by=None):
+    """Apply the shared listing filters (everything except search) to a Property query.
+
+    ``sorted_by`` is the listing's order column. Price and area bounds on the
+    other columns are written ``col + 0`` so SQLite does not pick their sort
+    indexes for the range: it walks the order's index and stops after one page
+    instead of sorting every match.
+    """
+    def bounded(col):
+        return col if sorted_by is None or sorted_by is col else col + 0
+
+    q = q.where(Property.deleted == False)
+    if filters.tipo and filters.tipo != "todos":
+        q = q.where(Property.tipo == filters.tipo)
+    if filters.cidade:
+        q = q.where(Property.cidade.ilike(f"%{filters.cidade}%"))
+    if filters.preco_max is not None:
+        q = q.where(bounded(Property.preco) <= filters.preco_max)
+    if filters.preco_min is not None:
+        q = q.where(bounded(Property.preco) >= filters.preco_min)
+    if filters.tipologia and filters.tipologia != "todos":
+        q = q.where(Property.tipologia == filters.tipologia)
+    if filters.quartos_min is not None:
+        q = q.where(Property.quartos >= filters.quartos_min)
+    if filters.quartos_max is not None:
+        q = q.where(Property.quartos <= filters.quartos_max)
+    if filters.area_min is not None:
+        q = q.where(bounded(Property.area) >= filters.area_min)
+    if filters.area_max is not None:
+        q = q.where(bounded(Property.area) <= filters.area_max)
+    if filters.garagem is not None:
+        q = q.where(Property.garagem == filters.garagem)
+    if filters.piscina is not None:
+        q = q.where(Property.piscina == filters.piscina)
+    if filters.jardim is not None:
+        q = q.where(Property.jardim == filters.jardim)
+    return q
+
+
+def property_projection(fields: Optional[str], view: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Resolve ``fields=`` / ``view=card`` to {name: column}. None means full rows."""
+    if fields and view:
+        raise HTTPException(status_code=400, detail="Use 'fields' ou 'view', não ambos")
+    if view:
+        if view == "card":
+            return PROPERTY_CARD_COLUMNS
+        if view == "full":
+            return None
+        raise HTTPException(status_code=400, detail=f"Vista inválida: {view}")
+    if not fields:
+        return None
+    names = ["id"] + [name.strip() for name in fields.split(",") if name.strip()]
+    table_columns = Property.__table__.c
+    unknown = [name for name in names if name not in table_columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}")
+    return {name: table_columns[name] for name in dict.fromkeys(names)}
+
+
+def build_property_page(
+    filters: PropertyFilters,
+    sort: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    page: Optional[int] = None,
+    per_page: Optional[int] = None,
+    columns: Optional[Dict[str, Any]] = None,
+):
+    """Build the filtered listing query. Returns (statement, finish).
+
+    Execute the statement with ``session.execute`` (sync or async) and pass the
+    rows to ``finish`` to get (items, next_cursor). With ``limit`` this is
+    keyset pagination continuing from ``after``; next_cursor is None on the
+    last page. Otherwise page/per_page offsets apply.
+
+    Items are Property objects, or plain dicts of ``columns`` (see
+    ``property_projection``) when a projection is given.
+    """
+    sort_key = sort or ("relevance" if filters.search else "recent")
+    if sort_key not in PROPERTY_SORTS and sort_key != "relevance":
+        raise HTTPException(status_code=400, detail=f"Ordenação inválida: {sort_key}")
+    if after and not limit:
+        raise HTTPException(status_code=400, detail="O parâmetro 'after' requer 'limit'")
+
+    q = apply_property_filters(
+        select(*columns.values()) if columns else select(Property), filters,
+        sorted_by=PROPERTY_SORTS[sort_key][0] if sort_key in PROPERTY_SORTS else None,
+    )
+    rank = None
+    if filters.search and sort_key == "relevance":
+        q, rank = apply_search_ranking(q, filters.search)
+    elif filters.search:
+        q = apply_search_filter(q, filters.search)
+    if sort_key == "relevance" and rank is None:
+        # no FTS index to rank with (or no searchable words): newest first
+        sort_key = "recent"
+    if rank is not None:
+        key_col, descending = rank, False
+    else:
+        key_col, descending = PROPERTY_SORTS[sort_key]
+    # the sort key rides along as the last column, for the next cursor
+    trailing_key = rank is not None or bool(columns)
+    if trailing_key:
+        q = q.add_columns(key_col)
+
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 3 or values[0] != sort_key:
+            raise HTTPException(status_code=400, detail="Cursor inválido para esta ordenação")
+        position = tuple_(key_col, Property.id)
+        bound = tuple_(values[1], values[2])
+        q = q.where(position < bound if descending else position > bound)
+    if descending:
+        q = q.order_by(key_col.desc(), Property.id.desc())
+    else:
+        q = q.order_by(key_col.asc(), Property.id.asc())
+
+    if limit:
+        q = q.limit(limit + 1)
+    elif page and per_page:
+        q = q.offset((page - 1) * per_page).limit(per_page)
+
+    def finish(rows):
+        has_more = bool(limit) and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+        if columns:
+            items = [dict(zip(columns, row)) for row in rows]
+            last_id = items[-1]["id"] if items else None
+        else:
+            items = [row[0] for row in rows]
+            last_id = items[-1].id if items else None
+        if not has_more:
+            return items, None
+        last_key = rows[-1][-1] if trailing_key else getattr(items[-1], key_col.key)
+        return items, encode_cursor([sort_key, last_key, last_id])
+
+    return q, finish
+
+
+def listing_cache_key(filters: PropertyFilters, sort, after, limit, page, per_page, view=None, columns=None) -> tuple:
+    """Normalize listing parameters so equivalent requests share a cache entry."""
+    values = filters.model_dump(exclude_none=True)
+    for name in ("tipo", "tipologia"):
+        if values.get(name) == "todos":
+            del values[name]
+    for name in ("cidade", "search"):
+        if name in values:
+            values[name] = " ".join(values[name].split())
+            if not values[name]:
+                del values[name]
+    if "search" in values:
+        values["search"] = values["search"].lower()  # FTS matching is case-insensitive
+    if not (page and per_page) or limit:
+        page = per_page = None
+    projection = ("card",) if columns is PROPERTY_CARD_COLUMNS else tuple(columns or ())
+    return tuple(sorted(values.items())), sort, after, limit, page, per_page, projection
+
+
+def query_property_page(session: Session, filters: PropertyFilters, *args, **kwargs):
+    """Synchronous build_property_page + execute. Returns (properties, next_cursor)."""
+    q, finish = build_property_page(filters, *args, **kwargs)
+    return finish(session.execute(q).all())
+
+
+def property_facets(session: Session, filters: PropertyFilters) -> Dict[str, Any]:
+    """Total and facet counts for the filtered set, from a single grouped scan.
+
+    Grouping by every facet column at once yields one row per distinct
+    combination; the per-facet counts are then summed up in Python.
+    """
+    bucket = case(
+        *[(Property.preco < edge, i) for i, edge in enumerate(PRICE_BUCKET_EDGES)],
+        else_=len(PRICE_BUCKET_EDGES),
+    ).label("bucket")
+    facet_cols = [Property.cidade, Property.tipologia, Property.tipo, Property.tipoImovel]
+    q = apply_property_filters(select(*facet_cols, bucket, func.count()), filters)
+    if filters.search:
+        q = apply_search_filter(q, filters.search)
+    q = q.group_by(*facet_cols, bucket)
+
+    facets: Dict[str, Dict[str, int]] = {"cidade": {}, "tipologia": {}, "tipo": {}, "tipoImovel": {}}
+    bucket_counts = [0] * (len(PRICE_BUCKET_EDGES) + 1)
+    total = 0
+    for cidade, tipologia, tipo, tipo_imovel, bucket_idx, n in session.execute(q).all():
+        total += n
+        for name, value in (("cidade", cidade), ("tipologia", tipologia), ("tipo", tipo), ("tipoImovel", tipo_imovel)):
+            if value:
+                facets[name][value] = facets[name].get(value, 0) + n
+        bucket_counts[bucket_idx] += n
+
+    bounds = [0] + PRICE_BUCKET_EDGES + [None]
+    facets["preco"] = [
+        {"min": bounds[i], "max": bounds[i + 1], "count": bucket_counts[i]}
+        for i in range(len(bucket_counts))
+    ]
+    return {"total": total, "facets": facets}
+
+
 @app.get("/properties", response_model=List[Property])
-def list_properties(
-    tipo: Optional[str] = None,
-    cidade: Optional[str] = None,
-    preco_max: Optional[float] = None,
-    preco_min: Optional[float] = None,
-    tipologia: Optional[str] = None,
-    quartos_min: Optional[int] = None,
-    quartos_max: Optional[int] = None,
-    area_min: Optional[float] = None,
-    area_max: Optional[float] = None,
-    search: Optional[str] = None,
-    garagem: Optional[bool] = None,
-    piscina: Optional[bool] = None,
-    jardim: Optional[bool] = None,
+async def list_properties(
+    request: Request,
+    response: Response,
+    filters: PropertyFilters = Depends(),
+    sort: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     page: Optional[int] = None,
     per_page: Optional[int] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
 ):
-    with Session(engine) as session:
-        q = select(Property).where(Property.deleted == False)
-        if tipo and tipo != "todos":
-            q = q.where(Property.tipo == tipo)
-        if cidade:
-            q = q.where(Property.cidade.ilike(f"%{cidade}%"))
-        if preco_max is not None:
-            q = q.where(Property.preco <= preco_max)
-        if preco_min is not None:
-            q = q.where(Property.preco >= preco_min)
-        if tipologia and tipologia != "todos":
-            q = q.where(Property.tipologia == tipologia)
-        if quartos_min is not None:
-            q = q.where(Property.quartos >= quartos_min)
-        if quartos_max is not None:
-            q = q.where(Property.quartos <= quartos_max)
-        if area_min is not None:
-            q = q.where(Property.area >= area_min)
-        if area_max is not None:
-            q = q.where(Property.area <= area_max)
-        if garagem is not None:
-            q = q.where(Property.garagem == garagem)
-        if piscina is not None:
-            q = q.where(Property.piscina == piscina)
-        if jardim is not None:
-            q = q.where(Property.jardim == jardim)
-        if search:
-            q = q.where(
-                Property.titulo.ilike(f"%{search}%")
-                | Property.descricao.ilike(f"%{search}%")
-                | Property.localizacao.ilike(f"%{search}%")
-                | Property.cidade.ilike(f"%{search}%")
-            )
-        if page and per_page:
-            q = q.offset((page - 1) * per_page).limit(per_page)
-        return session.exec(q).all()
+    """List properties.
+
+    Cursor mode: pass ``limit`` (and ``after`` from the previous page); the
+    next cursor is returned in the ``X-Next-Cursor`` header, absent on the last
+    page. ``page``/``per_page`` offset pagination is still supported.
+
+    ``view=card`` (or ``fields=a,b,c``; ``id`` is always included) selects
+    only those columns in SQL. That page is encoded once with orjson, without
+    response-model validation, and the encoded body is what gets cached.
+
+    The ETag covers the (id, version) of every property on the page, so a
+    page is revalidated with a 304 until one of them changes or leaves it.
+    """
+    columns = property_projection(fields, view)
+    key = listing_cache_key(filters, sort, after, limit, page, per_page, view, columns)
+    cached = listing_cache.get(key)
+    if cached is None:
+        generation = listing_cache.generation
+        q, finish = build_property_page(filters, sort, after, limit, page, per_page, columns)
+        async with async_session() as session:
+            props, next_cursor = finish((await session.execute(q)).all())
+        if columns:
+            props = orjson.dumps(props)
+            etag = make_etag(hashlib.sha1(props).hexdigest(), next_cursor)
+        else:
+            etag = make_etag([(p.id, p.version) for p in props], next_cursor)
+        cached = (props, next_cursor, etag)
+        listing_cache.set(key, cached, generation)
+    props, next_cursor, etag = cached
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        if next_cursor:
+            unchanged.headers["X-Next-Cursor"] = next_cursor
+        return unchanged
+    if columns:
+        return Response(content=props, media_type="application/json", headers=dict(response.headers))
+    return props
 
 
 @app.get("/properties/count")
-def count_properties(
-    tipo: Optional[str] = None,
-    cidade: Optional[str] = None,
-    preco_max: Optional[float] = None,
-    preco_min: Optional[float] = None,
-    tipologia: Optional[str] = None,
-    quartos_min: Optional[int] = None,
-    area_min: Optional[float] = None,
-    area_max: Optional[float] = None,
-    search: Optional[str] = None,
-    garagem: Optional[bool] = None,
-    piscina: Optional[bool] = None,
-    jardim: Optional[bool] = None,
-):
+def count_properties(filters: PropertyFilters = Depends()):
     with Session(engine) as session:
-        q = select(func.count(Property.id)).where(Property.deleted == False)
-        if tipo and tipo != "todos":
-            q = q.where(Property.tipo == tipo)
-        if cidade:
-            q = q.where(Property.cidade.ilike(f"%{cidade}%"))
-        if preco_max is not None:
-            q = q.where(Property.preco <= preco_max)
-        if preco_min is not None:
-            q = q.where(Property.preco >= preco_min)
-        if tipologia and tipologia != "todos":
-            q = q.where(Property.tipologia == tipologia)
-        if quartos_min is not None:
-            q = q.where(Property.quartos >= quartos_min)
-        if area_min is not None:
-            q = q.where(Property.area >= area_min)
-        if area_max is not None:
-            q = q.where(Property.area <= area_max)
-        if garagem is not None:
-            q = q.where(Property.garagem == garagem)
-        if piscina is not None:
-            q = q.where(Property.piscina == piscina)
-        if jardim is not None:
-            q = q.where(Property.jardim == jardim)
-        if search:
-            q = q.where(
-                Property.titulo.ilike(f"%{search}%")
-                | Property.descricao.ilike(f"%{search}%")
-                | Property.localizacao.ilike(f"%{search}%")
-                | Property.cidade.ilike(f"%{search}%")
-            )
+        q = apply_property_filters(select(func.count(Property.id)), filters)
+        if filters.search:
+            q = apply_search_filter(q, filters.search)
         count = session.exec(q).one()
         return {"count": count}
 
 
-@app.get("/properties/{property_id}", response_model=Property)
-def get_property(property_id: str):
+@app.get("/properties/search")
+def faceted_search(
+    filters: PropertyFilters = Depends(),
+    sort: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Results page, total and facet counts for the filter sidebar in one call.
+
+    Facets count by cidade, tipologia, tipo, tipoImovel and price bucket
+    within the filtered set. Pass ``next_cursor`` back as ``after`` for more.
+    """
     with Session(engine) as session:
-        prop = session.get(Property, property_id)
+        props, next_cursor = query_property_page(session, filters, sort, after, limit)
+        summary = property_facets(session, filters)
+        return {
+            "items": [p.model_dump() for p in props],
+            "next_cursor": next_cursor,
+            "total": summary["total"],
+            "facets": summary["facets"],
+        }
+
+
+@app.get("/properties/{property_id}", response_model=Property)
+async def get_property(property_id: str, request: Request, response: Response):
+    """Property detail. Answers If-None-Match / If-Modified-Since with 304.
+
+    On a cache miss a conditional request first reads only the validator
+    columns, so an unchanged property costs one primary-key lookup.
+    """
+    prop = property_cache.get(property_id)
+    if prop is None and (request.headers.get("if-none-match") or request.headers.get("if-modified-since")):
+        async with async_session() as session:
+            row = (await session.execute(
+                select(Property.version, Property.updatedAt, Property.createdAt)
+                .where(Property.id == property_id, Property.deleted == False)
+            )).first()
+        if row:
+            unchanged = not_modified(request, response, *property_validators(property_id, *row))
+            if unchanged:
+                return unchanged
+    if prop is None:
+        generation = property_cache.generation
+        async with async_session() as session:
+            prop = await session.get(Property, property_id)
         if not prop or prop.deleted:
             raise HTTPException(status_code=404, detail="Property not found")
-        return prop
+        property_cache.set(property_id, prop, generation)
+    etag, last_modified = property_validators(prop.id, prop.version, prop.updatedAt, prop.createdAt)
+    return not_modified(request, response, etag, last_modified) or prop
+
+
+def new_property_values(payload: PropertyCreate, owner: User) -> Dict[str, Any]:
+    """Column values for a new listing owned by ``owner`` (shared by create and import)."""
+    values = payload.model_dump()
+    values.update(
+        id=str(uuid4()),
+        tipoImovel=payload.tipoImovel or "",
+        imagem=payload.imagem or "",
+        galeria=payload.galeria or ([payload.imagem] if payload.imagem else []),
+        caracteristicas=payload.caracteristicas or [],
+        vendedorId=owner.id,
+        vendedorNome=owner.nome,
+        createdAt=date.today().isoformat(),
+    )
+    return values
 
 
 @app.post("/properties", response_model=Property, status_code=201)
 def create_property(payload: PropertyCreate, current_user: User = Depends(require_roles(["vendedor", "admin"]))):
     with Session(engine) as session:
-        new_id = str(uuid4())
-        prop = Property(
-            id=new_id,
-            titulo=payload.titulo,
-            descricao=payload.descricao,
-            tipo=payload.tipo,
-            preco=payload.preco,
-            localizacao=payload.localizacao,
-            cidade=payload.cidade,
-            tipoImovel=payload.tipoImovel or "",
-            tipologia=payload.tipologia,
-            area=payload.area,
-            imagem=payload.imagem or "",
-            galeria=payload.galeria or ([payload.imagem] if payload.imagem else []),
-            vendedorId=current_user.id,
-            vendedorNome=current_user.nome,
-            createdAt=date.today().isoformat(),
-            quartos=payload.quartos,
-            casasBanho=payload.casasBanho,
-            garagem=payload.garagem,
-            garagemNumCarros=payload.garagemNumCarros,
-            garagemFechada=payload.garagemFechada,
-            arCondicionado=payload.arCondicionado,
-            piscina=payload.piscina,
-            ginasio=payload.ginasio,
-            escritorio=payload.escritorio,
-            salaJogos=payload.salaJogos,
-            salaTV=payload.salaTV,
-            jardim=payload.jardim,
-            areaLazer=payload.areaLazer,
-            mobilada=payload.mobilada,
-            sistemaSeguranca=payload.sistemaSeguranca,
-            elevador=payload.elevador,
-            anoConstructao=payload.anoConstructao,
-            certificadoEnergetico=payload.certificadoEnergetico,
-            caracteristicas=payload.caracteristicas or [],
-            # New fields for dynamic form
-            negociavel=payload.negociavel,
-            tipoAnunciante=payload.tipoAnunciante,
-            contacto=payload.contacto,
-            disponibilidade=payload.disponibilidade,
-            diasEspecificos=payload.diasEspecificos,
-            latitude=payload.latitude,
-            longitude=payload.longitude,
-            dadosEspecificos=payload.dadosEspecificos,
-        )
+        prop = Property(**new_property_values(payload, current_user))
         session.add(prop)
         session.commit()
+        invalidate_property(prop.id)
         session.refresh(prop)
         return prop
 
@@ -1304,28 +1484,145 @@ def update_property(property_id: str, payload: PropertyUpdate, current_user: Use
                 changed_at=datetime.now(timezone.utc).isoformat(),
             )
             session.add(ph)
-            # Notify users who favorited this property
-            favs = session.exec(select(Favorite).where(Favorite.property_id == property_id)).all()
-            direction = "baixou" if new_price < old_price else "subiu"
-            for fav in favs:
-                notif = Notification(
-                    id=uuid4().hex,
-                    user_id=fav.user_id,
-                    title=f"Preço {direction}!",
-                    message=f"O imóvel \"{prop.titulo}\" {direction} de {old_price:,.0f} MT para {new_price:,.0f} MT.",
-                    type="price_alert",
-                    created_at=datetime.now(timezone.utc).isoformat(),
-                    link=f"?property={property_id}",
-                )
-                session.add(notif)
+            # Users who favorited this property are notified by a background job
+            enqueue(session, "notify.price_change", {
+                "property_id": property_id, "titulo": update_data.get("titulo", prop.titulo),
+                "old_price": old_price, "new_price": new_price,
+            })
         for field, value in update_data.items():
             setattr(prop, field, value)
         session.add(prop)
         session.commit()
+        invalidate_property(property_id)
         session.refresh(prop)
         return prop
 
 
+# ---------------------------------------------------------------------------
+# Bulk import
+# ---------------------------------------------------------------------------
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+# PropertyCreate list fields; CSV cells carry them JSON-encoded, as the export writes them
+IMPORT_LIST_FIELDS = {"galeria", "caracteristicas"}
+
+
+def read_import_rows(file: UploadFile, fmt: str):
+    """Yield (line number, record dict | error message) from an uploaded CSV/NDJSON file."""
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    if fmt == "ndjson":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, "JSON inválido"
+                continue
+            yield line_no, record if isinstance(record, dict) else "A linha não é um objeto JSON"
+        return
+    reader = csv.DictReader(stream)
+    for record in reader:
+        row = {}
+        for name, value in record.items():
+            if name is None or value in (None, ""):
+                continue  # extra cells / empty cells fall back to the schema defaults
+            if name in IMPORT_LIST_FIELDS:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass  # left as a string: validation reports it
+            row[name] = value
+        yield reader.line_num, row
+
+
+def insert_property_batch(rows: List[Dict[str, Any]]) -> None:
+    """Insert listings plus their PriceHistory baselines in one transaction (executemany)."""
+    now = datetime.now(timezone.utc).isoformat()
+    with engine.begin() as conn:
+        conn.execute(Property.__table__.insert(), rows)
+        conn.execute(PriceHistory.__table__.insert(), [
+            {"id": uuid4().hex, "property_id": r["id"], "old_price": r["preco"], "new_price": r["preco"], "changed_at": now}
+            for r in rows
+        ])
+
+
+def import_results(file: UploadFile, fmt: str, owner: User):
+    """Validate, insert in batches and yield one NDJSON result line per input row."""
+    imported = failed = 0
+    batch: List[tuple] = []
+
+    def commit_batch():
+        try:
+            insert_property_batch([values for _, values in batch])
+        except SQLAlchemyError as e:
+            # the batch was rolled back: retry its rows one by one, so each failure reports its own cause
+            logger.warning(f"Import batch of {len(batch)} rows failed, retrying row by row: {e}")
+            results = []
+            for line_no, values in batch:
+                try:
+                    insert_property_batch([values])
+                except SQLAlchemyError as row_error:
+                    cause = getattr(row_error, "orig", None) or row_error
+                    results.append({"row": line_no, "ok": False,
+                                    "errors": [{"field": None, "error": f"Erro ao gravar: {cause}"}]})
+                else:
+                    results.append({"row": line_no, "ok": True, "id": values["id"]})
+            if any(r["ok"] for r in results):
+                invalidate_property()
+            return results
+        invalidate_property()
+        return [{"row": line_no, "ok": True, "id": values["id"]} for line_no, values in batch]
+
+    def flush():
+        nonlocal imported, failed
+        results = commit_batch()
+        batch.clear()
+        ok = sum(1 for r in results if r["ok"])
+        imported += ok
+        failed += len(results) - ok
+        return b"".join(orjson.dumps(r) + b"\n" for r in results)
+
+    for line_no, record in read_import_rows(file, fmt):
+        if isinstance(record, str):
+            errors = [{"field": None, "error": record}]
+        else:
+            try:
+                batch.append((line_no, new_property_values(PropertyCreate.model_validate(record), owner)))
+                errors = None
+            except ValidationError as e:
+                errors = [{"field": ".".join(str(p) for p in err["loc"]), "error": err["msg"]} for err in e.errors()]
+        if errors:
+            failed += 1
+            yield orjson.dumps({"row": line_no, "ok": False, "errors": errors}) + b"\n"
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield flush()
+    if batch:
+        yield flush()
+    logger.info(f"Import by {owner.id}: {imported} imported, {failed} failed")
+    yield orjson.dumps({"summary": {"imported": imported, "failed": failed}}) + b"\n"
+
+
+@app.post("/properties/import")
+def import_properties(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: User = Depends(require_roles(["vendedor", "admin"])),
+):
+    """Bulk-create listings from a CSV or NDJSON file (columns/keys as in PropertyCreate).
+
+    Rows are validated one by one and inserted in transactions of
+    IMPORT_BATCH_SIZE, each with a PriceHistory baseline. The response is
+    NDJSON: ``{"row", "ok", "id" | "errors"}`` per input row (valid rows are
+    reported once their batch commits), then a final ``{"summary": ...}``.
+    """
+    if fmt is None:
+        fmt = IMPORT_FORMATS.get(os.path.splitext(file.filename or "")[1].lower())
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato inválido: use CSV ou NDJSON")
+    return StreamingResponse(import_results(file, fmt, current_user), media_type="application/x-ndjson")
+
+
 # ---------------------------------------------------------------------------
 # Admin property verification
 # ---------------------------------------------------------------------------
@@ -1348,17 +1645,14 @@ def admin_verify_property(
         prop.verificadoNota = payload.nota
         session.add(prop)
         session.commit()
+        invalidate_property(property_id)
         session.refresh(prop)
         # Notify the vendor
-        notif = Notification(
-            id=uuid4().hex,
-            user_id=prop.vendedorId,
+        notify(
+            session, prop.vendedorId,
             title="Verificação de Imóvel" if payload.verificado else "Verificação Removida",
             message=f"O imóvel \"{prop.titulo}\" foi {'verificado' if payload.verificado else 'des-verificado'} pelo administrador." + (f" Nota: {payload.nota}" if payload.nota else ""),
-            type="info",
-            created_at=datetime.now(timezone.utc).isoformat(),
         )
-        session.add(notif)
         session.commit()
         return {"ok": True, "verificadoAdmin": prop.verificadoAdmin, "verificadoNota": prop.verificadoNota}
 
@@ -1367,12 +1661,25 @@ def admin_verify_property(
 # Price History
 # ---------------------------------------------------------------------------
 @app.get("/properties/{property_id}/price-history")
-def get_price_history(property_id: str):
-    """Return price change history for a property."""
+def get_price_history(property_id: str, request: Request, response: Response):
+    """Return price change history for a property.
+
+    History rows are append-only, so (count, latest change) identifies the
+    list; both come from the (property_id, changed_at) index.
+    """
     with Session(engine) as session:
         prop = session.get(Property, property_id)
         if not prop:
             raise HTTPException(status_code=404, detail="Property not found")
+        count, latest = session.exec(
+            select(func.count(PriceHistory.id), func.max(PriceHistory.changed_at))
+            .where(PriceHistory.property_id == property_id)
+        ).one()
+        unchanged = not_modified(
+            request, response, make_etag(property_id, count, latest), http_date(latest or prop.createdAt)
+        )
+        if unchanged:
+            return unchanged
         history = session.exec(
             select(PriceHistory).where(PriceHistory.property_id == property_id).order_by(PriceHistory.changed_at.desc())
         ).all()
@@ -1382,51 +1689,46 @@ def get_price_history(property_id: str):
 # ---------------------------------------------------------------------------
 # Watermark (backend utility using Pillow)
 # ---------------------------------------------------------------------------
-@app.post("/admin/watermark/{property_id}")
-async def watermark_property_images(
+def watermark_job_view(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id, "property_id": job.payload.get("property_id"), "status": job.status,
+        **(job.progress or {"total": 0, "done": 0, "failed": 0, "skipped": 0, "errors": []}),
+        "attempts": job.attempts, "last_error": job.last_error,
+        "created_at": job.created_at, "finished_at": job.finished_at,
+    }
+
+
+@app.post("/admin/watermark/{property_id}", status_code=202)
+def watermark_property_images(
     property_id: str,
     current_user: User = Depends(require_roles(["admin"])),
 ):
-    """Apply watermark to all images of a property."""
-    try:
-        from PIL import Image, ImageDraw, ImageFont
-    except ImportError:
-        raise HTTPException(status_code=500, detail="Pillow not installed")
+    """Queue watermarking of a property's images. Returns the job to poll.
 
+    Images already watermarked (``marcaAgua``) are skipped, so repeating the
+    call is harmless.
+    """
+    if not watermarking_available():
+        raise HTTPException(status_code=500, detail="Pillow not installed")
     with Session(engine) as session:
         prop = session.get(Property, property_id)
         if not prop or prop.deleted:
             raise HTTPException(status_code=404, detail="Property not found")
+        job = enqueue(session, "watermark", {"property_id": property_id})
+        job.progress = watermark_progress(prop)[1]
+        session.commit()
+        session.refresh(job)
+        return watermark_job_view(job)
 
-        watermarked = []
-        all_images = [prop.imagem] + list(prop.galeria or [])
-        for img_url in all_images:
-            if not img_url or not img_url.startswith("/uploads/"):
-                continue
-            filepath = os.path.join(uploads_dir, img_url.replace("/uploads/", ""))
-            if not os.path.exists(filepath):
-                continue
-            try:
-                img = Image.open(filepath).convert("RGBA")
-                overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-                draw = ImageDraw.Draw(overlay)
-                text = "ImovelTop"
-                try:
-                    font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", max(24, img.size[0] // 20))
-                except Exception:
-                    font = ImageFont.load_default()
-                bbox = draw.textbbox((0, 0), text, font=font)
-                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                x = img.size[0] - tw - 20
-                y = img.size[1] - th - 20
-                draw.text((x, y), text, fill=(255, 255, 255, 100), font=font)
-                result = Image.alpha_composite(img, overlay).convert("RGB")
-                result.save(filepath)
-                watermarked.append(img_url)
-            except Exception as e:
-                logger.warning(f"Watermark failed for {img_url}: {e}")
-
-        return {"ok": True, "watermarked": len(watermarked)}
+
+@app.get("/admin/watermark/jobs/{job_id}")
+def watermark_job_status(job_id: str, current_user: User = Depends(require_roles(["admin"]))):
+    """Progress of a watermark job."""
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+    if not job or job.kind != "watermark":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return watermark_job_view(job)
 
 
 @app.post("/properties/upload", response_model=Property, status_code=201)
@@ -1508,6 +1810,9 @@ async def upload_property(
     if not gallery:
         gallery = ["/uploads/default.jpg"]
 
+    # responsive WebP sizes for srcset, rendered in the image process pool
+    variants = await generate_variants([main_image_url, *gallery])
+
     with Session(engine) as session:
         new_id = str(uuid4())
         prop = Property(
@@ -1523,6 +1828,7 @@ async def upload_property(
             area=area,
             imagem=main_image_url or (gallery[0] if gallery else ""),
             galeria=gallery,
+            variantes=variants or None,
             vendedorId=current_user.id,
             vendedorNome=current_user.nome,
             createdAt=date.today().isoformat(),
@@ -1548,6 +1854,7 @@ async def upload_property(
         )
         session.add(prop)
         session.commit()
+        invalidate_property(prop.id)
         session.refresh(prop)
         return prop
 
@@ -1568,6 +1875,7 @@ def delete_property(
         prop.deleted_at = datetime.now(timezone.utc).isoformat()
         session.add(prop)
         session.commit()
+        invalidate_property(property_id)
         return {"message": "Imóvel removido com sucesso"}
 
 
@@ -1584,6 +1892,7 @@ def restore_property(property_id: str, current_user: User = Depends(require_role
         prop.deleted_at = None
         session.add(prop)
         session.commit()
+        invalidate_property(property_id)
         session.refresh(prop)
         return prop
 
@@ -1592,12 +1901,26 @@ def restore_property(property_id: str, current_user: User = Depends(require_role
 # VISIT REQUESTS
 # =====================================================================
 
-# Business hours time slots (08:00 – 17:00, every 30 min)
-VISIT_TIME_SLOTS = [
-    "08:00", "08:30", "09:00", "09:30", "10:00", "10:30",
-    "11:00", "11:30", "12:00", "12:30", "13:00", "13:30",
-    "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00",
-]
+VISIT_CALENDAR_MAX_DAYS = 62
+
+
+def visit_day(value: str) -> date:
+    """Parse a YYYY-MM-DD availability date, rejecting past days (400)."""
+    try:
+        d = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida. Use AAAA-MM-DD.")
+    if d < date.today():
+        raise HTTPException(status_code=400, detail="A data não pode ser no passado.")
+    return d
+
+
+def bookable_property(session: Session, property_id: str) -> Property:
+    prop = session.get(Property, property_id)
+    if not prop or prop.deleted:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return prop
+
 
 @app.get("/properties/{property_id}/visit-availability")
 def visit_availability(
@@ -1606,173 +1929,86 @@ def visit_availability(
     current_user: User = Depends(require_roles(["cliente"])),
 ):
     """Return which time slots are blocked for a given property+date.
-    Checks: property conflicts, client conflicts, vendor daily limit, admin daily limit + same-time."""
-    # validate date
-    try:
-        d = datetime.strptime(visit_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Data inválida. Use AAAA-MM-DD.")
-    if d < date.today():
-        raise HTTPException(status_code=400, detail="A data não pode ser no passado.")
-
+    Same rules as request_visit (see visit_rules.py)."""
+    d = visit_day(visit_date)
     with Session(engine) as session:
-        prop = session.get(Property, property_id)
-        if not prop or prop.deleted:
-            raise HTTPException(status_code=404, detail="Property not found")
+        prop = bookable_property(session, property_id)
+        load = load_days(session, prop, current_user.id, d, d)[d.isoformat()]
 
-        # All active visits for this date (platform-wide)
-        all_day_visits = session.exec(
-            select(VisitRequest).where(
-                VisitRequest.preferred_date == visit_date,
-                VisitRequest.status.in_(["pending", "approved"]),
-            )
-        ).all()
+    return {
+        "date": visit_date,
+        "property_id": property_id,
+        "slots": VISIT_TIME_SLOTS,
+        "blocked": blocked_slots(load),
+        "vendor_day_count": load.vendor_count,
+        "vendor_day_limit": VENDOR_DAY_LIMIT,
+        "admin_day_count": load.platform_count,
+        "admin_day_limit": PLATFORM_DAY_LIMIT,
+        "client_already_booked": load.client_booked_property,
+    }
 
-        # Property visits for this date
-        property_times = {v.preferred_time for v in all_day_visits if v.property_id == property_id and v.preferred_time}
 
-        # Client's own visits for this date (across all properties)
-        client_times = {v.preferred_time for v in all_day_visits if v.user_id == current_user.id and v.preferred_time}
+@app.get("/properties/{property_id}/visit-availability/range")
+def visit_availability_range(
+    property_id: str,
+    start: str,
+    days: int = Query(30, ge=1, le=VISIT_CALENDAR_MAX_DAYS),
+    current_user: User = Depends(require_roles(["cliente"])),
+):
+    """Blocked slots for ``days`` consecutive days from ``start``, in three queries.
 
-        # Client already has a visit for THIS property on THIS date => block ALL slots
-        client_already_booked_this_property = any(
-            v.user_id == current_user.id and v.property_id == property_id
-            for v in all_day_visits
-        )
+    Each day has the same fields as GET /visit-availability for that date.
+    """
+    first = visit_day(start)
+    last = first + timedelta(days=days - 1)
+    with Session(engine) as session:
+        prop = bookable_property(session, property_id)
+        loads = load_days(session, prop, current_user.id, first, last)
 
-        # Vendor daily count (visits across all vendor's properties)
-        vendor_prop_ids = {p.id for p in session.exec(select(Property).where(Property.vendedorId == prop.vendedorId)).all()}
-        vendor_day_count = sum(1 for v in all_day_visits if v.property_id in vendor_prop_ids)
-        vendor_full = vendor_day_count >= 3
-
-        # Admin daily count and times
-        admin_day_count = len(all_day_visits)
-        admin_full = admin_day_count >= 10
-        admin_times = {v.preferred_time for v in all_day_visits if v.preferred_time}
-
-        blocked: dict[str, str] = {}
-        for slot in VISIT_TIME_SLOTS:
-            if client_already_booked_this_property:
-                blocked[slot] = "Já tem um agendamento para este imóvel neste dia"
-            elif slot in property_times:
-                blocked[slot] = "Já existe visita neste imóvel neste horário"
-            elif slot in client_times:
-                blocked[slot] = "Já tem um agendamento neste horário"
-            elif vendor_full:
-                blocked[slot] = "O vendedor atingiu o limite de 3 visitas/dia"
-            elif admin_full:
-                blocked[slot] = "Limite de 10 agendamentos/dia atingido"
-            elif slot in admin_times:
-                blocked[slot] = "Horário indisponível (administração ocupada)"
+    return {
+        "property_id": property_id,
+        "slots": VISIT_TIME_SLOTS,
+        "vendor_day_limit": VENDOR_DAY_LIMIT,
+        "admin_day_limit": PLATFORM_DAY_LIMIT,
+        "days": [
+            {
+                "date": day,
+                "blocked": blocked_slots(load),
+                "vendor_day_count": load.vendor_count,
+                "admin_day_count": load.platform_count,
+                "client_already_booked": load.client_booked_property,
+            }
+            for day, load in loads.items()
+        ],
+    }
 
-        return {
-            "date": visit_date,
-            "property_id": property_id,
-            "slots": VISIT_TIME_SLOTS,
-            "blocked": blocked,
-            "vendor_day_count": vendor_day_count,
-            "vendor_day_limit": 3,
-            "admin_day_count": admin_day_count,
-            "admin_day_limit": 10,
-            "client_already_booked": client_already_booked_this_property,
-        }
+
+def flush_visit_change(session: Session, req: VisitRequest) -> None:
+    """Write a change to ``req``; 409 when it would take a slot another visit holds (VisitReservation)."""
+    day, time = req.preferred_date, req.preferred_time
+    try:
+        session.flush()
+    except IntegrityError:
+        session.rollback()
+        if not time:  # a visit without a time only reserves its client's day at the property
+            raise HTTPException(status_code=409, detail=booking_error("client_property_day", day, time))
+        raise HTTPException(
+            status_code=409,
+            detail=f"O horário {time} de {day} já está reservado por outra visita. Escolha outro horário.",
+        )
 
 
 @app.post("/properties/{property_id}/visit-requests", response_model=VisitRequestRead, status_code=201)
 def request_visit(property_id: str, payload: VisitRequestCreate, current_user: User = Depends(require_roles(["cliente"]))):
     with Session(engine) as session:
-        prop = session.get(Property, property_id)
-        if not prop or prop.deleted:
-            raise HTTPException(status_code=404, detail="Property not found")
+        prop = bookable_property(session, property_id)
         preferred_date = payload.preferred_date or None
         preferred_time = payload.preferred_time or None
         phone_val = payload.phone or None
 
-        if preferred_date and preferred_time:
-            # 0) Client can only book ONE visit per property per day
-            client_property_day = session.exec(
-                select(VisitRequest).where(
-                    VisitRequest.user_id == current_user.id,
-                    VisitRequest.property_id == property_id,
-                    VisitRequest.preferred_date == preferred_date,
-                    VisitRequest.status.in_(["pending", "approved"]),
-                )
-            ).first()
-            if client_property_day:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"Só pode fazer 1 agendamento por imóvel por dia. Já tem uma visita para este imóvel em {preferred_date}.",
-                )
-
-            # 1) Client cannot book the same date+time across ANY property
-            client_conflict = session.exec(
-                select(VisitRequest).where(
-                    VisitRequest.user_id == current_user.id,
-                    VisitRequest.preferred_date == preferred_date,
-                    VisitRequest.preferred_time == preferred_time,
-                    VisitRequest.status.in_(["pending", "approved"]),
-                )
-            ).first()
-            if client_conflict:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"Já tem um agendamento para {preferred_date} às {preferred_time}. Escolha outro horário.",
-                )
-
-            # 2) Property-level conflict (same property, same date+time)
-            property_conflict = session.exec(
-                select(VisitRequest).where(
-                    VisitRequest.property_id == property_id,
-                    VisitRequest.preferred_date == preferred_date,
-                    VisitRequest.preferred_time == preferred_time,
-                    VisitRequest.status.in_(["pending", "approved"]),
-                )
-            ).first()
-            if property_conflict:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"Já existe uma visita agendada para este imóvel em {preferred_date} às {preferred_time}. Escolha outro horário.",
-                )
-
-            # 3) Vendor cannot have more than 3 visits in a single day
-            vendor_day_count = len(session.exec(
-                select(VisitRequest).where(
-                    VisitRequest.property_id.in_(
-                        select(Property.id).where(Property.vendedorId == prop.vendedorId)
-                    ),
-                    VisitRequest.preferred_date == preferred_date,
-                    VisitRequest.status.in_(["pending", "approved"]),
-                )
-            ).all())
-            if vendor_day_count >= 3:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"O vendedor já atingiu o limite de 3 visitas para o dia {preferred_date}. Escolha outra data.",
-                )
-
-            # 4) Admin cannot have more than 10 visits in a day, nor at the same time
-            admin_ids = [a.id for a in session.exec(select(User).where(User.role == "admin")).all()]
-            if admin_ids:
-                admin_day_visits = session.exec(
-                    select(VisitRequest).where(
-                        VisitRequest.preferred_date == preferred_date,
-                        VisitRequest.status.in_(["pending", "approved"]),
-                    )
-                ).all()
-                admin_day_count = len(admin_day_visits)
-                if admin_day_count >= 10:
-                    raise HTTPException(
-                        status_code=409,
-                        detail=f"A plataforma já atingiu o limite de 10 agendamentos para o dia {preferred_date}. Escolha outra data.",
-                    )
-                admin_time_conflict = any(
-                    v.preferred_time == preferred_time for v in admin_day_visits
-                )
-                if admin_time_conflict:
-                    raise HTTPException(
-                        status_code=409,
-                        detail=f"A administração já tem um agendamento às {preferred_time} no dia {preferred_date}. Escolha outro horário.",
-                    )
+        if preferred_date:
+            # stored as YYYY-MM-DD, the form the day counters are keyed by
+            preferred_date = datetime.strptime(preferred_date, "%Y-%m-%d").date().isoformat()
 
         new_req = VisitRequest(
             id=str(uuid4()),
@@ -1783,31 +2019,39 @@ def request_visit(property_id: str, payload: VisitRequestCreate, current_user: U
             preferred_time=preferred_time,
             phone=phone_val,
             status="pending",
+            vendor_id=prop.vendedorId,
         )
         session.add(new_req)
 
-        # Notify admins
-        admins = session.exec(select(User).where(User.role == "admin")).all()
-        for admin in admins:
-            session.add(Notification(
-                id=str(uuid4()),
-                user_id=admin.id,
-                title="Nova visita agendada",
-                message=f"{current_user.nome} agendou visita ao imóvel '{prop.titulo}'",
-                type="info",
-                created_at=datetime.now(timezone.utc).isoformat(),
-            ))
+        if preferred_date:
+            # The insert reserves the slot, or without a time only the client's
+            # visit to this property that day (see VisitReservation), and takes
+            # the write lock, so the day limits are checked against every commit.
+            try:
+                session.flush()
+                code = preferred_time and over_capacity(session, prop.vendedorId, preferred_date)
+            except IntegrityError:  # the slot or the day is already reserved
+                code = "platform_time" if preferred_time else "client_property_day"
+            if code:
+                session.rollback()
+                raise HTTPException(status_code=409, detail=booking_conflict(
+                    session, prop, current_user.id, preferred_date, preferred_time, code))
+
+        # Notify admins (one INSERT ... SELECT, however many there are)
+        fan_out(
+            session, admins(),
+            title="Nova visita agendada",
+            message=f"{current_user.nome} agendou visita ao imóvel '{prop.titulo}'",
+        )
 
         # Notify vendor
         if prop.vendedorId != current_user.id:
-            session.add(Notification(
-                id=str(uuid4()),
-                user_id=prop.vendedorId,
+            notify(
+                session, prop.vendedorId,
                 title="Nova visita ao seu imóvel",
                 message=f"{current_user.nome} agendou visita ao imóvel '{prop.titulo}'",
                 type="info",
-                created_at=datetime.now(timezone.utc).isoformat(),
-            ))
+            )
 
         # Auto-create in-platform chat message to admin about the visit
         first_admin = session.exec(select(User).where(User.role == "admin")).first()
@@ -1827,30 +2071,119 @@ def request_visit(property_id: str, payload: VisitRequestCreate, current_user: U
                 created_at=datetime.now(timezone.utc).isoformat(),
             )
             session.add(chat_msg)
+            publish(session, first_admin.id, "chat", chat_message_read(chat_msg, current_user.nome, first_admin.nome).model_dump())
 
         session.commit()
         session.refresh(new_req)
         return build_visit_request_read(new_req, prop, current_user)
 
 
+# The VisitRequestRead fields, straight from SQL (same defaults as build_visit_request_read)
+VISIT_REQUEST_COLUMNS = [
+    VisitRequest.id,
+    VisitRequest.property_id,
+    func.coalesce(Property.titulo, "").label("property_title"),
+    VisitRequest.user_id,
+    func.coalesce(User.nome, "").label("user_name"),
+    VisitRequest.requested_at,
+    func.nullif(VisitRequest.preferred_date, "").label("preferred_date"),
+    func.nullif(VisitRequest.preferred_time, "").label("preferred_time"),
+    func.nullif(VisitRequest.phone, "").label("phone"),
+    VisitRequest.status,
+    VisitRequest.admin_id,
+    VisitRequest.admin_note,
+    VisitRequest.decided_at,
+]
+
+
+def visit_request_query(
+    filters: VisitRequestFilters,
+    *where,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    page: Optional[int] = None,
+    per_page: Optional[int] = None,
+):
+    """Visit requests matching ``where`` and ``filters``, newest first, as VISIT_REQUEST_COLUMNS.
+
+    One statement, joined to the property title and requester name. With
+    ``limit`` it fetches one extra row, to tell whether there is a next page.
+    """
+    if after and not limit:
+        raise HTTPException(status_code=400, detail="O parâmetro 'after' requer 'limit'")
+    q = (
+        select(*VISIT_REQUEST_COLUMNS)
+        .outerjoin(Property, Property.id == VisitRequest.property_id)
+        .outerjoin(User, User.id == VisitRequest.user_id)
+        .where(*where)
+    )
+    if filters.status:
+        q = q.where(VisitRequest.status.in_([s.strip() for s in filters.status.split(",") if s.strip()]))
+    if filters.property_id:
+        q = q.where(VisitRequest.property_id == filters.property_id)
+    if filters.date_from:
+        q = q.where(VisitRequest.preferred_date >= filters.date_from.isoformat())
+    if filters.date_to:
+        q = q.where(VisitRequest.preferred_date <= filters.date_to.isoformat())
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 2:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        q = q.where(tuple_(VisitRequest.requested_at, VisitRequest.id) < tuple_(*values))
+    q = q.order_by(VisitRequest.requested_at.desc(), VisitRequest.id.desc())
+    if limit:
+        q = q.limit(limit + 1)
+    elif page and per_page:
+        q = q.offset((page - 1) * per_page).limit(per_page)
+    return q
+
+
+def query_visit_requests(
+    session: Session,
+    filters: VisitRequestFilters,
+    *where,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    **kwargs,
+) -> Tuple[List[VisitRequestRead], Optional[str]]:
+    """Execute visit_request_query. Returns (items, next_cursor).
+
+    With ``limit`` this is keyset pagination on (requested_at, id) continuing
+    from ``after``; next_cursor is None on the last page.
+    """
+    rows = session.execute(visit_request_query(filters, *where, after=after, limit=limit, **kwargs)).all()
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    items = [VisitRequestRead(**row._mapping) for row in rows]
+    if not has_more:
+        return items, None
+    return items, encode_cursor([items[-1].requested_at, items[-1].id])
+
+
 @app.get("/visit-requests", response_model=List[VisitRequestRead])
 def list_visit_requests(
+    response: Response,
+    filters: VisitRequestFilters = Depends(),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     page: Optional[int] = None,
     per_page: Optional[int] = None,
     current_user: User = Depends(require_roles(["admin"])),
 ):
-    """List all visit requests (admin). Supports pagination."""
+    """List all visit requests (admin), newest first.
+
+    Cursor mode: pass ``limit`` (and ``after`` from the previous page); the
+    next cursor is returned in the ``X-Next-Cursor`` header, absent on the
+    last page. ``page``/``per_page`` offset pagination is still supported.
+    """
     with Session(engine) as session:
-        q = select(VisitRequest)
-        if page and per_page:
-            q = q.offset((page - 1) * per_page).limit(per_page)
-        results = session.exec(q).all()
-        out: List[VisitRequestRead] = []
-        for req in results:
-            prop = session.get(Property, req.property_id)
-            user = session.get(User, req.user_id)
-            out.append(build_visit_request_read(req, prop, user))
-        return out
+        items, next_cursor = query_visit_requests(
+            session, filters, after=after, limit=limit, page=page, per_page=per_page,
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.patch("/visit-requests/{request_id}")
@@ -1866,17 +2199,16 @@ def update_visit_request(request_id: str, action: VisitRequestAction, current_us
         req.admin_id = current_user.id
         req.decided_at = date.today().isoformat()
         session.add(req)
+        flush_visit_change(session, req)
 
         prop = session.get(Property, req.property_id)
         status_label = {"approved": "aprovada", "rejected": "rejeitada", "concluded": "concluída"}.get(action.status, action.status)
-        session.add(Notification(
-            id=str(uuid4()),
-            user_id=req.user_id,
+        notify(
+            session, req.user_id,
             title=f"Visita {status_label}",
             message=f"A sua visita ao imóvel '{prop.titulo if prop else ''}' foi {status_label}.",
             type=f"visit_{action.status}",
-            created_at=datetime.now(timezone.utc).isoformat(),
-        ))
+        )
 
         session.commit()
         session.refresh(req)
@@ -1932,15 +2264,21 @@ def list_vendedores(current_user: User = Depends(require_roles(["admin"]))):
 # ---- Client-facing visit request endpoints ----
 
 @app.get("/my/visit-requests", response_model=List[VisitRequestRead])
-def my_visit_requests(current_user: User = Depends(require_roles(["cliente"]))):
+def my_visit_requests(
+    response: Response,
+    filters: VisitRequestFilters = Depends(),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(require_roles(["cliente"])),
+):
+    """The client's own visit requests, newest first (cursor mode as in /visit-requests)."""
     with Session(engine) as session:
-        q = select(VisitRequest).where(VisitRequest.user_id == current_user.id)
-        results = session.exec(q).all()
-        out: List[VisitRequestRead] = []
-        for req in results:
-            prop = session.get(Property, req.property_id)
-            out.append(build_visit_request_read(req, prop, current_user))
-        return out
+        items, next_cursor = query_visit_requests(
+            session, filters, VisitRequest.user_id == current_user.id, after=after, limit=limit,
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.delete("/my/visit-requests/{request_id}", status_code=204)
@@ -1968,34 +2306,32 @@ def update_my_visit_request(request_id: str, payload: VisitRequestUpdate, curren
             raise HTTPException(status_code=403, detail="Not your request")
         if req.status != "pending":
             raise HTTPException(status_code=400, detail="Only pending requests can be edited")
-        new_date = payload.preferred_date if payload.preferred_date is not None else req.preferred_date
-        new_time = payload.preferred_time if payload.preferred_time is not None else req.preferred_time
-
-        # Conflict check on updated date/time
-        if new_date and new_time:
-            conflict = session.exec(
-                select(VisitRequest).where(
-                    VisitRequest.property_id == req.property_id,
-                    VisitRequest.preferred_date == new_date,
-                    VisitRequest.preferred_time == new_time,
-                    VisitRequest.status.in_(["pending", "approved"]),
-                    VisitRequest.id != req.id,
-                )
-            ).first()
-            if conflict:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"Já existe uma visita agendada para {new_date} às {new_time}. Escolha outro horário.",
-                )
-
+        prop = session.get(Property, req.property_id)
+        old_date = req.preferred_date
         if payload.preferred_date is not None:
-            req.preferred_date = payload.preferred_date
+            # stored as YYYY-MM-DD, the form the day counters are keyed by
+            req.preferred_date = (
+                datetime.strptime(payload.preferred_date, "%Y-%m-%d").date().isoformat()
+                if payload.preferred_date else None
+            )
         if payload.preferred_time is not None:
             req.preferred_time = payload.preferred_time
         session.add(req)
+
+        # as in request_visit: the update moves the reservation, then the day limits are checked
+        day, time = req.preferred_date, req.preferred_time
+        if day:
+            try:
+                session.flush()
+                code = time and day != old_date and over_capacity(session, prop.vendedorId, day)
+            except IntegrityError:
+                code = "platform_time" if time else "client_property_day"
+            if code:
+                session.rollback()
+                raise HTTPException(status_code=409, detail=booking_conflict(
+                    session, prop, current_user.id, day, time, code, moving=request_id))
         session.commit()
         session.refresh(req)
-        prop = session.get(Property, req.property_id)
         return build_visit_request_read(req, prop, current_user)
 
 
@@ -2004,14 +2340,15 @@ def update_my_visit_request(request_id: str, payload: VisitRequestUpdate, curren
 # =====================================================================
 
 @app.get("/my/favorites")
-def my_favorites(current_user: User = Depends(get_current_user)):
-    with Session(engine) as session:
-        favs = session.exec(select(Favorite).where(Favorite.user_id == current_user.id)).all()
-        property_ids = [f.property_id for f in favs]
-        if not property_ids:
-            return []
-        props = session.exec(select(Property).where(Property.id.in_(property_ids), Property.deleted == False)).all()
-        return [p.model_dump() for p in props]
+async def my_favorites(
+    current_user: User = Depends(get_current_user_async),
+    session: AsyncSession = Depends(get_async_session),
+):
+    favorite_ids = select(Favorite.property_id).where(Favorite.user_id == current_user.id)
+    props = (await session.exec(
+        select(Property).where(Property.id.in_(favorite_ids), Property.deleted == False)
+    )).all()
+    return [p.model_dump() for p in props]
 
 
 @app.post("/my/favorites/{property_id}", status_code=201)
@@ -2050,24 +2387,107 @@ def remove_favorite(property_id: str, current_user: User = Depends(get_current_u
 # NOTIFICATIONS (with pagination)
 # =====================================================================
 
+NOTIFICATION_DELTA_LIMIT = 200
+
+
 @app.get("/my/notifications")
-def my_notifications(
+async def my_notifications(
     page: Optional[int] = None,
     per_page: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    since: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user_async),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    with Session(engine) as session:
-        q = select(Notification).where(Notification.user_id == current_user.id).order_by(Notification.created_at.desc())
-        if page and per_page:
-            q = q.offset((page - 1) * per_page).limit(per_page)
-        notifs = session.exec(q).all()
-        return [
-            NotificationRead(
-                id=n.id, user_id=n.user_id, title=n.title, message=n.message,
-                type=n.type, read=n.read, created_at=n.created_at, link=n.link,
-            )
-            for n in notifs
-        ]
+    """All notifications, newest first; or with ``since``, only what changed after that cursor.
+
+    Delta mode returns a ``NotificationDelta``: notifications created or
+    marked read/unread after ``since`` (a ``cursor`` from an earlier delta or
+    from /my/notifications/unread-count), through the ``(user_id, seq)``
+    index, so a poll costs the same however long the history is.
+    """
+    if since is not None:
+        changed = (await session.exec(
+            select(Notification)
+            .where(Notification.user_id == current_user.id, Notification.seq > since)
+            .order_by(Notification.seq)
+            .limit(NOTIFICATION_DELTA_LIMIT + 1)
+        )).all()
+        has_more = len(changed) > NOTIFICATION_DELTA_LIMIT
+        changed = changed[:NOTIFICATION_DELTA_LIMIT]
+        # The cursor is the last seq sent, not the counter's: the two reads are
+        # separate snapshots, and a change committed in between is then
+        # returned by the next poll instead of skipped.
+        cursor = changed[-1].seq if changed else since
+        counter = await session.get(NotificationCounter, current_user.id)
+        return NotificationDelta(
+            notifications=[NotificationRead.model_validate(n) for n in changed],
+            cursor=cursor,
+            unread=counter.unread if counter else 0,
+            has_more=has_more,
+        )
+    q = select(Notification).where(Notification.user_id == current_user.id).order_by(Notification.created_at.desc())
+    if page and per_page:
+        q = q.offset((page - 1) * per_page).limit(per_page)
+    notifs = (await session.exec(q)).all()
+    return [
+        NotificationRead(
+            id=n.id, user_id=n.user_id, title=n.title, message=n.message,
+            type=n.type, read=n.read, created_at=n.created_at, link=n.link, seq=n.seq,
+        )
+        for n in notifs
+    ]
+
+
+@app.get("/my/notifications/unread-count")
+async def my_unread_notification_count(
+    current_user: User = Depends(get_current_user_async),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Unread badge count and the current sync cursor: a single primary-key lookup."""
+    counter = await session.get(NotificationCounter, current_user.id)
+    return {"unread": counter.unread if counter else 0, "cursor": counter.seq if counter else 0}
+
+
+@app.post("/events/ticket")
+async def event_stream_ticket(
+    token: str = Depends(oauth2_scheme), current_user: User = Depends(get_current_user_async),
+):
+    """A ticket for ``GET /events?ticket=``, valid for STREAM_TICKET_SECONDS and for nothing else."""
+    return {"ticket": create_stream_ticket(current_user.id, token_expiry(token)), "expires_in": STREAM_TICKET_SECONDS}
+
+
+@app.get("/events")
+async def event_stream(
+    request: Request,
+    ticket: Optional[str] = None,
+    resume_after: Optional[str] = Query(None, alias="last_event_id"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-Sent Events for the current user: ``notification`` and ``chat`` events.
+
+    Replaces polling /my/notifications and /chat/{partner_id}. EventSource
+    cannot send headers, so the browser opens the stream with a ticket from
+    POST /events/ticket; other clients may send the usual bearer header. On
+    reconnect the browser sends ``Last-Event-ID`` (or, when it opens a new
+    stream with a new ticket, ``?last_event_id=``) and missed events are replayed.
+    """
+    if ticket:
+        token = ticket
+        user = await user_from_token(ticket, scope=STREAM_SCOPE)
+    else:
+        auth = request.headers.get("authorization", "")
+        token = auth[7:] if auth.lower().startswith("bearer ") else None
+        user = await user_from_token(token)
+    resume = last_event_id or resume_after
+    try:
+        after = int(resume) if resume else None
+    except ValueError:
+        after = None
+    return StreamingResponse(
+        hub.stream(user.id, after, token_expiry(token)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
+    )
 
 
 @app.patch("/my/notifications/{notification_id}/read")
@@ -2085,12 +2505,11 @@ def mark_notification_read(notification_id: str, current_user: User = Depends(ge
 @app.patch("/my/notifications/read-all")
 def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
     with Session(engine) as session:
-        notifs = session.exec(
-            select(Notification).where(Notification.user_id == current_user.id, Notification.read == False)
-        ).all()
-        for n in notifs:
-            n.read = True
-            session.add(n)
+        session.exec(
+            update(Notification)
+            .where(Notification.user_id == current_user.id, Notification.read == False)
+            .values(read=True)
+        )
         session.commit()
         return {"ok": True}
 
@@ -2100,71 +2519,100 @@ def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
 # =====================================================================
 
 @app.get("/chat/conversations")
-def chat_conversations(current_user: User = Depends(get_current_user)):
-    with Session(engine) as session:
-        sent = session.exec(select(ChatMessage).where(ChatMessage.sender_id == current_user.id)).all()
-        received = session.exec(select(ChatMessage).where(ChatMessage.receiver_id == current_user.id)).all()
-        partner_ids = set()
-        for m in sent:
-            partner_ids.add(m.receiver_id)
-        for m in received:
-            partner_ids.add(m.sender_id)
-        conversations = []
-        for pid in partner_ids:
-            partner = session.get(User, pid)
-            if partner:
-                all_msgs = [m for m in sent + received if m.sender_id == pid or m.receiver_id == pid]
-                all_msgs.sort(key=lambda m: m.created_at, reverse=True)
-                last = all_msgs[0] if all_msgs else None
-                unread = len([m for m in received if m.sender_id == pid and not m.read])
-                conversations.append({
-                    "partner_id": pid,
-                    "partner_name": partner.nome,
-                    "partner_role": partner.role,
-                    "last_message": last.message if last else "",
-                    "last_message_at": last.created_at if last else "",
-                    "unread_count": unread,
-                })
-        conversations.sort(key=lambda c: c["last_message_at"], reverse=True)
-        return conversations
+async def chat_conversations(
+    current_user: User = Depends(get_current_user_async),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """The user's conversations, most recent first: one indexed read of the summary table."""
+    rows = (await session.exec(
+        select(ChatConversation, User.nome, User.role)
+        .join(User, User.id == ChatConversation.partner_id)
+        .where(ChatConversation.user_id == current_user.id)
+        .order_by(ChatConversation.last_message_at.desc())
+    )).all()
+    return [
+        {
+            "partner_id": conv.partner_id,
+            "partner_name": nome,
+            "partner_role": role,
+            "last_message": conv.last_message,
+            "last_message_at": conv.last_message_at,
+            "unread_count": conv.unread_count,
+        }
+        for conv, nome, role in rows
+    ]
+
+
+def chat_thread_query(user_id: str, partner_id: str, *where, newest_first: bool = False):
+    """Messages between two users matching ``where``, ordered by (created_at, id).
+
+    A UNION ALL of the two directions: each is one range of
+    ix_chatmessage_thread already in that order, so SQLite merges them
+    instead of sorting the whole thread.
+    """
+    arms = [
+        select(ChatMessage).where(ChatMessage.sender_id == sender, ChatMessage.receiver_id == receiver, *where)
+        for sender, receiver in ((user_id, partner_id), (partner_id, user_id))
+    ]
+    msg = aliased(ChatMessage, union_all(*arms).subquery())
+    order = (msg.created_at.desc(), msg.id.desc()) if newest_first else (msg.created_at, msg.id)
+    return select(msg).order_by(*order)
 
 
 @app.get("/chat/{partner_id}")
-def chat_messages(
+async def chat_messages(
     partner_id: str,
+    response: Response,
     page: Optional[int] = None,
     per_page: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    current_user: User = Depends(get_current_user_async),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    with Session(engine) as session:
-        q = select(ChatMessage).where(
-            ((ChatMessage.sender_id == current_user.id) & (ChatMessage.receiver_id == partner_id))
-            | ((ChatMessage.sender_id == partner_id) & (ChatMessage.receiver_id == current_user.id))
-        ).order_by(ChatMessage.created_at)
+    """Messages with ``partner_id`` in chronological order; marks the received ones read.
+
+    Cursor mode: pass ``limit`` for the newest messages, then ``before`` (from
+    the ``X-Next-Cursor`` header, absent on the oldest page) for older ones.
+    Either way the cost is a fixed number of queries: both names are resolved
+    once and unread messages are marked read with one UPDATE.
+    """
+    conv = await session.get(ChatConversation, (current_user.id, partner_id))
+    if conv and conv.unread_count:
+        await session.execute(
+            update(ChatMessage)
+            .where(
+                ChatMessage.sender_id == partner_id,
+                ChatMessage.receiver_id == current_user.id,
+                ChatMessage.read == False,
+            )
+            .values(read=True)
+        )
+        await session.commit()
+
+    partner = await session.get(User, partner_id)
+    names = {current_user.id: current_user.nome, partner_id: partner.nome if partner else ""}
+    if limit or before:
+        limit = limit or 50
+        cursor = []
+        if before:
+            values = decode_cursor(before)
+            if len(values) != 2:
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            cursor.append(tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(*values))
+        q = chat_thread_query(current_user.id, partner_id, *cursor, newest_first=True).limit(limit + 1)
+        msgs = (await session.exec(q)).all()
+        if len(msgs) > limit:
+            msgs = msgs[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor([msgs[-1].created_at, msgs[-1].id])
+        msgs.reverse()
+    else:
+        q = chat_thread_query(current_user.id, partner_id)
         if page and per_page:
             q = q.offset((page - 1) * per_page).limit(per_page)
-        msgs = session.exec(q).all()
-
-        # mark received messages as read
-        for m in msgs:
-            if m.receiver_id == current_user.id and not m.read:
-                m.read = True
-                session.add(m)
-        session.commit()
+        msgs = (await session.exec(q)).all()
 
-        result = []
-        for m in msgs:
-            sender = session.get(User, m.sender_id)
-            receiver = session.get(User, m.receiver_id)
-            result.append(ChatMessageRead(
-                id=m.id, sender_id=m.sender_id,
-                sender_name=sender.nome if sender else "",
-                receiver_id=m.receiver_id,
-                receiver_name=receiver.nome if receiver else "",
-                property_id=m.property_id,
-                message=m.message, created_at=m.created_at, read=m.read,
-            ))
-        return result
+    return [chat_message_read(m, names.get(m.sender_id, ""), names.get(m.receiver_id, "")) for m in msgs]
 
 
 @app.post("/chat/{partner_id}", status_code=201)
@@ -2182,24 +2630,16 @@ def send_chat_message(partner_id: str, payload: ChatMessageCreate, current_user:
             created_at=datetime.now(timezone.utc).isoformat(),
         )
         session.add(msg)
-        session.add(Notification(
-            id=str(uuid4()),
-            user_id=partner_id,
+        read = chat_message_read(msg, current_user.nome, partner.nome)
+        publish(session, partner_id, "chat", read.model_dump())
+        notify(
+            session, partner_id,
             title="Nova mensagem",
             message=f"{current_user.nome}: {payload.message[:80]}",
             type="chat",
-            created_at=datetime.now(timezone.utc).isoformat(),
-        ))
-        session.commit()
-        session.refresh(msg)
-        return ChatMessageRead(
-            id=msg.id, sender_id=msg.sender_id,
-            sender_name=current_user.nome,
-            receiver_id=msg.receiver_id,
-            receiver_name=partner.nome,
-            property_id=msg.property_id,
-            message=msg.message, created_at=msg.created_at, read=msg.read,
         )
+        session.commit()
+        return read
 
 
 # =====================================================================
@@ -2207,8 +2647,23 @@ def send_chat_message(partner_id: str, payload: ChatMessageCreate, current_user:
 # =====================================================================
 
 @app.get("/properties/{property_id}/reviews")
-def get_reviews(property_id: str):
+def get_reviews(property_id: str, request: Request, response: Response):
+    """Reviews for a property, newest first.
+
+    Reviews are only ever added or anonymised (account deletion), so the ETag
+    is built from the count, the newest timestamp and the anonymised count.
+    No Last-Modified: anonymising does not move any timestamp.
+    """
     with Session(engine) as session:
+        count, latest, anonymised = session.exec(
+            select(
+                func.count(Review.id), func.max(Review.created_at),
+                func.sum(case((Review.user_id == "deleted", 1), else_=0)),
+            ).where(Review.property_id == property_id)
+        ).one()
+        unchanged = not_modified(request, response, make_etag(property_id, count, latest, anonymised or 0))
+        if unchanged:
+            return unchanged
         reviews = session.exec(select(Review).where(Review.property_id == property_id)).all()
         reviews_sorted = sorted(reviews, key=lambda r: r.created_at, reverse=True)
         return [
@@ -2261,14 +2716,12 @@ def create_review(property_id: str, payload: ReviewCreate, current_user: User =
             created_at=datetime.now(timezone.utc).isoformat(),
         )
         session.add(review)
-        session.add(Notification(
-            id=str(uuid4()),
-            user_id=prop.vendedorId,
+        notify(
+            session, prop.vendedorId,
             title="Nova avaliação",
             message=f"{current_user.nome} avaliou o imóvel '{prop.titulo}' com {payload.rating} estrelas.",
             type="review",
-            created_at=datetime.now(timezone.utc).isoformat(),
-        ))
+        )
         session.commit()
         return ReviewRead(
             id=review.id, property_id=review.property_id, user_id=review.user_id,
@@ -2347,6 +2800,79 @@ def admin_update_user(user_id: str, payload: AdminUserUpdate, current_user: User
         return user_to_dict(user)
 
 
+@app.get("/admin/cache/stats")
+def admin_cache_stats(current_user: User = Depends(require_roles(["admin"]))):
+    """Hit/miss/eviction counters of this worker's listing caches, for sizing."""
+    return cache_stats()
+
+
+@app.get("/admin/jobs/stats")
+def admin_job_stats(current_user: User = Depends(require_roles(["admin"]))):
+    """Background job queue and email outbox depth, recent wait/run/delivery times, and open event streams."""
+    with Session(engine) as session:
+        return {**queue_stats(session), "email_outbox": outbox_stats(session), "realtime_connections": hub.connections()}
+
+
+# Rows fetched per round trip by the export cursor; also the size of each streamed chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _csv_value(value: Any) -> Any:
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def export_chunks(q, names: List[str], fmt: str):
+    """Yield ``q``'s rows encoded as NDJSON or CSV, one batch per chunk.
+
+    Rows come from a streaming cursor (``yield_per``), so memory stays
+    bounded by EXPORT_BATCH_SIZE whatever the size of the result.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(q)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(names)
+            yield buffer.getvalue().encode()
+        for batch in result.partitions():
+            if fmt == "ndjson":
+                yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in batch)
+            else:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(v) for v in row] for row in batch)
+                yield buffer.getvalue().encode()
+
+
+@app.get("/admin/properties/export")
+def export_properties(
+    filters: PropertyFilters = Depends(),
+    fmt: str = Query("ndjson", alias="format"),
+    fields: Optional[str] = None,
+    current_user: User = Depends(require_roles(["admin"])),
+):
+    """Stream the (filtered) catalogue as NDJSON or CSV, for partner feeds and BI.
+
+    Takes the same filters as GET /properties, plus ``fields=a,b,c`` to export
+    only some columns. Nothing is buffered: rows go from the cursor to the
+    socket batch by batch.
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {fmt}")
+    columns = property_projection(fields, None) or {c.name: c for c in Property.__table__.c}
+    q = apply_property_filters(select(*columns.values()), filters)
+    if filters.search:
+        q = apply_search_filter(q, filters.search)
+    filename = f"imoveis-{date.today().isoformat()}.{fmt}"
+    logger.info(f"Admin {current_user.id} exporting properties as {fmt}")
+    return StreamingResponse(
+        export_chunks(q, list(columns), fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @app.get("/admin/deleted-properties")
 def admin_deleted_properties(current_user: User = Depends(require_roles(["admin"]))):
     """List soft-deleted properties (admin only)."""
@@ -2360,20 +2886,21 @@ def admin_deleted_properties(current_user: User = Depends(require_roles(["admin"
 # =====================================================================
 
 @app.get("/vendor/visit-requests", response_model=List[VisitRequestRead])
-def vendor_visit_requests(current_user: User = Depends(require_roles(["vendedor"]))):
-    """Return visit requests for vendor's properties."""
+def vendor_visit_requests(
+    response: Response,
+    filters: VisitRequestFilters = Depends(),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(require_roles(["vendedor"])),
+):
+    """Visit requests for the vendor's properties, newest first (cursor mode as in /visit-requests)."""
     with Session(engine) as session:
-        my_props = session.exec(select(Property).where(Property.vendedorId == current_user.id)).all()
-        prop_ids = [p.id for p in my_props]
-        if not prop_ids:
-            return []
-        results = session.exec(select(VisitRequest).where(VisitRequest.property_id.in_(prop_ids))).all()
-        out: List[VisitRequestRead] = []
-        for req in results:
-            prop = session.get(Property, req.property_id)
-            user = session.get(User, req.user_id)
-            out.append(build_visit_request_read(req, prop, user))
-        return out
+        items, next_cursor = query_visit_requests(
+            session, filters, VisitRequest.vendor_id == current_user.id, after=after, limit=limit,
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.patch("/vendor/visit-requests/{request_id}")
@@ -2395,16 +2922,15 @@ def vendor_update_visit(request_id: str, action: VisitRequestAction, current_use
         req.admin_id = current_user.id
         req.decided_at = date.today().isoformat()
         session.add(req)
+        flush_visit_change(session, req)
 
         status_label = {"approved": "aprovada", "rejected": "rejeitada", "concluded": "concluída"}.get(action.status, action.status)
-        session.add(Notification(
-            id=str(uuid4()),
-            user_id=req.user_id,
+        notify(
+            session, req.user_id,
             title=f"Visita {status_label}",
             message=f"A sua visita ao imóvel '{prop.titulo}' foi {status_label} pelo vendedor.",
             type=f"visit_{action.status}",
-            created_at=datetime.now(timezone.utc).isoformat(),
-        ))
+        )
 
         session.commit()
         session.refresh(req)
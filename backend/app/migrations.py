@@ -0,0 +1,539 @@
+"""Versioned schema migrations.
+
+Each step in ``MIGRATIONS`` runs once, in order, and is recorded in the
+``schema_version`` table. At startup ``migrate()`` does a single
+``SELECT max(version)``; when the database is already at head nothing else
+is inspected. When steps are pending they run under ``BEGIN IMMEDIATE``, so
+concurrently booting workers wait for the first one instead of racing it.
+
+Steps must be idempotent (``checkfirst`` / column probes), because databases
+created before versioning existed start from version 0 with tables present.
+
+Steps 1 (create tables) and 3 (indexes) build from the *current* models, not
+from the schema of the day they were written. A new database therefore gets
+today's tables and declared indexes in those two steps, and the later steps
+find their work partly done. Keep them safe to run on both: guard ALTERs
+with ``_columns``, create with ``IF NOT EXISTS`` / ``checkfirst``, and do not
+declare an index on the models when its column is added by ALTER in a later
+step (see ``_late_column_indexes``). A step that rebuilds a table spells out
+its DDL, so it does not change with the models.
+
+Apply migrations ahead of a deploy from backend/app:
+
+    python migrations.py            # upgrade to head
+    python migrations.py status     # print current / head version
+"""
+import logging
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel
+
+import models  # noqa: F401 — registers every table on SQLModel.metadata
+from search import create_search_index, drop_search_index
+
+logger = logging.getLogger("imobiliaria")
+
+
+def _columns(conn, table: str):
+    return [c[1] for c in conn.execute(text(f"PRAGMA table_info('{table}')")).fetchall()]
+
+
+def _create_tables(conn):
+    SQLModel.metadata.create_all(conn)
+
+
+def _legacy_columns(conn):
+    """Columns added to pre-existing tables before migrations were versioned."""
+    cols = _columns(conn, "user")
+    if "hashed_password" not in cols:
+        conn.execute(text("ALTER TABLE user ADD COLUMN hashed_password TEXT"))
+    if "phone" not in cols:
+        conn.execute(text("ALTER TABLE user ADD COLUMN phone TEXT"))
+    if "email_verified" not in cols:
+        conn.execute(text("ALTER TABLE user ADD COLUMN email_verified INTEGER DEFAULT 1"))
+    if "is_active" not in cols:
+        conn.execute(text("ALTER TABLE user ADD COLUMN is_active INTEGER DEFAULT 1"))
+
+    vr_cols = _columns(conn, "visitrequest")
+    for col in ["preferred_date", "preferred_time", "phone", "admin_id", "admin_note", "decided_at"]:
+        if col not in vr_cols:
+            conn.execute(text(f"ALTER TABLE visitrequest ADD COLUMN {col} TEXT"))
+    if "status" not in vr_cols:
+        conn.execute(text("ALTER TABLE visitrequest ADD COLUMN status TEXT DEFAULT 'pending'"))
+
+    prop_cols = _columns(conn, "property")
+    if "deleted" not in prop_cols:
+        conn.execute(text("ALTER TABLE property ADD COLUMN deleted INTEGER DEFAULT 0"))
+    if "deleted_at" not in prop_cols:
+        conn.execute(text("ALTER TABLE property ADD COLUMN deleted_at TEXT"))
+    if "tipoImovel" not in prop_cols:
+        conn.execute(text("ALTER TABLE property ADD COLUMN tipoImovel TEXT"))
+    for feat_col in [
+        "garagemNumCarros", "garagemFechada", "arCondicionado", "ginasio",
+        "escritorio", "salaJogos", "salaTV", "areaLazer", "mobilada",
+        "sistemaSeguranca", "elevador", "verificadoAdmin",
+    ]:
+        if feat_col not in prop_cols:
+            conn.execute(text(f"ALTER TABLE property ADD COLUMN {feat_col} INTEGER DEFAULT 0"))
+    if "verificadoNota" not in prop_cols:
+        conn.execute(text("ALTER TABLE property ADD COLUMN verificadoNota TEXT"))
+
+    cli_cols = _columns(conn, "cliente")
+    for kyc_col in ["documento_id", "nuit", "comprovativo_residencia", "capacidade_financeira", "tipo_interesse"]:
+        if kyc_col not in cli_cols:
+            conn.execute(text(f"ALTER TABLE cliente ADD COLUMN {kyc_col} TEXT"))
+
+
+def _indexes(conn):
+    """Declared indexes; create_all() skips tables that already existed."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _search_index(conn):
+    conn.execute(text("SAVEPOINT fts"))
+    try:
+        create_search_index(conn)
+    except OperationalError as e:
+        # SQLite built without FTS5: keep going, search falls back to LIKE
+        conn.execute(text("ROLLBACK TO SAVEPOINT fts"))
+        logger.warning(f"Skipping search index: {e}")
+    conn.execute(text("RELEASE SAVEPOINT fts"))
+
+
+def _property_version(conn):
+    """Per-row version + updatedAt on property, maintained by a trigger.
+
+    The trigger covers every write path (ORM, raw SQL, bulk scripts); it does
+    not re-fire for its own UPDATE because recursive triggers are off.
+    """
+    cols = _columns(conn, "property")
+    if "version" not in cols:
+        conn.execute(text("ALTER TABLE property ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    if "updatedAt" not in cols:
+        conn.execute(text('ALTER TABLE property ADD COLUMN "updatedAt" VARCHAR'))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS property_version_au AFTER UPDATE ON property
+        WHEN new.version = old.version BEGIN
+            UPDATE property
+            SET version = old.version + 1,
+                "updatedAt" = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+            WHERE rowid = new.rowid;
+        END
+    """))
+
+
+def _image_variants(conn):
+    if "variantes" not in _columns(conn, "property"):
+        conn.execute(text("ALTER TABLE property ADD COLUMN variantes JSON"))
+
+
+def _watermark_tracking(conn):
+    if "marcaAgua" not in _columns(conn, "property"):
+        conn.execute(text('ALTER TABLE property ADD COLUMN "marcaAgua" JSON'))
+
+
+def _job_queue(conn):
+    models.Job.__table__.create(conn, checkfirst=True)
+
+
+def _email_outbox(conn):
+    models.EmailOutbox.__table__.create(conn, checkfirst=True)
+
+
+def _realtime_events(conn):
+    models.RealtimeEvent.__table__.create(conn, checkfirst=True)
+
+
+def _notification_counters(conn):
+    """Per-user unread counter and change sequence on notification, maintained by triggers.
+
+    Like ``property_version_au``, the triggers cover every write path,
+    including the ``INSERT ... SELECT`` fan-out. Each insert or read-state
+    change bumps the user's ``seq`` and stamps it on the row, so
+    ``seq > cursor`` is exactly what changed since the client last synced.
+    """
+    if "seq" not in _columns(conn, "notification"):
+        conn.execute(text("ALTER TABLE notification ADD COLUMN seq INTEGER NOT NULL DEFAULT 0"))
+    models.NotificationCounter.__table__.create(conn, checkfirst=True)
+    for index in models.Notification.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    # existing rows: seq in creation order, counters from the current state
+    conn.execute(text("""
+        UPDATE notification SET seq = numbered.n
+        FROM (
+            SELECT rowid AS rid, row_number() OVER (PARTITION BY user_id ORDER BY created_at, rowid) AS n
+            FROM notification
+        ) AS numbered
+        WHERE notification.rowid = numbered.rid
+    """))
+    conn.execute(text("""
+        INSERT OR REPLACE INTO notificationcounter (user_id, unread, seq)
+        SELECT user_id, sum(NOT read), max(seq) FROM notification GROUP BY user_id
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS notification_counter_ai AFTER INSERT ON notification BEGIN
+            INSERT INTO notificationcounter (user_id, unread, seq) VALUES (new.user_id, NOT new.read, 1)
+            ON CONFLICT (user_id) DO UPDATE SET unread = unread + excluded.unread, seq = seq + 1;
+            UPDATE notification
+            SET seq = (SELECT seq FROM notificationcounter WHERE user_id = new.user_id)
+            WHERE rowid = new.rowid;
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS notification_counter_au AFTER UPDATE OF read ON notification
+        WHEN new.read != old.read BEGIN
+            UPDATE notificationcounter
+            SET unread = unread + CASE WHEN new.read THEN -1 ELSE 1 END, seq = seq + 1
+            WHERE user_id = new.user_id;
+            UPDATE notification
+            SET seq = (SELECT seq FROM notificationcounter WHERE user_id = new.user_id)
+            WHERE rowid = new.rowid;
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS notification_counter_ad AFTER DELETE ON notification
+        WHEN NOT old.read BEGIN
+            UPDATE notificationcounter SET unread = unread - 1 WHERE user_id = old.user_id;
+        END
+    """))
+
+
+def _chat_conversations(conn):
+    """Per-participant conversation summaries, maintained by triggers on chatmessage.
+
+    Every insert (a sent message, the visit-request chat) updates both
+    sides' last message; read-state changes adjust the reader's unread count.
+    """
+    models.ChatConversation.__table__.create(conn, checkfirst=True)
+    conn.execute(text("""
+        WITH sides AS (
+            SELECT sender_id AS user_id, receiver_id AS partner_id, message, created_at, sender_id, 0 AS unread
+            FROM chatmessage
+            UNION ALL
+            SELECT receiver_id, sender_id, message, created_at, sender_id, NOT read
+            FROM chatmessage
+        ), ranked AS (
+            SELECT *,
+                row_number() OVER (PARTITION BY user_id, partner_id ORDER BY created_at DESC) AS n,
+                sum(unread) OVER (PARTITION BY user_id, partner_id) AS total_unread
+            FROM sides
+        )
+        INSERT OR REPLACE INTO chatconversation
+            (user_id, partner_id, last_message, last_message_at, last_sender_id, unread_count)
+        SELECT user_id, partner_id, message, created_at, sender_id, total_unread FROM ranked WHERE n = 1
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS chatmessage_conversation_ai AFTER INSERT ON chatmessage BEGIN
+            INSERT INTO chatconversation
+                (user_id, partner_id, last_message, last_message_at, last_sender_id, unread_count)
+            VALUES
+                (new.sender_id, new.receiver_id, new.message, new.created_at, new.sender_id, 0),
+                (new.receiver_id, new.sender_id, new.message, new.created_at, new.sender_id, NOT new.read)
+            ON CONFLICT (user_id, partner_id) DO UPDATE SET
+                last_message = CASE WHEN excluded.last_message_at >= last_message_at
+                    THEN excluded.last_message ELSE last_message END,
+                last_sender_id = CASE WHEN excluded.last_message_at >= last_message_at
+                    THEN excluded.last_sender_id ELSE last_sender_id END,
+                last_message_at = max(last_message_at, excluded.last_message_at),
+                unread_count = unread_count + excluded.unread_count;
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS chatmessage_conversation_au AFTER UPDATE OF read ON chatmessage
+        WHEN new.read != old.read BEGIN
+            UPDATE chatconversation
+            SET unread_count = unread_count + CASE WHEN new.read THEN -1 ELSE 1 END
+            WHERE user_id = new.receiver_id AND partner_id = new.sender_id;
+        END
+    """))
+
+
+def _visit_request_listing_indexes(conn):
+    for index in models.VisitRequest.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+_VISIT_ACTIVE = "IN ('pending', 'approved')"
+
+
+def _visit_slot_counts(conn):
+    """Active visits per day/vendor/slot (visitslotcount), maintained by triggers on visitrequest.
+
+    Inserts, deletes (cancellations) and changes of status, date, time or
+    property all move the counts, whichever code path makes them.
+    """
+    models.VisitSlotCount.__table__.create(conn, checkfirst=True)
+    vendor = "coalesce((SELECT \"vendedorId\" FROM property WHERE id = {row}.property_id), '')"
+    conn.execute(text(f"""
+        INSERT OR REPLACE INTO visitslotcount (day, vendor_id, slot, visits)
+        SELECT preferred_date, {vendor.format(row="visitrequest")}, coalesce(preferred_time, ''), count(*)
+        FROM visitrequest
+        WHERE status {_VISIT_ACTIVE} AND coalesce(preferred_date, '') != ''
+        GROUP BY 1, 2, 3
+    """))
+    add = f"""
+        INSERT INTO visitslotcount (day, vendor_id, slot, visits)
+        VALUES (new.preferred_date, {vendor.format(row="new")}, coalesce(new.preferred_time, ''), 1)
+        ON CONFLICT (day, vendor_id, slot) DO UPDATE SET visits = visits + 1;
+    """
+    remove = f"""
+        UPDATE visitslotcount SET visits = visits - 1
+        WHERE day = old.preferred_date AND vendor_id = {vendor.format(row="old")}
+            AND slot = coalesce(old.preferred_time, '');
+        DELETE FROM visitslotcount
+        WHERE day = old.preferred_date AND vendor_id = {vendor.format(row="old")}
+            AND slot = coalesce(old.preferred_time, '') AND visits <= 0;
+    """
+    counted = "{row}.status " + _VISIT_ACTIVE + " AND coalesce({row}.preferred_date, '') != ''"
+    changed = "status, preferred_date, preferred_time, property_id"
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_slots_ai AFTER INSERT ON visitrequest
+        WHEN {counted.format(row="new")} BEGIN {add} END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_slots_ad AFTER DELETE ON visitrequest
+        WHEN {counted.format(row="old")} BEGIN {remove} END
+    """))
+    # an update is a removal of the old row's slot and an addition of the new one's
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_slots_au_old AFTER UPDATE OF {changed} ON visitrequest
+        WHEN {counted.format(row="old")} BEGIN {remove} END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_slots_au_new AFTER UPDATE OF {changed} ON visitrequest
+        WHEN {counted.format(row="new")} BEGIN {add} END
+    """))
+
+
+def _visit_reservations(conn):
+    """Slot reservations (visitreservation) for active timed visits, maintained by triggers on visitrequest.
+
+    Existing visits that already clash keep their rows; only the earliest
+    requested one holds the slot.
+    """
+    models.VisitReservation.__table__.create(conn, checkfirst=True)
+    held = "{row}.status " + _VISIT_ACTIVE + " AND coalesce({row}.preferred_date, '') != '' AND coalesce({row}.preferred_time, '') != ''"
+    conn.execute(text(f"""
+        INSERT OR IGNORE INTO visitreservation (visit_id, day, slot, property_id, user_id)
+        SELECT id, preferred_date, preferred_time, property_id, user_id FROM visitrequest
+        WHERE {held.format(row="visitrequest")}
+        ORDER BY requested_at, id
+    """))
+    _visit_reservation_triggers(conn, held, "new.preferred_time")
+
+
+def _visit_reservation_triggers(conn, held: str, slot: str):
+    """Triggers that keep visitreservation in step with the visits matching ``held``."""
+    # a clash aborts the INSERT/UPDATE on visitrequest with an IntegrityError
+    reserve = f"""
+        INSERT INTO visitreservation (visit_id, day, slot, property_id, user_id)
+        SELECT new.id, new.preferred_date, {slot}, new.property_id, new.user_id
+        WHERE {held.format(row="new")};
+    """
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_reservation_ai AFTER INSERT ON visitrequest
+        BEGIN {reserve} END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_reservation_ad AFTER DELETE ON visitrequest
+        BEGIN DELETE FROM visitreservation WHERE visit_id = old.id; END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_reservation_au
+        AFTER UPDATE OF status, preferred_date, preferred_time, property_id, user_id ON visitrequest
+        BEGIN DELETE FROM visitreservation WHERE visit_id = old.id; {reserve} END
+    """))
+
+
+def _rate_limits(conn):
+    """Shared rate-limiter state (see ratelimit.py)."""
+    models.RateLimit.__table__.create(conn, checkfirst=True)
+
+
+def _search_index_stable_keys(conn):
+    """Re-key the search index on property.id (property_search_key) instead of the implicit rowid.
+
+    A VACUUM may renumber the rowid of a table with a TEXT primary key, which
+    left the old index pointing at the wrong listings.
+    """
+    drop_search_index(conn)
+    _search_index(conn)
+
+
+def _visit_slot_count_index(conn):
+    for index in models.VisitSlotCount.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _late_column_indexes(conn):
+    """Indexes on columns added by ALTER in a later step than _indexes.
+
+    They are not declared on the models: _indexes creates every declared
+    index, and on a database that predates the column it would fail.
+    """
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_notification_user_seq ON notification (user_id, seq)"))
+
+
+def _visit_request_vendor(conn):
+    """Property vendor copied onto visitrequest.vendor_id, kept in step by triggers.
+
+    The vendor's listing then reads one index range in (requested_at, id)
+    order instead of joining every visit to its property and sorting.
+    """
+    if "vendor_id" not in _columns(conn, "visitrequest"):
+        conn.execute(text("ALTER TABLE visitrequest ADD COLUMN vendor_id TEXT"))
+    vendor = '(SELECT "vendedorId" FROM property WHERE id = {row}.property_id)'
+    conn.execute(text(f"UPDATE visitrequest SET vendor_id = {vendor.format(row='visitrequest')}"))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_vendor_ai AFTER INSERT ON visitrequest
+        WHEN new.vendor_id IS NULL BEGIN
+            UPDATE visitrequest SET vendor_id = {vendor.format(row="new")} WHERE rowid = new.rowid;
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS visitrequest_vendor_au AFTER UPDATE OF property_id ON visitrequest BEGIN
+            UPDATE visitrequest SET vendor_id = {vendor.format(row="new")} WHERE rowid = new.rowid;
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS property_vendor_au AFTER UPDATE OF "vendedorId" ON property
+        WHEN new."vendedorId" IS NOT old."vendedorId" BEGIN
+            UPDATE visitrequest SET vendor_id = new."vendedorId" WHERE property_id = new.id;
+        END
+    """))
+    # not declared on the model, see _late_column_indexes
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_visitrequest_vendor_recent ON visitrequest (vendor_id, requested_at, id)"
+    ))
+
+
+def _chat_thread_index(conn):
+    """ix_chatmessage_thread replaces ix_chatmessage_pair, adding id for the (created_at, id) cursor."""
+    for index in models.ChatMessage.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    conn.execute(text("DROP INDEX IF EXISTS ix_chatmessage_pair"))
+
+
+def _property_sort_indexes(conn):
+    for index in models.Property.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _untimed_visit_reservations(conn):
+    """Reserve visits without a time too, with a NULL slot.
+
+    The (user_id, property_id, day) constraint then refuses a second visit
+    by the same client to the same property that day, timed or not, while
+    the (day, slot) constraint ignores NULL slots. The table is rebuilt to
+    make ``slot`` nullable.
+    """
+    for trigger in ("visitrequest_reservation_ai", "visitrequest_reservation_ad", "visitrequest_reservation_au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    conn.execute(text("ALTER TABLE visitreservation RENAME TO visitreservation_old"))
+    conn.execute(text("""
+        CREATE TABLE visitreservation (
+            visit_id VARCHAR NOT NULL,
+            day VARCHAR NOT NULL,
+            slot VARCHAR,
+            property_id VARCHAR NOT NULL,
+            user_id VARCHAR NOT NULL,
+            PRIMARY KEY (visit_id),
+            CONSTRAINT uq_visitreservation_slot UNIQUE (day, slot),
+            CONSTRAINT uq_visitreservation_client_property_day UNIQUE (user_id, property_id, day)
+        )
+    """))
+    conn.execute(text("""
+        INSERT INTO visitreservation (visit_id, day, slot, property_id, user_id)
+        SELECT visit_id, day, slot, property_id, user_id FROM visitreservation_old
+    """))
+    conn.execute(text("DROP TABLE visitreservation_old"))
+    held = "{row}.status " + _VISIT_ACTIVE + " AND coalesce({row}.preferred_date, '') != ''"
+    conn.execute(text(f"""
+        INSERT OR IGNORE INTO visitreservation (visit_id, day, slot, property_id, user_id)
+        SELECT id, preferred_date, NULL, property_id, user_id FROM visitrequest
+        WHERE {held.format(row="visitrequest")} AND coalesce(preferred_time, '') = ''
+        ORDER BY requested_at, id
+    """))
+    _visit_reservation_triggers(conn, held, "nullif(new.preferred_time, '')")
+
+
+# (version, description, step). Append only — never renumber or edit old steps.
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "legacy column additions", _legacy_columns),
+    (3, "hot-path indexes", _indexes),
+    (4, "property full-text search index", _search_index),
+    (5, "property row version", _property_version),
+    (6, "property image variants", _image_variants),
+    (7, "property watermark tracking", _watermark_tracking),
+    (8, "background job queue", _job_queue),
+    (9, "email outbox", _email_outbox),
+    (10, "realtime event log", _realtime_events),
+    (11, "notification unread counters", _notification_counters),
+    (12, "chat conversation summaries", _chat_conversations),
+    (13, "visit request listing indexes", _visit_request_listing_indexes),
+    (14, "visit slot counters", _visit_slot_counts),
+    (15, "visit slot reservations", _visit_reservations),
+    (16, "rate limiter state", _rate_limits),
+    (17, "search index keyed by property id", _search_index_stable_keys),
+    (18, "visit slot counter day/slot index", _visit_slot_count_index),
+    (19, "indexes on later-added columns", _late_column_indexes),
+    (20, "visit request vendor", _visit_request_vendor),
+    (21, "chat thread index", _chat_thread_index),
+    (22, "property price/area sort indexes", _property_sort_indexes),
+    (23, "reservations for visits without a time", _untimed_visit_reservations),
+]
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    try:
+        return conn.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+    except OperationalError:
+        return 0
+
+
+def migrate(engine) -> int:
+    """Bring the database to HEAD. Returns the number of steps applied."""
+    with engine.connect() as conn:
+        if current_version(conn) >= HEAD:
+            return 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # the write lock serialises concurrent boots; re-read the version under it
+        conn.execute(text("BEGIN IMMEDIATE"))
+        try:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                "version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at TEXT NOT NULL)"
+            ))
+            version = current_version(conn)
+            pending = [m for m in MIGRATIONS if m[0] > version]
+            for number, description, step in pending:
+                logger.info(f"Applying migration {number}: {description}")
+                step(conn)
+                conn.execute(
+                    text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                    {"v": number, "d": description, "t": datetime.now(timezone.utc).isoformat()},
+                )
+            conn.execute(text("COMMIT"))
+        except Exception:
+            conn.execute(text("ROLLBACK"))
+            raise
+    return len(pending)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    from database import engine
+
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        with engine.connect() as conn:
+            print(f"current: {current_version(conn)}  head: {HEAD}")
+    else:
+        applied = migrate(engine)
+        print(f"Applied {applied} migration(s); database at version {HEAD}.")
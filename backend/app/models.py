@@ -1,14 +1,14 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index, UniqueConstraint
 from datetime import date
 
 class User(SQLModel, table=True):
     id: str = Field(primary_key=True)
     nome: str
-    email: Optional[str] = None
+    email: Optional[str] = Field(default=None, index=True)
     role: str
-    phone: Optional[str] = None
+    phone: Optional[str] = Field(default=None, index=True)
     # store hashed password for credential login (nullable for demo users)
     hashed_password: Optional[str] = None
     email_verified: bool = True  # True for demo/seed users; False for new registrations until verified
@@ -18,7 +18,7 @@ class User(SQLModel, table=True):
 class Cliente(SQLModel, table=True):
     """Independent client registration data."""
     id: str = Field(primary_key=True)
-    user_id: str  # references User.id
+    user_id: str = Field(index=True)  # references User.id
     nome: str
     email: Optional[str] = None
     phone: Optional[str] = None
@@ -33,7 +33,7 @@ class Cliente(SQLModel, table=True):
 class Vendedor(SQLModel, table=True):
     """Independent vendor registration data."""
     id: str = Field(primary_key=True)
-    user_id: str  # references User.id
+    user_id: str = Field(index=True)  # references User.id
     nome: str
     email: Optional[str] = None
     phone: Optional[str] = None
@@ -43,6 +43,16 @@ class Vendedor(SQLModel, table=True):
 
 
 class Property(SQLModel, table=True):
+    __table_args__ = (
+        # listing filters (equality on deleted/tipo, then cidade, range on preco)
+        Index("ix_property_listing", "deleted", "tipo", "cidade", "preco"),
+        # default "newest first" listing order + keyset cursor
+        Index("ix_property_recent", "deleted", "createdAt", "id"),
+        # price / area listing orders + keyset cursor
+        Index("ix_property_price", "deleted", "preco", "id"),
+        Index("ix_property_area", "deleted", "area", "id"),
+    )
+
     id: str = Field(primary_key=True)
     titulo: str
     descricao: str
@@ -55,7 +65,11 @@ class Property(SQLModel, table=True):
     area: float
     imagem: str
     galeria: List[str] = Field(sa_column=Column(JSON))
-    vendedorId: str
+    # {image url: {"<width>": webp variant url}}, filled by images.py
+    variantes: Optional[Dict[str, Dict[str, str]]] = Field(default=None, sa_column=Column(JSON))
+    # image urls already watermarked; their originals are kept in originals/
+    marcaAgua: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
+    vendedorId: str = Field(index=True)
     vendedorNome: str
     createdAt: str
     quartos: int  # Now represents "Número de salas" (living rooms); bedrooms are defined by tipologia
@@ -90,10 +104,15 @@ class Property(SQLModel, table=True):
     latitude: Optional[float] = None  # GPS latitude
     longitude: Optional[float] = None  # GPS longitude
     dadosEspecificos: Optional[str] = None  # JSON string with type-specific data
+    # bumped by a database trigger on every UPDATE (see migrations.py); drives ETags
+    version: int = 1
+    updatedAt: Optional[str] = None
 
 
 class PriceHistory(SQLModel, table=True):
     """Tracks price changes for properties."""
+    __table_args__ = (Index("ix_pricehistory_property", "property_id", "changed_at"),)
+
     id: str = Field(primary_key=True)
     property_id: str
     old_price: float
@@ -102,9 +121,17 @@ class PriceHistory(SQLModel, table=True):
 
 
 class VisitRequest(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_visitrequest_day", "preferred_date", "status"),
+        # listings: newest first + keyset cursor, overall / by status / per client
+        Index("ix_visitrequest_recent", "requested_at", "id"),
+        Index("ix_visitrequest_status_recent", "status", "requested_at", "id"),
+        Index("ix_visitrequest_user_recent", "user_id", "requested_at", "id"),
+    )
+
     id: str = Field(primary_key=True)
-    property_id: str
-    user_id: str
+    property_id: str = Field(index=True)
+    user_id: str = Field(index=True)
     requested_at: str  # ISO date/time
     preferred_date: Optional[str] = None
     preferred_time: Optional[str] = None
@@ -114,16 +141,64 @@ class VisitRequest(SQLModel, table=True):
     admin_id: Optional[str] = None
     admin_note: Optional[str] = None
     decided_at: Optional[str] = None
+    # the property's vendedorId, kept in step by triggers (migrations._visit_request_vendor);
+    # its index ix_visitrequest_vendor_recent is created there, not declared here
+    vendor_id: Optional[str] = None
+
+
+class VisitSlotCount(SQLModel, table=True):
+    """Active (pending/approved) visits per day, vendor and time slot.
+
+    Maintained by triggers on visitrequest (see migrations._visit_slot_counts).
+    """
+    __table_args__ = (
+        # covers visit_rules.load_days: range by day, grouped by (day, slot), without a sort
+        Index("ix_visitslotcount_day_slot", "day", "slot", "vendor_id", "visits"),
+    )
+    day: str = Field(primary_key=True)  # preferred_date
+    vendor_id: str = Field(primary_key=True)
+    slot: str = Field(primary_key=True)  # preferred_time, "" for a visit without one
+    visits: int = 0
+
+
+class VisitReservation(SQLModel, table=True):
+    """The day and time slot held by an active (pending/approved) visit with a date.
+
+    Maintained by triggers on visitrequest (see migrations._visit_reservations
+    and _untimed_visit_reservations). The unique constraints make double
+    booking impossible, however many clients book at once. The administration
+    attends every visit, so a slot is held platform-wide; that also covers one
+    visit per property, and per client, per slot. A visit without a time has
+    a NULL slot: it holds no slot, only its client's one visit per property
+    per day.
+    """
+    __table_args__ = (
+        UniqueConstraint("day", "slot", name="uq_visitreservation_slot"),
+        UniqueConstraint("user_id", "property_id", "day", name="uq_visitreservation_client_property_day"),
+    )
+    visit_id: str = Field(primary_key=True)
+    day: str
+    slot: Optional[str] = None
+    property_id: str
+    user_id: str
 
 
 class Favorite(SQLModel, table=True):
+    __table_args__ = (Index("ix_favorite_user_property", "user_id", "property_id"),)
+
     id: str = Field(primary_key=True)
     user_id: str
-    property_id: str
+    property_id: str = Field(index=True)
     created_at: str
 
 
 class Notification(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_notification_user_created", "user_id", "created_at"),
+        # ix_notification_user_seq (user_id, seq), for GET /my/notifications?since=,
+        # is created by migrations._late_column_indexes: seq is a later column
+    )
+
     id: str = Field(primary_key=True)
     user_id: str
     title: str
@@ -132,9 +207,23 @@ class Notification(SQLModel, table=True):
     read: bool = False
     created_at: str
     link: Optional[str] = None  # optional link to navigate to
+    seq: int = 0  # user's change sequence at the last insert / read change; set by a trigger
+
+
+class NotificationCounter(SQLModel, table=True):
+    """Per-user unread count and change sequence, maintained by triggers on notification."""
+    user_id: str = Field(primary_key=True)
+    unread: int = 0
+    seq: int = 0
 
 
 class ChatMessage(SQLModel, table=True):
+    __table_args__ = (
+        # one direction of a thread in (created_at, id) order, see main.chat_thread_query
+        Index("ix_chatmessage_thread", "sender_id", "receiver_id", "created_at", "id"),
+        Index("ix_chatmessage_receiver", "receiver_id", "read"),
+    )
+
     id: str = Field(primary_key=True)
     sender_id: str
     receiver_id: str
@@ -144,9 +233,24 @@ class ChatMessage(SQLModel, table=True):
     read: bool = False
 
 
+class ChatConversation(SQLModel, table=True):
+    """One side of a chat: ``user_id``'s view of the conversation with ``partner_id``.
+
+    Maintained by triggers on chatmessage (see migrations._chat_conversations).
+    """
+    __table_args__ = (Index("ix_chatconversation_user_recent", "user_id", "last_message_at"),)
+
+    user_id: str = Field(primary_key=True)
+    partner_id: str = Field(primary_key=True)
+    last_message: str
+    last_message_at: str
+    last_sender_id: str
+    unread_count: int = 0  # messages from partner_id that user_id has not read
+
+
 class Review(SQLModel, table=True):
     id: str = Field(primary_key=True)
-    property_id: str
+    property_id: str = Field(index=True)
     user_id: str
     user_name: str
     rating: int  # 1-5
@@ -157,16 +261,81 @@ class Review(SQLModel, table=True):
 class PasswordResetToken(SQLModel, table=True):
     id: str = Field(primary_key=True)
     user_id: str
-    token: str
+    token: str = Field(index=True)
     created_at: str
     used: bool = False
 
 
 class EmailVerification(SQLModel, table=True):
     id: str = Field(primary_key=True)
-    user_id: str
+    user_id: str = Field(index=True)
     code: str  # 6-digit code
     email: str
     created_at: str
     verified: bool = False
     attempts: int = 0  # track failed attempts
+
+
+class Job(SQLModel, table=True):
+    """A unit of background work in the durable queue (see jobs.py)."""
+    __table_args__ = (
+        # the claim query: next queued job by priority, then due time
+        Index("ix_job_ready", "status", "priority", "run_at"),
+        Index("ix_job_kind_status", "kind", "status"),
+    )
+
+    id: str = Field(primary_key=True)
+    kind: str  # handler name, e.g. email.verification | watermark
+    payload: Dict = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = "queued"  # queued | running | done | failed
+    priority: int = 5  # lower runs first
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: str  # not picked up before this time (retry backoff, delays)
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    locked_until: Optional[str] = None  # lease; a running job past it is re-queued
+    worker: Optional[str] = None
+    last_error: Optional[str] = None
+    progress: Optional[Dict] = Field(default=None, sa_column=Column(JSON))
+
+
+class EmailOutbox(SQLModel, table=True):
+    """An outgoing email and its delivery status (sent by the outbox sender in mailer.py)."""
+    __table_args__ = (Index("ix_emailoutbox_ready", "status", "next_attempt_at"),)
+
+    id: str = Field(primary_key=True)
+    kind: str  # verification | password_reset
+    to_email: str
+    subject: str
+    body: str
+    status: str = "pending"  # pending | sending | sent | failed | skipped
+    attempts: int = 0
+    max_attempts: int = 8
+    next_attempt_at: str
+    locked_until: Optional[str] = None  # lease while a sender holds it
+    created_at: str
+    sent_at: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class RealtimeEvent(SQLModel, table=True):
+    """A push event for one user (see realtime.py); kept briefly for replay on reconnect."""
+    __table_args__ = (
+        Index("ix_realtimeevent_user", "user_id", "id"),
+        # ids are the stream position: never reuse one, even after the table is emptied
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str
+    kind: str  # notification | chat
+    data: Dict = Field(default_factory=dict, sa_column=Column(JSON))
+    created_at: str
+
+
+class RateLimit(SQLModel, table=True):
+    """GCRA state of one rate-limit key (see ratelimit.py), shared by every API process."""
+    key: str = Field(primary_key=True)  # e.g. "login:ip:203.0.113.7"
+    tat: float  # theoretical arrival time, Unix seconds; the key is idle once it has passed
@@ -0,0 +1,97 @@
+"""Creating notifications, with a real-time push event for each (see realtime.py).
+
+``notify`` writes a single notification. ``fan_out`` writes one notification
+per member of an audience with a single ``INSERT ... SELECT``, and their push
+events with a second one: the audience query runs inside the database, so no
+Python object is built per recipient and the cost of the triggering request
+does not grow with the audience. Large audiences (favoriters of a listing)
+are additionally fanned out from a background job (see tasks.py).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+
+from models import Favorite, Notification, User
+from realtime import publish, publish_select
+
+
+def notification_data(n: Notification) -> Dict[str, Any]:
+    """The ``notification`` event payload (same fields as GET /my/notifications)."""
+    return {
+        "id": n.id, "user_id": n.user_id, "title": n.title, "message": n.message,
+        "type": n.type, "read": n.read, "created_at": n.created_at, "link": n.link,
+    }
+
+
+def notify(
+    session: Session,
+    user_id: str,
+    title: str,
+    message: str,
+    type: str = "info",
+    link: Optional[str] = None,
+) -> Notification:
+    """Add one notification (and its push event) to the caller's transaction."""
+    notif = Notification(
+        id=uuid4().hex, user_id=user_id, title=title, message=message, type=type,
+        read=False, created_at=datetime.now(timezone.utc).isoformat(), link=link,
+    )
+    session.add(notif)
+    publish(session, user_id, "notification", notification_data(notif))
+    return notif
+
+
+def fan_out(
+    session: Session,
+    audience: Select,
+    title: str,
+    message: str,
+    type: str = "info",
+    link: Optional[str] = None,
+) -> int:
+    """Notify every distinct user id selected by ``audience`` (a one-column select).
+
+    Runs in the caller's transaction. Returns the number of notifications written.
+    """
+    created_at = datetime.now(timezone.utc).isoformat()
+    # the fan-out's ids share a random prefix, so its rows are one primary-key range
+    batch = uuid4().hex[:16]
+    recipients = audience.distinct().subquery()
+    rows = select(
+        literal(batch) + func.lower(func.hex(func.randomblob(8))),  # 32 hex chars, like uuid4().hex
+        recipients.c[0],
+        literal(title),
+        literal(message),
+        literal(type),
+        literal(False),
+        literal(created_at),
+        literal(link),
+    )
+    columns = ["id", "user_id", "title", "message", "type", "read", "created_at", "link"]
+    written = session.execute(insert(Notification).from_select(columns, rows)).rowcount
+    # the push events, built from the rows just written (see notification_data)
+    publish_select(session, select(
+        Notification.user_id,
+        literal("notification"),
+        func.json_object(
+            "id", Notification.id, "user_id", Notification.user_id, "title", Notification.title,
+            "message", Notification.message, "type", Notification.type, "read", func.json("false"),
+            "created_at", Notification.created_at, "link", Notification.link,
+        ),
+        literal(created_at),
+    ).join(recipients, recipients.c[0] == Notification.user_id).where(
+        Notification.id > batch, Notification.id < batch + "g",  # "g" sorts after every hex digit
+    ))
+    return written
+
+
+def favoriters(property_id: str) -> Select:
+    return select(Favorite.user_id).where(Favorite.property_id == property_id)
+
+
+def admins() -> Select:
+    return select(User.id).where(User.role == "admin")
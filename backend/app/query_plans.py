@@ -0,0 +1,134 @@
+"""EXPLAIN QUERY PLAN check for the hot endpoint queries.
+
+Builds a throwaway in-memory database with the migrations (so it checks the
+indexes a fresh install gets) and fails if any hot query falls back to a full table
+scan or sorts in a temp B-tree. tests/test_query_plans.py runs the same
+check; from backend/app:
+
+    python query_plans.py          # exit status 1 if a query scans or sorts
+"""
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlmodel import create_engine, select
+
+from models import (
+    Property, User, VisitRequest, Favorite, Notification,
+    ChatMessage, ChatConversation, Review, PriceHistory,
+)
+import search
+from migrations import migrate
+from main import (
+    PropertyFilters, VisitRequestFilters, apply_property_filters, build_property_page, chat_thread_query,
+    encode_cursor, visit_request_query,
+)
+from visit_rules import slot_totals
+
+UID = "u1"
+PID = "p1"
+DAY = "2030-01-01"
+ACTIVE = ["pending", "approved"]
+
+
+def hot_queries() -> List[Tuple[str, object]]:
+    """(label, statement) for the queries behind the busiest endpoints."""
+    def listing(sort=None, after=None, **filters):
+        q, _ = build_property_page(PropertyFilters(**filters), sort, after=after, limit=20)
+        return q
+
+    return [
+        ("GET /properties", listing()),
+        ("GET /properties?tipo&cidade", listing(tipo="venda", cidade="Maputo")),
+        ("GET /properties?preco_max", listing(preco_max=1_000_000)),
+        ("GET /properties?area_min", listing(area_min=80)),
+        ("GET /properties?sort=preco_asc&preco_max", listing("preco_asc", preco_max=1_000_000)),
+        ("GET /properties?sort=preco_asc", listing("preco_asc")),
+        ("GET /properties?sort=preco_desc&tipo", listing("preco_desc", tipo="venda")),
+        ("GET /properties?sort=preco_asc&after", listing(
+            "preco_asc", encode_cursor(["preco_asc", 1_000_000, PID]), tipo="venda")),
+        ("GET /properties?sort=area_desc", listing("area_desc")),
+        ("GET /properties?sort=area_desc&tipo&after", listing(
+            "area_desc", encode_cursor(["area_desc", 120, PID]), tipo="venda")),
+        ("GET /properties?search", search.apply_search_filter(
+            apply_property_filters(select(Property), PropertyFilters()), "casa")),
+        ("GET /properties/count?tipo", apply_property_filters(
+            select(func.count(Property.id)), PropertyFilters(tipo="venda"))),
+        ("visit availability (slot counters)", slot_totals(UID, DAY, "2030-01-31")),
+        ("visit availability (client)", select(VisitRequest).where(
+            VisitRequest.user_id == UID, VisitRequest.preferred_date >= DAY,
+            VisitRequest.preferred_date <= "2030-01-31", VisitRequest.status.in_(ACTIVE))),
+        ("visit conflict (property)", select(VisitRequest).where(
+            VisitRequest.property_id == PID, VisitRequest.preferred_date == DAY)),
+        ("GET /visit-requests", visit_request_query(VisitRequestFilters(), limit=50)),
+        ("GET /visit-requests?status", visit_request_query(VisitRequestFilters(status="pending"), limit=50)),
+        ("GET /my/visit-requests", visit_request_query(
+            VisitRequestFilters(), VisitRequest.user_id == UID, limit=50)),
+        ("GET /vendor/visit-requests", visit_request_query(
+            VisitRequestFilters(), VisitRequest.vendor_id == UID, limit=50)),
+        ("GET /my/notifications", select(Notification).where(
+            Notification.user_id == UID).order_by(Notification.created_at.desc())),
+        ("GET /my/notifications?since", select(Notification).where(
+            Notification.user_id == UID, Notification.seq > 10).order_by(Notification.seq)),
+        ("GET /chat/{partner_id}", chat_thread_query(UID, PID)),
+        ("GET /chat/{partner_id}?limit", chat_thread_query(UID, PID, newest_first=True).limit(51)),
+        ("GET /chat/{partner_id}?before", chat_thread_query(
+            UID, PID, tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(DAY, "m1"), newest_first=True).limit(51)),
+        ("GET /chat/conversations", select(ChatConversation, User.nome).join(
+            User, User.id == ChatConversation.partner_id).where(
+            ChatConversation.user_id == UID).order_by(ChatConversation.last_message_at.desc())),
+        ("GET /my/favorites", select(Favorite).where(Favorite.user_id == UID)),
+        ("favorite exists", select(Favorite).where(
+            Favorite.user_id == UID, Favorite.property_id == PID)),
+        ("price alert fan-out", select(Favorite).where(Favorite.property_id == PID)),
+        ("GET /properties/{id}/reviews", select(Review).where(Review.property_id == PID)),
+        ("GET /properties/{id}/price-history", select(PriceHistory).where(
+            PriceHistory.property_id == PID).order_by(PriceHistory.changed_at.desc())),
+        ("login by email", select(User).where(User.email == "a@b.c")),
+        ("login by phone", select(User).where(User.phone == "+258840000000")),
+    ]
+
+
+def plan_problems(plan_rows) -> List[str]:
+    """Plan lines that scan a whole table (not via an index or the FTS table) or sort in a temp B-tree."""
+    bad = []
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and "USING" not in detail and "VIRTUAL TABLE" not in detail:
+            bad.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            bad.append(detail)
+    return bad
+
+
+def fresh_database():
+    """In-memory database at the head migration, with the search index."""
+    engine = create_engine("sqlite://")
+    migrate(engine)
+    search.init_search(engine)
+    return engine
+
+
+def check(engine) -> Dict[str, List[str]]:
+    """{label: problem plan lines} for every hot query (empty list when the plan is fine)."""
+    problems = {}
+    with engine.connect() as conn:
+        for label, stmt in hot_queries():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            problems[label] = plan_problems(conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+    return problems
+
+
+def main() -> int:
+    problems = check(fresh_database())
+    for label, bad in problems.items():
+        print(f"{label:40} {'; '.join(bad) if bad else 'ok'}")
+    failures = [label for label, bad in problems.items() if bad]
+    if failures:
+        print(f"\n{len(failures)} queries scan a table or sort in a temp B-tree")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Request rate limiting: GCRA (a token bucket) with a per-process or shared backend.
+
+Each key stores a single number, its theoretical arrival time (TAT). A limit
+of ``max_requests`` per ``window`` seconds admits a request while
+``max(tat, now) + window / max_requests - now <= window``, i.e. a burst of
+``max_requests`` that then refills one request every ``window /
+max_requests`` seconds. Checking a key is O(1) whatever the number of keys.
+
+Backends (RATE_LIMIT_BACKEND):
+
+- ``database`` (default): the ``ratelimit`` table in the application
+  database, updated with one atomic upsert, so limits hold across every API
+  worker process. Expired rows are deleted by the cleanup job (tasks.py).
+- ``memory``: a per-process dict (LRU-bounded by RATE_LIMIT_MAX_KEYS). With
+  N workers each limit is effectively multiplied by N.
+
+Routes apply limits per client IP, as dependencies:
+
+    @app.post("/auth/token", dependencies=[Depends(rate_limit("login", 10, 60))])
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from database import engine
+
+logger = logging.getLogger("imobiliaria")
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "database")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # memory backend only
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+
+# Inserts a new key or advances its TAT; returns no row when the request is refused.
+_TAKE = text("""
+    INSERT INTO ratelimit (key, tat) VALUES (:key, :now + :interval)
+    ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval
+    WHERE max(tat, :now) + :interval - :now <= :window
+    RETURNING tat
+""")
+
+
+class MemoryBackend:
+    """Per-process GCRA state."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()  # sync routes run on the thread pool
+        self._max_keys = max_keys
+
+    def take(self, key: str, now: float, interval: float, window: float) -> Optional[float]:
+        """Admit a request for ``key`` (returns None) or return the seconds until one would be."""
+        with self._lock:
+            tat = max(self._tats.get(key, now), now) + interval
+            if tat - now > window:
+                return tat - window - now
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            if len(self._tats) > self._max_keys:
+                self._tats.popitem(last=False)  # least recently limited key
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+
+class DatabaseBackend:
+    """GCRA state in the ``ratelimit`` table, shared by every process."""
+
+    def __init__(self, db_engine: Engine = engine):
+        self._engine = db_engine
+
+    def take(self, key: str, now: float, interval: float, window: float) -> Optional[float]:
+        with self._engine.begin() as conn:
+            if conn.execute(_TAKE, {"key": key, "now": now, "interval": interval, "window": window}).first():
+                return None
+            tat = conn.execute(text("SELECT tat FROM ratelimit WHERE key = :key"), {"key": key}).scalar() or now
+        return max(tat, now) + interval - window - now
+
+    def clear(self) -> None:
+        with self._engine.begin() as conn:
+            conn.execute(text("DELETE FROM ratelimit"))
+
+
+def build_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name != "database":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND={name!r}; using the database backend")
+    return DatabaseBackend()
+
+
+backend = build_backend()
+
+
+def check_rate_limit(key: str, max_requests: int, window: float) -> None:
+    """Raise 429 (with Retry-After) if ``key`` exceeded ``max_requests`` per ``window`` seconds."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    retry_after = backend.take(key, time.time(), window / max_requests, window)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiadas tentativas. Tente novamente mais tarde.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str, max_requests: int, window: float) -> Callable:
+    """Dependency limiting a route to ``max_requests`` per ``window`` seconds per client IP."""
+    def by_ip(request: Request) -> None:
+        check_rate_limit(f"{scope}:ip:{client_ip(request)}", max_requests, window)
+    return by_ip
@@ -0,0 +1,197 @@
+"""Real-time push of notifications and chat messages over Server-Sent Events.
+
+Writers call ``publish`` / ``publish_select`` in the transaction that creates
+the notification or message. The event is a row in ``realtimeevent``, which
+is the broker shared by every API worker and job process (a stand-in for
+Redis pub/sub on a single host): an event exists exactly when its
+transaction committed, whichever process wrote it.
+
+Each API process runs one ``Hub``. Its tailer task reads new events once per
+REALTIME_POLL_INTERVAL for the whole process (immediately after a commit in
+the same process) and fans them out to the in-process queues of the users
+connected to that process. Idle clients cost no queries at all.
+
+Event ids are the stream position: a client reconnecting with
+``Last-Event-ID`` is replayed what it missed, for REALTIME_RETENTION_MINUTES.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.sql import Select
+from sqlmodel import Session, select
+
+from database import async_session
+from models import RealtimeEvent
+
+logger = logging.getLogger("imobiliaria")
+
+REALTIME_POLL_INTERVAL = float(os.getenv("REALTIME_POLL_INTERVAL", "0.5"))
+REALTIME_HEARTBEAT = float(os.getenv("REALTIME_HEARTBEAT", "15"))  # keeps proxies from closing idle streams
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))  # per connection; a slower client is dropped
+REALTIME_RETENTION_MINUTES = int(os.getenv("REALTIME_RETENTION_MINUTES", "60"))
+REALTIME_BATCH = 500
+
+
+def _after_commit(session: Session) -> None:
+    session.info.pop("realtime_nudge", None)
+    hub.nudge()
+
+
+def _nudge_on_commit(session: Session) -> None:
+    if not session.info.get("realtime_nudge"):
+        session.info["realtime_nudge"] = True
+        event.listen(session, "after_commit", _after_commit, once=True)
+
+
+def publish(session: Session, user_id: str, kind: str, data: Dict[str, Any]) -> None:
+    """Queue an event for ``user_id``; it is delivered once the caller commits."""
+    session.add(RealtimeEvent(user_id=user_id, kind=kind, data=data, created_at=datetime.now(timezone.utc).isoformat()))
+    _nudge_on_commit(session)
+
+
+def publish_select(session: Session, rows: Select) -> int:
+    """``publish`` for every ``(user_id, kind, data, created_at)`` row of ``rows``, as one ``INSERT ... SELECT``.
+
+    ``data`` is built in SQL (``json_object``), so no Python object is made
+    per event. Returns the number of events written.
+    """
+    written = session.execute(
+        insert(RealtimeEvent).from_select(["user_id", "kind", "data", "created_at"], rows)
+    ).rowcount
+    if written:
+        _nudge_on_commit(session)
+    return written
+
+
+def format_sse(row: RealtimeEvent) -> str:
+    return f"id: {row.id}\nevent: {row.kind}\ndata: {json.dumps(row.data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[RealtimeEvent]" = asyncio.Queue(maxsize=REALTIME_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class Hub:
+    """In-process pub/sub: one database tailer feeding every local subscriber."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._last_id = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        async with async_session() as session:
+            self._last_id = (await session.exec(select(func.max(RealtimeEvent.id)))).one() or 0
+        self._task = asyncio.create_task(self._tail())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._loop = None
+
+    def nudge(self) -> None:
+        """Wake the tailer now (callable from any thread of this process)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def connections(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> Subscription:
+        sub = Subscription(user_id)
+        self._subscribers[user_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.user_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.user_id]
+
+    async def _tail(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), REALTIME_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self._dispatch_new()
+            except Exception as e:  # e.g. the database is locked; try again next tick
+                logger.warning(f"Realtime tailer: {e}")
+
+    async def _dispatch_new(self) -> None:
+        while True:
+            async with async_session() as session:
+                rows = (await session.exec(
+                    select(RealtimeEvent).where(RealtimeEvent.id > self._last_id)
+                    .order_by(RealtimeEvent.id).limit(REALTIME_BATCH)
+                )).all()
+            for row in rows:
+                self._last_id = row.id
+                for sub in list(self._subscribers.get(row.user_id, ())):
+                    try:
+                        sub.queue.put_nowait(row)
+                    except asyncio.QueueFull:
+                        # the client reconnects and replays from Last-Event-ID
+                        sub.overflowed = True
+                        self.unsubscribe(sub)
+            if len(rows) < REALTIME_BATCH:
+                return
+
+    async def stream(self, user_id: str, last_event_id: Optional[int], expires_at: Optional[datetime]) -> AsyncIterator[str]:
+        """SSE body for one connection: replay after ``last_event_id``, then live events.
+
+        Ends when the access token expires (the client reconnects with a fresh
+        one) or the subscriber falls too far behind.
+        """
+        sub = self.subscribe(user_id)  # before the replay query, so nothing falls in between
+        try:
+            yield "retry: 3000\n\n"
+            sent = 0
+            if last_event_id is not None:
+                async with async_session() as session:
+                    missed = (await session.exec(
+                        select(RealtimeEvent).where(RealtimeEvent.user_id == user_id, RealtimeEvent.id > last_event_id)
+                        .order_by(RealtimeEvent.id).limit(REALTIME_BATCH)
+                    )).all()
+                for row in missed:
+                    sent = row.id
+                    yield format_sse(row)
+            while not sub.overflowed:
+                timeout = REALTIME_HEARTBEAT
+                if expires_at is not None:
+                    timeout = min(timeout, (expires_at - datetime.now(timezone.utc)).total_seconds())
+                    if timeout <= 0:
+                        return
+                try:
+                    row = await asyncio.wait_for(sub.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if row.id > sent:  # skip what the replay already sent
+                    yield format_sse(row)
+        finally:
+            self.unsubscribe(sub)
+
+
+hub = Hub()
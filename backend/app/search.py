@@ -0,0 +1,180 @@
+"""Full-text search over property listings (SQLite FTS5).
+
+The ``property_fts`` virtual table mirrors the searchable text columns of
+``property`` and is kept in sync by triggers, so every write path (API, seed,
+bulk scripts) updates it without extra code. Soft-deleted rows are removed from
+the index and re-added on restore.
+
+``property`` has a TEXT primary key, so its implicit rowid may change on
+VACUUM. The index is therefore keyed by ``property_search_key``, whose
+INTEGER PRIMARY KEY (the FTS rowid) is a stable alias for ``property.id``.
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import false, func, literal_column, select, text
+from sqlalchemy.engine import Engine
+
+from models import Property
+
+logger = logging.getLogger("imobiliaria")
+
+FTS_TABLE = "property_fts"
+# bm25 column weights: titulo, descricao, localizacao, cidade
+FTS_WEIGHTS = (10.0, 1.0, 5.0, 5.0)
+
+# False when the SQLite build has no FTS5; search then falls back to LIKE.
+fts_enabled = False
+
+_SEARCH_COLUMNS = "titulo, descricao, localizacao, cidade"
+
+KEY_TABLE = "property_search_key"
+
+_KEY_OF = f"(SELECT docid FROM {KEY_TABLE} WHERE property_id = {{row}}.id)"
+
+_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {KEY_TABLE} (
+        docid INTEGER PRIMARY KEY,
+        property_id TEXT NOT NULL UNIQUE
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_SEARCH_COLUMNS},
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS property_fts_ai AFTER INSERT ON property BEGIN
+        INSERT OR IGNORE INTO {KEY_TABLE}(property_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, {_SEARCH_COLUMNS})
+        SELECT {_KEY_OF.format(row="new")}, new.titulo, new.descricao, new.localizacao, new.cidade
+        WHERE new.deleted = 0;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS property_fts_ad AFTER DELETE ON property BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_KEY_OF.format(row="old")};
+        DELETE FROM {KEY_TABLE} WHERE property_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS property_fts_au AFTER UPDATE OF
+        titulo, descricao, localizacao, cidade, deleted ON property BEGIN
+        INSERT OR IGNORE INTO {KEY_TABLE}(property_id) VALUES (new.id);
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_KEY_OF.format(row="old")};
+        INSERT INTO {FTS_TABLE}(rowid, {_SEARCH_COLUMNS})
+        SELECT {_KEY_OF.format(row="new")}, new.titulo, new.descricao, new.localizacao, new.cidade
+        WHERE new.deleted = 0;
+    END
+    """,
+]
+
+
+def rebuild_search_index(conn) -> None:
+    """Repopulate the FTS table from the live (non-deleted) properties."""
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(f"DELETE FROM {KEY_TABLE} WHERE property_id NOT IN (SELECT id FROM property)"))
+    conn.execute(text(f"INSERT OR IGNORE INTO {KEY_TABLE}(property_id) SELECT id FROM property"))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, {_SEARCH_COLUMNS}) "
+        f"SELECT k.docid, p.titulo, p.descricao, p.localizacao, p.cidade "
+        f"FROM property p JOIN {KEY_TABLE} k ON k.property_id = p.id WHERE p.deleted = 0"
+    ))
+
+
+def drop_search_index(conn) -> None:
+    """Drop the FTS table, its key table and the sync triggers."""
+    for trigger in ("property_fts_ai", "property_fts_ad", "property_fts_au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {KEY_TABLE}"))
+
+
+def create_search_index(conn) -> None:
+    """Create the FTS table + sync triggers and backfill it (migration step).
+
+    Raises sqlite3.OperationalError if the SQLite build has no FTS5.
+    """
+    for stmt in _DDL:
+        conn.execute(text(stmt))
+    rebuild_search_index(conn)
+
+
+def init_search(engine: Engine) -> None:
+    """Enable FTS-backed search if the index exists (one sqlite_master lookup)."""
+    global fts_enabled
+    if engine.dialect.name != "sqlite":
+        fts_enabled = False
+        return
+    with engine.connect() as conn:
+        fts_enabled = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+            {"n": FTS_TABLE},
+        ).first() is not None
+    if not fts_enabled:
+        logger.warning("Search index missing (no FTS5?) — falling back to LIKE search")
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression with prefix matching.
+
+    Every word must match (implicit AND); each word also matches as a prefix so
+    results update as the user types. Returns None if there is nothing to search.
+    """
+    tokens = re.findall(r"\w+", search, re.UNICODE)
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def search_ranking(match: str):
+    """Subquery of (property_id, rank) for properties matching ``match``, best first."""
+    fts = literal_column(FTS_TABLE)
+    return (
+        select(
+            literal_column(f"{KEY_TABLE}.property_id").label("property_id"),
+            func.bm25(fts, *FTS_WEIGHTS).label("rank"),
+        )
+        .select_from(text(f"{FTS_TABLE} JOIN {KEY_TABLE} ON {KEY_TABLE}.docid = {FTS_TABLE}.rowid"))
+        .where(fts.op("MATCH")(match))
+        .subquery("search_rank")
+    )
+
+
+def apply_search_filter(q, search: str):
+    """Restrict a Property query to rows matching ``search``.
+
+    A blank ``search`` leaves the query as it is; one with no searchable
+    words (only punctuation) matches nothing. Falls back to the old LIKE scan
+    when FTS5 is not available.
+    """
+    if not search.strip():
+        return q
+    if not fts_enabled:
+        return q.where(
+            Property.titulo.ilike(f"%{search}%")
+            | Property.descricao.ilike(f"%{search}%")
+            | Property.localizacao.ilike(f"%{search}%")
+            | Property.cidade.ilike(f"%{search}%")
+        )
+    match = build_match_query(search)
+    if match is None:
+        return q.where(false())
+    ranking = search_ranking(match)
+    return q.where(Property.id.in_(select(ranking.c.property_id)))
+
+
+def apply_search_ranking(q, search: str):
+    """Like ``apply_search_filter`` but joins the bm25 score.
+
+    Returns ``(query, rank_column)``; lower rank is more relevant. The rank
+    column is None when there is no FTS5 index to rank with.
+    """
+    match = build_match_query(search) if fts_enabled else None
+    if match is None:
+        return apply_search_filter(q, search), None
+    ranking = search_ranking(match)
+    return q.join(ranking, ranking.c.property_id == Property.id), ranking.c.rank
@@ -4,12 +4,13 @@ from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 import secrets
 from dotenv import load_dotenv
 from passlib.context import CryptContext
 
-from database import get_session
+from database import async_session, get_async_session, get_session
 from models import User
 
 # load environment variables from backend/.env (if present)
@@ -26,6 +27,8 @@ if not os.getenv('SECRET_KEY'):
     )
 ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 60 * 24 * 7))
+STREAM_TICKET_SECONDS = int(os.getenv('STREAM_TICKET_SECONDS', 60))
+STREAM_SCOPE = "events"  # the only thing a stream ticket can open
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -52,22 +55,45 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def create_stream_ticket(user_id: str, until: Optional[datetime]) -> str:
+    """A short-lived token that only opens the event stream (GET /events?ticket=...).
+
+    EventSource cannot send an Authorization header, and a URL ends up in
+    access logs, so the access token itself never goes in one. ``until`` is
+    the access token's expiry: the stream the ticket opens ends then.
+    """
+    claims = {
+        "sub": user_id, "scope": STREAM_SCOPE,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=STREAM_TICKET_SECONDS),
+    }
+    if until:
+        claims["until"] = int(until.timestamp())
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _user_id_from_token(token: str, scope: Optional[str] = None) -> str:
+    """The user id of a valid token; access tokens have no scope, stream tickets ``STREAM_SCOPE``."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        if user_id is None or payload.get("scope") != scope:
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    user = session.get(User, user_id)
+        raise _credentials_exception()
+    return user_id
+
+
+def _check_active(user: Optional[User]) -> User:
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -76,6 +102,37 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
     return user
 
 
+async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
+    return _check_active(session.get(User, _user_id_from_token(token)))
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session),
+) -> User:
+    """get_current_user for async routes: the lookup does not block the event loop."""
+    return _check_active(await session.get(User, _user_id_from_token(token)))
+
+
+async def user_from_token(token: Optional[str], scope: Optional[str] = None) -> User:
+    """Resolve a bearer token (or, with ``scope=STREAM_SCOPE``, a stream ticket) outside the dependency system.
+
+    For long-lived responses (event streams): a dependency session would stay
+    checked out of the pool for as long as the client is connected.
+    """
+    if not token:
+        raise _credentials_exception()
+    user_id = _user_id_from_token(token, scope)
+    async with async_session() as session:
+        return _check_active(await session.get(User, user_id))
+
+
+def token_expiry(token: str) -> Optional[datetime]:
+    """Expiry of an already validated token; for a stream ticket, that of the access token it came from."""
+    claims = jwt.get_unverified_claims(token)
+    exp = claims.get("until") if claims.get("scope") == STREAM_SCOPE else claims.get("exp")
+    return datetime.fromtimestamp(exp, timezone.utc) if exp else None
+
+
 def require_roles(allowed_roles: List[str]):
     def role_checker(current_user: User = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
@@ -0,0 +1,121 @@
+"""Background job handlers (see jobs.py). Importing this module registers them."""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from cache import invalidate_property
+from database import engine
+from images import upload_path, watermark_many, watermarking_available
+from jobs import JOB_CLEANUP_INTERVAL, JOB_RETENTION_DAYS, PRIORITY_LOW, enqueue, job_handler, set_progress
+from models import EmailOutbox, EmailVerification, Job, Property, RateLimit, RealtimeEvent
+from notifications import fan_out, favoriters
+from realtime import REALTIME_RETENTION_MINUTES
+
+logger = logging.getLogger("imobiliaria")
+
+
+@job_handler("notify.price_change")
+def price_change_notifications(job: Job) -> None:
+    """Notify every user who favorited the property of a price change."""
+    p = job.payload
+    direction = "baixou" if p["new_price"] < p["old_price"] else "subiu"
+    with Session(engine) as session:
+        sent = fan_out(
+            session,
+            favoriters(p["property_id"]),
+            title=f"Preço {direction}!",
+            message=f"O imóvel \"{p['titulo']}\" {direction} de {p['old_price']:,.0f} MT para {p['new_price']:,.0f} MT.",
+            type="price_alert",
+            link=f"?property={p['property_id']}",
+        )
+        session.commit()
+    logger.info(f"Price alert for {p['property_id']} sent to {sent} user(s)")
+
+
+def watermark_progress(prop: Property) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Images of ``prop`` still to watermark (``{url: path}``) and the initial progress."""
+    already = set(prop.marcaAgua or [])
+    paths = {
+        url: path for url in dict.fromkeys([prop.imagem, *(prop.galeria or [])])
+        if url not in already and (path := upload_path(url))
+    }
+    return paths, {"total": len(paths), "done": 0, "failed": 0, "skipped": len(already), "errors": []}
+
+
+@job_handler("watermark")
+def watermark_property(job: Job) -> None:
+    """Watermark a property's images over the image pool and record the results.
+
+    Images already watermarked (``marcaAgua``) are skipped, so a retried job
+    only redoes what is missing. A single bad image is reported in the
+    progress, not retried.
+    """
+    if not watermarking_available():
+        raise RuntimeError("Pillow not installed")
+    property_id = job.payload["property_id"]
+    with Session(engine) as session:
+        prop = session.get(Property, property_id)
+    if not prop or prop.deleted:
+        return
+    paths, progress = watermark_progress(prop)
+    set_progress(job.id, progress)
+    marked: Dict[str, Optional[Dict[str, str]]] = {}
+
+    def on_result(url: str, variants: Optional[Dict[str, str]], error: Optional[str]):
+        if error:
+            progress["failed"] += 1
+            progress["errors"].append(f"{url}: {error}")
+            logger.warning(f"Watermark failed for {url}: {error}")
+        else:
+            progress["done"] += 1
+            marked[url] = variants
+        set_progress(job.id, progress)
+
+    watermark_many(paths, on_result)
+    if marked:
+        with Session(engine) as session:
+            prop = session.get(Property, property_id)
+            if prop:
+                prop.marcaAgua = sorted(set(prop.marcaAgua or []) | set(marked))
+                prop.variantes = {**(prop.variantes or {}), **{u: v for u, v in marked.items() if v}}
+                session.add(prop)
+                session.commit()
+        invalidate_property(property_id)
+
+
+@job_handler("cleanup.expired")
+def cleanup_expired(job: Job) -> None:
+    """Delete expired verification codes, old jobs, emails, push events and idle rate-limit keys, then reschedule."""
+    now = datetime.now(timezone.utc)
+    retention = (now - timedelta(days=JOB_RETENTION_DAYS)).isoformat(timespec="microseconds")
+    with Session(engine) as session:
+        codes = session.exec(
+            delete(EmailVerification).where(
+                EmailVerification.verified == False,
+                EmailVerification.created_at < (now - timedelta(minutes=15)).isoformat(),
+            )
+        ).rowcount
+        jobs = session.exec(
+            delete(Job).where(
+                Job.status.in_(("done", "failed")),
+                Job.finished_at < retention,
+            )
+        ).rowcount
+        emails = session.exec(
+            delete(EmailOutbox).where(
+                EmailOutbox.status.in_(("sent", "failed", "skipped")),
+                EmailOutbox.created_at < retention,
+            )
+        ).rowcount
+        session.exec(delete(RealtimeEvent).where(
+            RealtimeEvent.created_at < (now - timedelta(minutes=REALTIME_RETENTION_MINUTES)).isoformat()
+        ))
+        session.exec(delete(RateLimit).where(RateLimit.tat < time.time()))
+        enqueue(session, "cleanup.expired", priority=PRIORITY_LOW, delay=JOB_CLEANUP_INTERVAL)
+        session.commit()
+    if codes or jobs or emails:
+        logger.info(f"Cleaned up {codes} expired verification record(s), {jobs} finished job(s) and {emails} email(s)")
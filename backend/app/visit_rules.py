@@ -0,0 +1,184 @@
+"""Visit scheduling rules, shared by the availability calendar and request_visit.
+
+The calendar asks "may this client book this property on this day at this
+time?" through ``load_days`` + ``violation``. Booking does not ask first: its
+insert reserves the slot (VisitReservation's unique constraints) and
+``over_capacity`` then checks the day limits inside the same write
+transaction, so concurrent bookings cannot both succeed. A refused booking
+is explained with the same rules, so the calendar and the 409 agree.
+
+Platform-wide and per-vendor load comes from ``visitslotcount``, a counter
+of active visits per day, vendor and time slot that triggers on
+visitrequest keep current (see migrations._visit_slot_counts). The client's
+and the property's own visits are few and read directly. Any date range
+costs three indexed queries.
+"""
+from datetime import date, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy import case, func, true
+from sqlmodel import Session, select
+
+from models import Property, VisitRequest, VisitSlotCount
+
+ACTIVE_STATUSES = ("pending", "approved")
+VENDOR_DAY_LIMIT = 3
+PLATFORM_DAY_LIMIT = 10  # what the administration can attend in a day
+
+# Business hours time slots (08:00 – 17:00, every 30 min)
+VISIT_TIME_SLOTS = [
+    "08:00", "08:30", "09:00", "09:30", "10:00", "10:30",
+    "11:00", "11:30", "12:00", "12:30", "13:00", "13:30",
+    "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00",
+]
+
+# Short reasons shown on blocked calendar slots
+SLOT_REASONS = {
+    "client_property_day": "Já tem um agendamento para este imóvel neste dia",
+    "client_time": "Já tem um agendamento neste horário",
+    "property_time": "Já existe visita neste imóvel neste horário",
+    "vendor_day_limit": f"O vendedor atingiu o limite de {VENDOR_DAY_LIMIT} visitas/dia",
+    "platform_day_limit": f"Limite de {PLATFORM_DAY_LIMIT} agendamentos/dia atingido",
+    "platform_time": "Horário indisponível (administração ocupada)",
+}
+
+# request_visit's 409 details
+BOOKING_ERRORS = {
+    "client_property_day": "Só pode fazer 1 agendamento por imóvel por dia. Já tem uma visita para este imóvel em {day}.",
+    "client_time": "Já tem um agendamento para {day} às {time}. Escolha outro horário.",
+    "property_time": "Já existe uma visita agendada para este imóvel em {day} às {time}. Escolha outro horário.",
+    "vendor_day_limit": f"O vendedor já atingiu o limite de {VENDOR_DAY_LIMIT} visitas para o dia {{day}}. Escolha outra data.",
+    "platform_day_limit": f"A plataforma já atingiu o limite de {PLATFORM_DAY_LIMIT} agendamentos para o dia {{day}}. Escolha outra data.",
+    "platform_time": "A administração já tem um agendamento às {time} no dia {day}. Escolha outro horário.",
+}
+
+
+class DayLoad:
+    """Active visits on one day, as seen by one client booking one property."""
+
+    def __init__(self):
+        self.platform_count = 0
+        self.platform_times: Set[str] = set()
+        self.vendor_count = 0
+        self.property_times: Set[str] = set()
+        self.client_times: Set[str] = set()
+        self.client_booked_property = False
+
+
+def slot_totals(vendor_id: str, start: str, end: str):
+    """(day, slot, active visits, of which ``vendor_id``'s) for the days ``start``..``end``."""
+    return (
+        select(
+            VisitSlotCount.day,
+            VisitSlotCount.slot,
+            func.sum(VisitSlotCount.visits),
+            func.sum(case((VisitSlotCount.vendor_id == vendor_id, VisitSlotCount.visits), else_=0)),
+        )
+        .where(VisitSlotCount.day >= start, VisitSlotCount.day <= end)
+        .group_by(VisitSlotCount.day, VisitSlotCount.slot)
+    )
+
+
+def load_days(
+    session: Session, prop: Property, user_id: str, first: date, last: date, moving: Optional[str] = None,
+) -> Dict[str, DayLoad]:
+    """A DayLoad for every day from ``first`` to ``last`` (inclusive), keyed by ISO date.
+
+    ``moving`` is a visit being rescheduled: it is left out of the client's
+    and the property's visits, so it does not clash with itself.
+    """
+    days: Dict[str, DayLoad] = {}
+    day = first
+    while day <= last:
+        days[day.isoformat()] = DayLoad()
+        day += timedelta(days=1)
+    start, end = first.isoformat(), last.isoformat()
+
+    for day, slot, total, vendor in session.exec(slot_totals(prop.vendedorId, start, end)).all():
+        load = days.get(day)
+        if load is None:  # not a plain YYYY-MM-DD
+            continue
+        load.platform_count += total
+        load.vendor_count += vendor
+        if slot and total > 0:
+            load.platform_times.add(slot)
+
+    in_range = (
+        VisitRequest.preferred_date >= start,
+        VisitRequest.preferred_date <= end,
+        VisitRequest.status.in_(ACTIVE_STATUSES),
+        VisitRequest.id != moving if moving else true(),
+    )
+    for day, slot in session.exec(
+        select(VisitRequest.preferred_date, VisitRequest.preferred_time)
+        .where(VisitRequest.property_id == prop.id, *in_range)
+    ).all():
+        if slot and day in days:
+            days[day].property_times.add(slot)
+    for day, slot, property_id in session.exec(
+        select(VisitRequest.preferred_date, VisitRequest.preferred_time, VisitRequest.property_id)
+        .where(VisitRequest.user_id == user_id, *in_range)
+    ).all():
+        load = days.get(day)
+        if load is None:
+            continue
+        if slot:
+            load.client_times.add(slot)
+        if property_id == prop.id:
+            load.client_booked_property = True
+    return days
+
+
+def violation(load: DayLoad, slot: str) -> Optional[str]:
+    """The first rule that booking ``slot`` would break (a SLOT_REASONS key), or None."""
+    if load.client_booked_property:
+        return "client_property_day"
+    if slot in load.client_times:
+        return "client_time"
+    if slot in load.property_times:
+        return "property_time"
+    if load.vendor_count >= VENDOR_DAY_LIMIT:
+        return "vendor_day_limit"
+    if load.platform_count >= PLATFORM_DAY_LIMIT:
+        return "platform_day_limit"
+    if slot in load.platform_times:
+        return "platform_time"
+    return None
+
+
+def over_capacity(session: Session, vendor_id: str, day: str) -> Optional[str]:
+    """The day limit that the active visits of ``day`` exceed (a SLOT_REASONS key), or None.
+
+    request_visit calls it after its insert, while its transaction holds
+    SQLite's write lock, so no concurrent booking can slip in between.
+    """
+    platform, vendor = session.exec(
+        select(
+            func.coalesce(func.sum(VisitSlotCount.visits), 0),
+            func.coalesce(func.sum(case((VisitSlotCount.vendor_id == vendor_id, VisitSlotCount.visits), else_=0)), 0),
+        ).where(VisitSlotCount.day == day)
+    ).one()
+    if vendor > VENDOR_DAY_LIMIT:
+        return "vendor_day_limit"
+    if platform > PLATFORM_DAY_LIMIT:
+        return "platform_day_limit"
+    return None
+
+
+def blocked_slots(load: DayLoad) -> Dict[str, str]:
+    """``{slot: reason}`` for every slot of the day that cannot be booked."""
+    return {slot: SLOT_REASONS[code] for slot in VISIT_TIME_SLOTS if (code := violation(load, slot))}
+
+
+def booking_error(code: str, day: str, time: Optional[str]) -> str:
+    return BOOKING_ERRORS[code].format(day=day, time=time)
+
+
+def booking_conflict(
+    session: Session, prop: Property, user_id: str, day: str, time: Optional[str], fallback: str,
+    moving: Optional[str] = None,
+) -> str:
+    """409 detail for a booking (or a reschedule of ``moving``) the database refused, naming the rule the calendar would show."""
+    d = date.fromisoformat(day)
+    code = violation(load_days(session, prop, user_id, d, d, moving)[day], time) or fallback
+    return booking_error(code, day, time)
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# the app modules import each other flat, as when run from backend/app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+# database.py reads DATABASE_URL on import: tests that start the app get a
+# throwaway database (migrated and seeded by the lifespan), never ./imobiliaria.db
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='imobiliaria-tests-')}/test.db"
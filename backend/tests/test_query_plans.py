@@ -0,0 +1,23 @@
+import pytest
+
+import query_plans
+
+
+@pytest.fixture(scope="module")
+def problems():
+    return query_plans.check(query_plans.fresh_database())
+
+
+@pytest.mark.parametrize("label", [label for label, _ in query_plans.hot_queries()])
+def test_hot_query_uses_an_index_without_sorting(problems, label):
+    assert problems[label] == []
+
+
+def test_plan_problems_flags_scans_and_temp_sorts():
+    rows = [
+        (2, 0, 0, "SCAN property"),
+        (3, 0, 0, "SCAN visitrequest USING INDEX ix_visitrequest_recent"),
+        (4, 0, 0, "SCAN property_fts VIRTUAL TABLE INDEX 0:M4"),
+        (5, 0, 0, "USE TEMP B-TREE FOR ORDER BY"),
+    ]
+    assert query_plans.plan_problems(rows) == ["SCAN property", "USE TEMP B-TREE FOR ORDER BY"]
@@ -0,0 +1,86 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from database import engine
+from main import app
+from models import Property, User
+from security import create_access_token
+from visit_rules import booking_error
+
+CLIENTS = [f"booking-client-{i}" for i in range(12)]
+PROPERTIES = [f"booking-property-{i}" for i in range(4)]
+
+
+def auth(user_id):
+    return {"Authorization": "Bearer " + create_access_token({"sub": user_id})}
+
+
+def day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        with Session(engine) as session:
+            base = session.get(Property, "1").model_dump()
+            for user_id in CLIENTS:
+                session.add(User(id=user_id, nome=user_id, role="cliente"))
+            # one vendor each, so the vendor's day limit is not what refuses a booking
+            for i, property_id in enumerate(PROPERTIES):
+                session.add(Property(**{**base, "id": property_id, "vendedorId": f"booking-vendor-{i}"}))
+            session.commit()
+        yield c
+
+
+def book(client, user_id, property_id, preferred_date, preferred_time=None):
+    payload = {"preferred_date": preferred_date}
+    if preferred_time:
+        payload["preferred_time"] = preferred_time
+    return client.post(f"/properties/{property_id}/visit-requests", json=payload, headers=auth(user_id))
+
+
+def test_concurrent_bookings_of_one_slot_admit_exactly_one(client):
+    when = day(30)
+    start = threading.Barrier(len(CLIENTS))
+    statuses = []
+
+    def race(i):
+        start.wait()
+        statuses.append(book(client, CLIENTS[i], PROPERTIES[i % len(PROPERTIES)], when, "10:00").status_code)
+
+    threads = [threading.Thread(target=race, args=(i,)) for i in range(len(CLIENTS))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [201] + [409] * (len(CLIENTS) - 1)
+
+
+def test_untimed_visit_blocks_a_timed_one_the_same_day(client):
+    when = day(31)
+    assert book(client, CLIENTS[0], PROPERTIES[0], when).status_code == 201
+    r = book(client, CLIENTS[0], PROPERTIES[0], when, "11:00")
+    assert r.status_code == 409
+    assert r.json()["detail"] == booking_error("client_property_day", when, "11:00")
+
+
+def test_timed_visit_blocks_an_untimed_one_the_same_day(client):
+    when = day(32)
+    assert book(client, CLIENTS[0], PROPERTIES[0], when, "11:00").status_code == 201
+    r = book(client, CLIENTS[0], PROPERTIES[0], when)
+    assert r.status_code == 409
+    assert r.json()["detail"] == booking_error("client_property_day", when, None)
+
+
+def test_same_day_rule_is_per_client_and_property(client):
+    when = day(33)
+    assert book(client, CLIENTS[0], PROPERTIES[0], when).status_code == 201
+    assert book(client, CLIENTS[1], PROPERTIES[0], when).status_code == 201
+    assert book(client, CLIENTS[0], PROPERTIES[1], when).status_code == 201
+    assert book(client, CLIENTS[0], PROPERTIES[0], day(34)).status_code == 201
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Property, PropertyType, User, NotificationType } from './types/property';
-import api, { setToken, requestVisit, fetchVisitRequests, fetchMyFavorites, addFavorite, removeFavorite, fetchMyNotifications, markAllNotificationsRead, markNotificationRead } from './api';
+import api, { setToken, requestVisit, fetchVisitRequests, fetchMyFavorites, addFavorite, removeFavorite, fetchMyNotifications, fetchUnreadNotificationCount, fetchNotificationChanges, markAllNotificationsRead, markNotificationRead, subscribeRealtime } from './api';
 import { Header } from './components/Header';
 import { PropertyFilters } from './components/PropertyFilters';
 import { PropertyCard } from './components/PropertyCard';
@@ -153,24 +153,41 @@ function AppInner() {
     }
   }, [currentUser]);
 
-  // Poll notifications every 30s and show browser push for new ones
+  // New notifications are pushed by the server; show a browser notification for each
   useEffect(() => {
     if (!currentUser) return;
-    const interval = setInterval(async () => {
-      try {
-        const fresh: NotificationType[] = await fetchMyNotifications();
-        if (fresh && fresh.length > notifications.length) {
-          const newOnes = fresh.filter(n => !n.read);
-          if (newOnes.length > 0 && 'Notification' in window && Notification.permission === 'granted') {
-            const latest = newOnes[0];
-            new Notification(latest.title, { body: latest.message, icon: '/favicon.ico' });
-          }
-        }
-        setNotifications(fresh || []);
-      } catch { /* silent */ }
-    }, 30000);
-    return () => clearInterval(interval);
-  }, [currentUser, notifications.length]);
+    const showPush = (n: NotificationType) => {
+      if ('Notification' in window && Notification.permission === 'granted') {
+        new Notification(n.title, { body: n.message, icon: '/favicon.ico' });
+      }
+    };
+    if (typeof EventSource === 'undefined') {
+      // No SSE support: poll every 30s for what changed since the last poll
+      let cursor: number | null = null;
+      fetchUnreadNotificationCount().then((c) => { cursor = c.cursor; }).catch(() => {});
+      const interval = setInterval(async () => {
+        if (cursor === null) return;
+        try {
+          const delta = await fetchNotificationChanges(cursor);
+          const changed: NotificationType[] = delta.notifications || [];
+          if (changed.length === 0) return;
+          cursor = delta.cursor;
+          const latestUnread = changed.filter((n) => !n.read).pop();
+          if (latestUnread) showPush(latestUnread);
+          setNotifications((prev) => {
+            const byId = new Map(changed.map((n) => [n.id, n]));
+            const fresh = changed.filter((n) => !prev.some((p) => p.id === n.id)).reverse();
+            return [...fresh, ...prev.map((p) => byId.get(p.id) || p)];
+          });
+        } catch { /* silent */ }
+      }, 30000);
+      return () => clearInterval(interval);
+    }
+    return subscribeRealtime('notification', (n: NotificationType) => {
+      setNotifications((prev) => prev.some((p) => p.id === n.id) ? prev : [n, ...prev]);
+      showPush(n);
+    });
+  }, [currentUser]);
 
   const refreshVisitRequests = async () => {
     try {
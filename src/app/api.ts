@@ -7,6 +7,12 @@ export function resolveImageUrl(url: string | undefined | null): string {
   return url;
 }
 
+/** `srcset` for the WebP variants the backend records per image (`{"320": url, ...}`). */
+export function imageSrcSet(variants: Record<string, string> | undefined | null): string | undefined {
+  if (!variants) return undefined;
+  return Object.entries(variants).map(([width, url]) => `${resolveImageUrl(url)} ${width}w`).join(', ');
+}
+
 function getToken() {
   return localStorage.getItem('imobiliaria_token');
 }
@@ -49,6 +55,29 @@ export async function fetchProperties(filters: Record<string, any> = {}) {
   return request(url, { method: 'GET' });
 }
 
+/** Cursor (keyset) pagination for infinite scroll: pass the returned `nextCursor` as `after` to get the next page.
+ *  Add `view: 'card'` to the filters to receive only the fields a PropertyCard renders. */
+export async function fetchPropertiesPage(filters: Record<string, any> = {}, limit = 20, after?: string | null) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([k, v]) => {
+    if (v !== undefined && v !== null && v !== '') params.set(k, String(v));
+  });
+  params.set('limit', String(limit));
+  if (after) params.set('after', after);
+  const res = await fetch(`${API_BASE}/properties?${params.toString()}`);
+  if (!res.ok) throw new Error(res.statusText);
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
+/** Results page + total + facet counts (cidade, tipologia, tipo, tipoImovel, preco) in one call. */
+export async function fetchPropertySearch(filters: Record<string, any> = {}) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([k, v]) => {
+    if (v !== undefined && v !== null && v !== '') params.set(k, String(v));
+  });
+  return request(`/properties/search?${params.toString()}`, { method: 'GET' });
+}
+
 export async function fetchPropertiesCount(filters: Record<string, any> = {}) {
   const params = new URLSearchParams();
   Object.entries(filters).forEach(([k, v]) => {
@@ -79,6 +108,41 @@ export async function uploadProperty(formData: FormData) {
   return res.json().catch(() => null);
 }
 
+/** Bulk import from a CSV or NDJSON file. Calls `onResult` for each per-row result line as it streams in; resolves with the final summary. */
+export async function importProperties(file: File, onResult?: (result: any) => void) {
+  const formData = new FormData();
+  formData.append('file', file);
+  const token = getToken();
+  const headers: Record<string,string> = {};
+  if (token) headers['Authorization'] = `Bearer ${token}`;
+  const res = await fetch(API_BASE + '/properties/import', { method: 'POST', body: formData, headers });
+  if (!res.ok || !res.body) {
+    const text = await res.text();
+    let detail = text || res.statusText;
+    try {
+      const json = JSON.parse(text);
+      if (json.detail) detail = typeof json.detail === 'string' ? json.detail : JSON.stringify(json.detail);
+    } catch {}
+    throw new Error(detail);
+  }
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffered = '';
+  let summary = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (value) buffered += value;
+    const lines = done ? [buffered] : buffered.split('\n');
+    buffered = done ? '' : lines.pop() ?? '';
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const result = JSON.parse(line);
+      if (result.summary) summary = result.summary;
+      else onResult?.(result);
+    }
+    if (done) return summary;
+  }
+}
+
 export function uploadPropertyWithProgress(formData: FormData, onProgress: (progress: number) => void): Promise<any> {
   const API = API_BASE + '/properties/upload';
   const token = getToken();
@@ -115,6 +179,12 @@ export async function fetchVisitAvailability(propertyId: string, visitDate: stri
   return request(`/properties/${propertyId}/visit-availability?date=${encodeURIComponent(visitDate)}`, { method: 'GET' });
 }
 
+/** Availability for `days` consecutive days from `start` (one request for a whole calendar view). */
+export async function fetchVisitAvailabilityRange(propertyId: string, start: string, days = 30) {
+  const params = new URLSearchParams({ start, days: String(days) });
+  return request(`/properties/${propertyId}/visit-availability/range?${params}`, { method: 'GET' });
+}
+
 export async function fetchMyVisitRequests() {
   return request('/my/visit-requests', { method: 'GET' });
 }
@@ -151,8 +221,37 @@ export async function fetchVendedores() {
   return request('/vendedores', { method: 'GET' });
 }
 
-export async function fetchVisitRequests() {
-  return request('/visit-requests', { method: 'GET' });
+export interface VisitRequestFilters {
+  status?: string; // one status or several comma-separated, e.g. 'pending,approved'
+  property_id?: string;
+  date_from?: string; // YYYY-MM-DD, on the preferred visit date
+  date_to?: string;
+}
+
+function visitRequestParams(filters: VisitRequestFilters) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([k, v]) => {
+    if (v !== undefined && v !== null && v !== '') params.set(k, String(v));
+  });
+  return params;
+}
+
+export async function fetchVisitRequests(filters: VisitRequestFilters = {}) {
+  return request(`/visit-requests?${visitRequestParams(filters).toString()}`, { method: 'GET' });
+}
+
+/** Cursor pagination, newest first: pass the returned `nextCursor` as `after` to get the next page.
+ *  `path` is '/visit-requests' (admin), '/my/visit-requests' or '/vendor/visit-requests'. */
+export async function fetchVisitRequestsPage(path: string, filters: VisitRequestFilters = {}, limit = 50, after?: string | null) {
+  const params = visitRequestParams(filters);
+  params.set('limit', String(limit));
+  if (after) params.set('after', after);
+  const token = getToken();
+  const res = await fetch(`${API_BASE}${path}?${params.toString()}`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+  if (!res.ok) throw new Error(res.statusText);
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
 }
 
 export async function updateVisitRequest(id: string, payload: { status: 'approved' | 'rejected'; admin_note?: string }) {
@@ -185,6 +284,16 @@ export async function fetchMyNotifications() {
   return request('/my/notifications', { method: 'GET' });
 }
 
+/** Unread badge count and the sync cursor for `fetchNotificationChanges`. */
+export async function fetchUnreadNotificationCount(): Promise<{ unread: number; cursor: number }> {
+  return request('/my/notifications/unread-count', { method: 'GET' });
+}
+
+/** Notifications created or marked read/unread after `since`; pass the returned `cursor` next time. */
+export async function fetchNotificationChanges(since: number) {
+  return request(`/my/notifications?since=${since}`, { method: 'GET' });
+}
+
 export async function markNotificationRead(id: string) {
   return request(`/my/notifications/${id}/read`, { method: 'PATCH' });
 }
@@ -193,6 +302,68 @@ export async function markAllNotificationsRead() {
   return request('/my/notifications/read-all', { method: 'PATCH' });
 }
 
+// ---- Real-time events ----
+type RealtimeKind = 'notification' | 'chat';
+type RealtimeHandler = (data: any) => void;
+
+const realtimeHandlers: Record<RealtimeKind, Set<RealtimeHandler>> = { notification: new Set(), chat: new Set() };
+let eventSource: EventSource | null = null;
+let eventSourceToken: string | null = null;
+let lastEventId = '';
+let openingEventSource = false;
+
+async function openEventSource() {
+  const token = getToken();
+  if (openingEventSource) return;
+  if (eventSource && eventSourceToken === token && eventSource.readyState !== EventSource.CLOSED) return;
+  eventSource?.close();
+  eventSource = null;
+  if (eventSourceToken !== token) lastEventId = '';
+  eventSourceToken = token;
+  if (!token) return;
+  // The stream opens with a short-lived ticket, so the access token never appears in a URL (or an access log)
+  openingEventSource = true;
+  let ticket: string;
+  try {
+    ({ ticket } = await request('/events/ticket', { method: 'POST' }));
+  } catch {
+    setTimeout(openEventSource, 5000);
+    return;
+  } finally {
+    openingEventSource = false;
+  }
+  if (!realtimeHandlers.notification.size && !realtimeHandlers.chat.size) return; // unsubscribed meanwhile
+  const params = new URLSearchParams({ ticket });
+  if (lastEventId) params.set('last_event_id', lastEventId);
+  const source = new EventSource(`${API_BASE}/events?${params}`);
+  (Object.keys(realtimeHandlers) as RealtimeKind[]).forEach((kind) => {
+    source.addEventListener(kind, (e) => {
+      lastEventId = (e as MessageEvent).lastEventId || lastEventId;
+      const data = JSON.parse((e as MessageEvent).data);
+      realtimeHandlers[kind].forEach((handler) => handler(data));
+    });
+  });
+  // The browser reconnects by itself; once the ticket has expired it gives up, so open a new stream
+  // with a new ticket, resuming after the last event received
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED && eventSource === source) setTimeout(openEventSource, 5000);
+  };
+  eventSource = source;
+}
+
+/** Receive `notification` / `chat` events pushed by the server over one shared connection. Returns the unsubscribe function. */
+export function subscribeRealtime(kind: RealtimeKind, handler: RealtimeHandler) {
+  realtimeHandlers[kind].add(handler);
+  openEventSource();
+  return () => {
+    realtimeHandlers[kind].delete(handler);
+    if (!realtimeHandlers.notification.size && !realtimeHandlers.chat.size) {
+      eventSource?.close();
+      eventSource = null;
+    }
+  };
+}
+
 // ---- Chat ----
 export async function fetchChatConversations() {
   return request('/chat/conversations', { method: 'GET' });
@@ -202,6 +373,18 @@ export async function fetchChatMessages(partnerId: string) {
   return request(`/chat/${partnerId}`, { method: 'GET' });
 }
 
+/** Newest `limit` messages with a partner, oldest first; pass `nextCursor` as `before` for the page before. */
+export async function fetchChatMessagesPage(partnerId: string, limit = 50, before?: string | null) {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (before) params.set('before', before);
+  const token = getToken();
+  const res = await fetch(`${API_BASE}/chat/${partnerId}?${params.toString()}`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+  if (!res.ok) throw new Error(res.statusText);
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
 export async function sendChatMessage(partnerId: string, message: string, propertyId?: string) {
   return request(`/chat/${partnerId}`, {
     method: 'POST',
@@ -312,21 +495,30 @@ export async function fetchPriceHistory(propertyId: string) {
 }
 
 // ---- Watermark ----
-export async function watermarkProperty(propertyId: string) {
-  return request(`/admin/watermark/${propertyId}`, { method: 'POST' });
+/** Starts the background watermark job and polls it until it finishes; resolves with the final job. */
+export async function watermarkProperty(propertyId: string, onProgress?: (job: any) => void) {
+  let job = await request(`/admin/watermark/${propertyId}`, { method: 'POST' });
+  while (job.status === 'queued' || job.status === 'running') {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    job = await request(`/admin/watermark/jobs/${job.id}`, { method: 'GET' });
+  }
+  if (job.status === 'failed') throw new Error(job.errors?.join('; ') || 'Erro');
+  return job;
 }
 
 export { getToken, setToken };
 export default {
-  loginWithCredentials, registerUser, fetchProperties, fetchPropertiesCount,
-  createProperty, uploadProperty, uploadPropertyWithProgress, deleteProperty,
+  loginWithCredentials, registerUser, fetchProperties, fetchPropertiesPage, fetchPropertySearch, fetchPropertiesCount,
+  createProperty, uploadProperty, uploadPropertyWithProgress, importProperties, deleteProperty,
   updateProperty, restoreProperty,
-  getCurrentUser, getToken, setToken, requestVisit, fetchVisitRequests,
+  getCurrentUser, getToken, setToken, requestVisit, fetchVisitRequests, fetchVisitRequestsPage,
   fetchMyVisitRequests, cancelVisitRequest, updateMyVisitRequest,
   fetchUsers, fetchClientes, fetchVendedores, updateVisitRequest, updateProfile,
   fetchMyFavorites, addFavorite, removeFavorite,
-  fetchMyNotifications, markNotificationRead, markAllNotificationsRead,
-  fetchChatConversations, fetchChatMessages, sendChatMessage,
+  fetchMyNotifications, fetchUnreadNotificationCount, fetchNotificationChanges,
+  markNotificationRead, markAllNotificationsRead, subscribeRealtime,
+  fetchChatConversations, fetchChatMessages, fetchChatMessagesPage, sendChatMessage,
   fetchReviews, createReview, checkMyReview,
   forgotPassword, resetPassword,
   verifyEmail, resendVerificationCode,
@@ -7,7 +7,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '.
 import { Badge } from './ui/badge';
 import { Input } from './ui/input';
 import { formatMozCurrency } from '../utils/format';
-import api, { updateVisitRequest, fetchAdminStats, fetchAdminReport, adminUpdateUser, fetchDeletedProperties, restoreProperty, fetchClientes, fetchVendedores, adminVerifyProperty, watermarkProperty, fetchChatConversations, fetchChatMessages, sendChatMessage } from '../api';
+import api, { updateVisitRequest, fetchAdminStats, fetchAdminReport, adminUpdateUser, fetchDeletedProperties, restoreProperty, fetchClientes, fetchVendedores, adminVerifyProperty, watermarkProperty, fetchChatConversations, fetchChatMessagesPage, sendChatMessage, subscribeRealtime } from '../api';
 import { Settings, Trash2, Eye, ArrowLeft, BarChart3, Users, Home, CalendarDays, Star, FileText, Loader2, RotateCcw, ShieldCheck, ShieldOff, UserCheck, Briefcase, Plus, CheckCircle, XCircle, Droplets, MessageCircle, Send } from 'lucide-react';
 import { toast } from 'sonner';
 
@@ -63,6 +63,8 @@ export function AdminPanel({ properties, visitRequests = [], users = [], onRefre
   const [selectedConvName, setSelectedConvName] = useState('');
   const [chatMessages, setChatMessages] = useState<ChatMessageType[]>([]);
   const [loadingMsgs, setLoadingMsgs] = useState(false);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [newMsg, setNewMsg] = useState('');
   const [sendingMsg, setSendingMsg] = useState(false);
   const chatEndRef = useRef<HTMLDivElement>(null);
@@ -148,13 +150,25 @@ export function AdminPanel({ properties, visitRequests = [], users = [], onRefre
     setSelectedConvName(partnerName);
     setLoadingMsgs(true);
     try {
-      const msgs = await fetchChatMessages(partnerId);
-      setChatMessages(msgs || []);
+      const { items, nextCursor } = await fetchChatMessagesPage(partnerId);
+      setChatMessages(items || []);
+      setOlderCursor(nextCursor);
       setTimeout(() => chatEndRef.current?.scrollIntoView({ behavior: 'smooth' }), 100);
     } catch (err) { console.error(err); }
     finally { setLoadingMsgs(false); }
   };
 
+  const loadOlderMessages = async () => {
+    if (!selectedConv || !olderCursor) return;
+    setLoadingOlder(true);
+    try {
+      const { items, nextCursor } = await fetchChatMessagesPage(selectedConv, 50, olderCursor);
+      setChatMessages((prev) => [...(items || []), ...prev]);
+      setOlderCursor(nextCursor);
+    } catch (err) { console.error(err); }
+    finally { setLoadingOlder(false); }
+  };
+
   const handleSendMessage = async () => {
     if (!newMsg.trim() || !selectedConv) return;
     setSendingMsg(true);
@@ -167,6 +181,16 @@ export function AdminPanel({ properties, visitRequests = [], users = [], onRefre
     finally { setSendingMsg(false); }
   };
 
+  // Messages from the open conversation's partner arrive as push events
+  useEffect(() => {
+    if (!selectedConv) return;
+    return subscribeRealtime('chat', (msg: ChatMessageType) => {
+      if (msg.sender_id !== selectedConv) return;
+      setChatMessages((prev) => prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]);
+      setTimeout(() => chatEndRef.current?.scrollIntoView({ behavior: 'smooth' }), 100);
+    });
+  }, [selectedConv]);
+
   const filtered = properties.filter(p =>
     p.titulo.toLowerCase().includes(search.toLowerCase()) ||
     p.vendedorNome.toLowerCase().includes(search.toLowerCase())
@@ -771,6 +795,13 @@ export function AdminPanel({ properties, visitRequests = [], users = [], onRefre
                     </div>
                   ) : (
                     <>
+                      {olderCursor && (
+                        <div className="text-center">
+                          <Button variant="ghost" size="sm" onClick={loadOlderMessages} disabled={loadingOlder}>
+                            {loadingOlder ? <Loader2 className="w-4 h-4 animate-spin" /> : t('chat.loadEarlier')}
+                          </Button>
+                        </div>
+                      )}
                       {chatMessages.map((m) => {
                         const isMe = String(m.sender_id) !== String(selectedConv);
                         return (
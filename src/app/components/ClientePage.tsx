@@ -5,7 +5,7 @@ import { formatMozCurrency } from '../utils/format';
 import {
   resolveImageUrl, fetchMyVisitRequests, cancelVisitRequest, updateMyVisitRequest,
   updateProfile, fetchMyFavorites, removeFavorite,
-  fetchChatConversations, fetchChatMessages, sendChatMessage,
+  fetchChatConversations, fetchChatMessagesPage, sendChatMessage, subscribeRealtime,
   fetchMyNotifications, markNotificationRead, requestVisit,
   fetchKYC, updateKYC,
 } from '../api';
@@ -132,6 +132,8 @@ export function ClientePage({ currentUser, properties, onViewDetails, onLogout,
   const [selectedConv, setSelectedConv] = useState<string | null>(null);
   const [chatMessages, setChatMessages] = useState<ChatMessageType[]>([]);
   const [loadingMsgs, setLoadingMsgs] = useState(false);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [newMsg, setNewMsg] = useState('');
   const [sendingMsg, setSendingMsg] = useState(false);
 
@@ -341,12 +343,24 @@ export function ClientePage({ currentUser, properties, onViewDetails, onLogout,
     setSelectedConv(partnerId);
     setLoadingMsgs(true);
     try {
-      const msgs = await fetchChatMessages(partnerId);
-      setChatMessages(msgs || []);
+      const { items, nextCursor } = await fetchChatMessagesPage(partnerId);
+      setChatMessages(items || []);
+      setOlderCursor(nextCursor);
     } catch (err) { console.error(err); }
     finally { setLoadingMsgs(false); }
   };
 
+  const loadOlderMessages = async () => {
+    if (!selectedConv || !olderCursor) return;
+    setLoadingOlder(true);
+    try {
+      const { items, nextCursor } = await fetchChatMessagesPage(selectedConv, 50, olderCursor);
+      setChatMessages((prev) => [...(items || []), ...prev]);
+      setOlderCursor(nextCursor);
+    } catch (err) { console.error(err); }
+    finally { setLoadingOlder(false); }
+  };
+
   const handleSendMessage = async () => {
     if (!newMsg.trim() || !selectedConv) return;
     setSendingMsg(true);
@@ -358,6 +372,15 @@ export function ClientePage({ currentUser, properties, onViewDetails, onLogout,
     finally { setSendingMsg(false); }
   };
 
+  // Messages from the open conversation's partner arrive as push events
+  useEffect(() => {
+    if (!selectedConv) return;
+    return subscribeRealtime('chat', (msg: ChatMessageType) => {
+      if (msg.sender_id !== selectedConv) return;
+      setChatMessages((prev) => prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]);
+    });
+  }, [selectedConv]);
+
   const handleAlertClick = async (n: NotificationType) => {
     if (!n.read) {
       try {
@@ -964,14 +987,23 @@ export function ClientePage({ currentUser, properties, onViewDetails, onLogout,
                   ) : chatMessages.length === 0 ? (
                     <div className="text-center text-muted-foreground py-8">{t('client.noMessagesYet')}</div>
                   ) : (
-                    chatMessages.map((m) => (
-                      <div key={m.id} className={`flex ${String(m.sender_id) === String(currentUser.id) ? 'justify-end' : 'justify-start'}`}>
-                        <div className={`max-w-[70%] px-3 py-2 rounded-xl text-sm ${String(m.sender_id) === String(currentUser.id) ? 'bg-primary text-primary-foreground rounded-br-sm' : 'bg-muted rounded-bl-sm'}`}>
-                          {m.message}
-                          <div className="text-[10px] opacity-60 mt-1">{new Date(m.created_at).toLocaleString(lang === 'pt' ? 'pt-MZ' : 'en-US')}</div>
+                    <>
+                      {olderCursor && (
+                        <div className="text-center">
+                          <Button variant="ghost" size="sm" onClick={loadOlderMessages} disabled={loadingOlder}>
+                            {loadingOlder ? <Loader2 className="w-4 h-4 animate-spin" /> : t('chat.loadEarlier')}
+                          </Button>
                         </div>
-                      </div>
-                    ))
+                      )}
+                      {chatMessages.map((m) => (
+                        <div key={m.id} className={`flex ${String(m.sender_id) === String(currentUser.id) ? 'justify-end' : 'justify-start'}`}>
+                          <div className={`max-w-[70%] px-3 py-2 rounded-xl text-sm ${String(m.sender_id) === String(currentUser.id) ? 'bg-primary text-primary-foreground rounded-br-sm' : 'bg-muted rounded-bl-sm'}`}>
+                            {m.message}
+                            <div className="text-[10px] opacity-60 mt-1">{new Date(m.created_at).toLocaleString(lang === 'pt' ? 'pt-MZ' : 'en-US')}</div>
+                          </div>
+                        </div>
+                      ))}
+                    </>
                   )}
                 </div>
                 <div className="flex gap-2">
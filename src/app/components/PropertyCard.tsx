@@ -1,7 +1,7 @@
 import { useState } from 'react';
 import { Property } from '../types/property';
 import { formatMozCurrency } from '../utils/format';
-import { resolveImageUrl } from '../api';
+import { imageSrcSet, resolveImageUrl } from '../api';
 import { Card, CardContent } from './ui/card';
 import { Badge } from './ui/badge';
 import { MapPin, Home, Maximize, Car, Heart, Share2, BedDouble, Bath, Copy, MessageSquare, Facebook, ExternalLink, ShieldCheck, GitCompareArrows } from 'lucide-react';
@@ -71,6 +71,8 @@ export function PropertyCard({
       <div className="aspect-[4/3] overflow-hidden relative">
         <img 
           src={resolveImageUrl(property.imagem)} 
+          srcSet={imageSrcSet(property.imagemVariantes ?? property.variantes?.[property.imagem])}
+          sizes="(max-width: 768px) 100vw, (max-width: 1280px) 50vw, 33vw"
           alt={property.titulo}
           className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-500"
           loading="lazy"
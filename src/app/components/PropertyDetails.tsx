@@ -3,7 +3,7 @@ import type { Property, User, ReviewType, PriceHistoryEntry, ChatMessageType } f
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle } from './ui/dialog';
 import { Input } from './ui/input';
 import { formatMozCurrency } from '../utils/format';
-import { resolveImageUrl, fetchReviews, createReview, checkMyReview, fetchPriceHistory, fetchChatMessages, sendChatMessage, fetchVisitAvailability } from '../api';
+import { resolveImageUrl, fetchReviews, createReview, checkMyReview, fetchPriceHistory, fetchChatMessagesPage, sendChatMessage, fetchVisitAvailabilityRange, subscribeRealtime } from '../api';
 import { Badge } from './ui/badge';
 import {
   MapPin, Home, Maximize, Car, BedDouble, Bath, Calendar, Trees, Waves, Leaf,
@@ -65,6 +65,8 @@ export function PropertyDetails({
   // Visit availability
   const [blockedSlots, setBlockedSlots] = useState<Record<string, string>>({});
   const [loadingAvailability, setLoadingAvailability] = useState(false);
+  // Days already fetched for this property (one range request covers a month of date picks)
+  const availabilityCache = useRef<Record<string, any>>({});
   const [vendorDayInfo, setVendorDayInfo] = useState({ count: 0, limit: 3 });
   const [adminDayInfo, setAdminDayInfo] = useState({ count: 0, limit: 10 });
   const [clientAlreadyBooked, setClientAlreadyBooked] = useState(false);
@@ -156,6 +158,7 @@ export function PropertyDetails({
       setBlockedSlots({});
       setLoadingAvailability(false);
       setClientAlreadyBooked(false);
+      availabilityCache.current = {};
       setActiveTab('schedule');
     }
   }, [open]);
@@ -169,8 +172,8 @@ export function PropertyDetails({
     setShowChat(true);
     setLoadingChat(true);
     try {
-      const msgs = await fetchChatMessages(ADMIN_ID);
-      setChatMessages(msgs || []);
+      const { items } = await fetchChatMessagesPage(ADMIN_ID);
+      setChatMessages(items || []);
     } catch { setChatMessages([]); }
     finally { setLoadingChat(false); }
   };
@@ -187,6 +190,15 @@ export function PropertyDetails({
     } finally { setSendingChat(false); }
   };
 
+  // Messages from the open conversation's partner arrive as push events
+  useEffect(() => {
+    if (!(open && showChat)) return;
+    return subscribeRealtime('chat', (msg: ChatMessageType) => {
+      if (msg.sender_id !== ADMIN_ID) return;
+      setChatMessages((prev) => prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]);
+    });
+  }, [open, showChat]);
+
   // Fetch visit availability when date changes
   const handleDateChange = async (newDate: string) => {
     setPreferredDate(newDate);
@@ -197,7 +209,14 @@ export function PropertyDetails({
     }
     setLoadingAvailability(true);
     try {
-      const data = await fetchVisitAvailability(property.id, newDate);
+      let data = availabilityCache.current[newDate];
+      if (!data) {
+        const range = await fetchVisitAvailabilityRange(property.id, newDate, 30);
+        for (const day of range.days || []) {
+          availabilityCache.current[day.date] = { ...day, vendor_day_limit: range.vendor_day_limit, admin_day_limit: range.admin_day_limit };
+        }
+        data = availabilityCache.current[newDate] || {};
+      }
       setBlockedSlots(data.blocked || {});
       setVendorDayInfo({ count: data.vendor_day_count ?? 0, limit: data.vendor_day_limit ?? 3 });
       setAdminDayInfo({ count: data.admin_day_count ?? 0, limit: data.admin_day_limit ?? 10 });
@@ -605,7 +624,9 @@ export function PropertyDetails({
                           setPreferredTime('');
                           setBlockedSlots({});
                           setClientAlreadyBooked(false);
+                          availabilityCache.current = {};
                         } catch (err: any) {
+                          availabilityCache.current = {}; // e.g. a 409: the slot was taken meanwhile
                           toast.error(err?.message || t('visit.fail'));
                         } finally { setSubmitting(false); }
                       }}
@@ -879,8 +900,12 @@ export function PropertyDetails({
                     ) : (
                       <TrendingDown className="w-4 h-4 text-green-500" />
                     )}
-                    <span className="line-through text-muted-foreground">{formatMozCurrency(ph.old_price)}</span>
-                    <span>→</span>
+                    {ph.old_price !== ph.new_price && (
+                      <>
+                        <span className="line-through text-muted-foreground">{formatMozCurrency(ph.old_price)}</span>
+                        <span>→</span>
+                      </>
+                    )}
                     <span className="font-semibold">{formatMozCurrency(ph.new_price)}</span>
                     <span className="text-xs text-muted-foreground ml-auto">
                       {new Date(ph.changed_at).toLocaleDateString(lang === 'pt' ? 'pt-MZ' : 'en-US')}
@@ -14,6 +14,8 @@ export interface Property {
   area: number;
   imagem: string;
   galeria: string[]; // Múltiplas fotos
+  variantes?: Record<string, Record<string, string>>; // image url -> { width: WebP url }
+  imagemVariantes?: Record<string, string>; // cover image variants (view=card)
   vendedorId: string;
   vendedorNome: string;
   createdAt: string;